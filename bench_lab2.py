@@ -0,0 +1,373 @@
+import argparse
+import contextlib
+import csv
+import io
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from lab2_avl import AVLFile, AVLNode, NODE
+from lab2_sequential import sequentialFile
+from lab2_ingest import DISTRIBUTIONS, generate_csv, id_sequence, id_space, encoded_blocks, load_blocks
+from lab2_record import np
+from lab2_fixtures import make_record
+from lab2_wal import GROUP_SIZE, GROUP_MS
+
+SUITE_ENGINES = {
+    # motor: (busqueda puntual, eliminacion, reconstruccion)
+    'sequential': ('get', 'remove', 'reconstruct_main_file'),
+    'avl': ('search', 'delete', 'compact'),
+}
+SUITE_WORKLOADS = ('load', 'insert', 'lookup', 'range', 'delete', 'rebuild')
+RANGE_ROWS = 100  # filas por consulta de rango si las llaves estuvieran repartidas uniformemente
+PERCENTILES = (50, 95, 99)
+
+def node_memory(count=100000):
+    # bytes por AVLNode vivo en memoria
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [AVLNode(i, i * 114) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del nodes
+    return (after - before) / count
+
+def bench_avl(sizes, index_type='file', seed=42):
+    print(f"Memoria por AVLNode: {node_memory():.1f} bytes (en disco: {NODE.size} bytes)")
+    for n in sizes:
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            ids = list(range(1, n + 1))
+            random.Random(seed).shuffle(ids)
+            avl = AVLFile(os.path.join(tmp_dir, 'employees_avl.dat'), index_type=index_type)
+
+            t0 = time.perf_counter()
+            for i in ids:
+                avl.insert(make_record(i))
+            insert_time = time.perf_counter() - t0
+
+            sample = random.Random(seed).sample(ids, min(10000, n))
+            t0 = time.perf_counter()
+            for i in sample:
+                avl.search(i)
+            search_time = time.perf_counter() - t0
+
+            if index_type == 'array':
+                print(f"Indice en arreglos: {avl.index.memory_usage() / n:.1f} bytes por llave")
+
+            t0 = time.perf_counter()
+            for i in sample:
+                avl.delete(i)
+            delete_time = time.perf_counter() - t0
+            avl.close()
+
+            print(f"AVL ({index_type}) n={n}: insert {n / insert_time:,.0f} reg/s, "
+                  f"search {len(sample) / search_time:,.0f} op/s, "
+                  f"delete {len(sample) / delete_time:,.0f} op/s")
+        finally:
+            shutil.rmtree(tmp_dir)
+
+def bench_wal(n, group_size=GROUP_SIZE, group_ms=GROUP_MS):
+    # tasa de insercion durable: sin bitacora, fsync por operacion y commit en grupo
+    modes = [
+        ('sin bitacora (no durable)', {}),
+        ('bitacora, fsync por operacion', {'wal': True, 'group_size': 1}),
+        (f'bitacora, grupo {group_size} op / {group_ms} ms', {'wal': True, 'group_size': group_size, 'group_ms': group_ms}),
+    ]
+    for name, options in modes:
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            sf = sequentialFile(os.path.join(tmp_dir, 'employees.dat'), os.path.join(tmp_dir, 'auxiliary.dat'),
+                                k=n + 1, **options)
+            t0 = time.perf_counter()
+            for i in range(1, n + 1):
+                sf.insert(make_record(i))
+            sf.commit()
+            elapsed = time.perf_counter() - t0
+            syncs = sf.wal.syncs if sf.wal is not None else 0
+            sf.close()
+            print(f"WAL {name}: {n / elapsed:,.0f} reg/s ({syncs} fsync)")
+        finally:
+            shutil.rmtree(tmp_dir)
+
+def bench_scan(sizes, workers_list):
+    # filtro de tabla completa: filter() en un proceso contra parallel_filter con N procesos
+    for n in sizes:
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            sf = sequentialFile(os.path.join(tmp_dir, 'employees.dat'), os.path.join(tmp_dir, 'auxiliary.dat'))
+            sf.bulk_load(make_record(i) for i in range(1, n + 1))
+            ranges = {'Age': (30, 40), 'Salary': (30200.0, 30800.0)}
+
+            t0 = time.perf_counter()
+            expected = len(sf.filter(**ranges))
+            base = time.perf_counter() - t0
+            print(f"Scan n={n}: filter {n / base:,.0f} reg/s ({expected} resultados)")
+            for workers in workers_list:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    sf.parallel_filter(workers=workers, executor=pool, **ranges)  # arranque de procesos
+                    t0 = time.perf_counter()
+                    found = len(sf.parallel_filter(workers=workers, executor=pool, **ranges))
+                    elapsed = time.perf_counter() - t0
+                assert found == expected
+                print(f"  {workers} procesos: {n / elapsed:,.0f} reg/s (x{base / elapsed:.2f})")
+            sf.close()
+        finally:
+            shutil.rmtree(tmp_dir)
+
+def open_engine(name, tmp_dir, **options):
+    if name == 'sequential':
+        return sequentialFile(os.path.join(tmp_dir, 'employees.dat'), os.path.join(tmp_dir, 'auxiliary.dat'),
+                              **options)
+    return AVLFile(os.path.join(tmp_dir, 'employees_avl.dat'), **options)
+
+def bench_readers(n, threads_list, seconds=2.0, with_writer=True):
+    # busquedas por segundo con N hilos lectores en modo concurrente, con o sin un escritor. Solo
+    # el secuencial: en el AVL el modo concurrente serializa las lecturas (ver AVLFile)
+    for engine_name in ['sequential']:
+        lookup_name = SUITE_ENGINES[engine_name][0]
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                engine = open_engine(engine_name, tmp_dir, concurrent=True)
+                engine.bulk_load(make_record(i) for i in range(1, n + 1))
+            lookup = getattr(engine, lookup_name)
+            base = None
+            next_id = [n + 1]
+            for threads in threads_list:
+                stop = threading.Event()
+                counts = [0] * threads
+                def reader(slot):
+                    rng = random.Random(slot)
+                    while not stop.is_set():
+                        lookup(rng.randint(1, n))
+                        counts[slot] += 1
+                def writer():
+                    while not stop.is_set():
+                        engine.insert(make_record(next_id[0]))
+                        next_id[0] += 1
+                workers = [threading.Thread(target=reader, args=(slot,)) for slot in range(threads)]
+                if with_writer:
+                    workers.append(threading.Thread(target=writer))
+                with contextlib.redirect_stdout(io.StringIO()):
+                    for t in workers:
+                        t.start()
+                    time.sleep(seconds)
+                    stop.set()
+                    for t in workers:
+                        t.join()
+                rate = sum(counts) / seconds
+                base = base or rate
+                print(f"{engine_name:10} {threads} lectores{' + 1 escritor' if with_writer else ''}: "
+                      f"{rate:,.0f} busquedas/s (x{rate / base:.2f})")
+            engine.close()
+        finally:
+            shutil.rmtree(tmp_dir)
+
+def timed(op, args):
+    # latencia de cada llamada en nanosegundos
+    samples = []
+    for arg in args:
+        t0 = time.perf_counter_ns()
+        op(*arg)
+        samples.append(time.perf_counter_ns() - t0)
+    return samples
+
+def run_workloads(engine_name, csv_path, n, distribution, ops, seed, workers=None):
+    # una corrida completa sobre un motor nuevo: {carga de trabajo: latencias en ns}.
+    # load y rebuild dan una muestra por corrida (la operacion completa)
+    employee_id = id_sequence(n, distribution, seed)
+    rng = random.Random(seed)
+    ops = min(ops, n)
+    lookup_name, delete_name, rebuild_name = SUITE_ENGINES[engine_name]
+    samples = {}
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        engine = open_engine(engine_name, tmp_dir)
+        t0 = time.perf_counter_ns()
+        load_blocks(engine, encoded_blocks(csv_path, workers))
+        samples['load'] = [time.perf_counter_ns() - t0]
+
+        new_ids = [id_space(n, distribution) + 1 + i for i in range(ops)]
+        rng.shuffle(new_ids)
+        samples['insert'] = timed(engine.insert, [(make_record(i),) for i in new_ids])
+
+        lookup = getattr(engine, lookup_name)
+        samples['lookup'] = timed(lookup, [(employee_id(rng.randrange(n)),) for _ in range(ops)])
+
+        width = max(1, RANGE_ROWS * id_space(n, distribution) // n)
+        starts = [employee_id(rng.randrange(n)) for _ in range(max(1, ops // 10))]
+        samples['range'] = timed(engine.range_search, [(start, start + width) for start in starts])
+
+        samples['delete'] = timed(getattr(engine, delete_name), [(employee_id(i),) for i in rng.sample(range(n), ops)])
+        samples['rebuild'] = timed(getattr(engine, rebuild_name), [()])
+        engine.close()
+    finally:
+        shutil.rmtree(tmp_dir)
+    return samples
+
+def percentile(values, q):
+    # rango mas cercano sobre valores ordenados
+    if not values:
+        return 0
+    return values[max(1, math.ceil(q / 100 * len(values))) - 1]
+
+def summarize(engine, distribution, rows, workload, samples, ops_per_sample=1):
+    values = sorted(samples)
+    total = sum(values)
+    result = {'engine': engine, 'distribution': distribution, 'rows': rows, 'workload': workload,
+              'samples': len(values), 'mean_us': total / len(values) / 1000 if values else 0.0}
+    for q in PERCENTILES:
+        result[f'p{q}_us'] = percentile(values, q) / 1000
+    result['max_us'] = values[-1] / 1000 if values else 0.0
+    result['ops_per_s'] = len(values) * ops_per_sample * 1e9 / total if total else 0.0
+    return result
+
+def bench_suite(sizes, distributions, engines, runs=3, warmup=1, ops=1000, seed=42, workers=None):
+    # warmup corridas descartadas y luego runs corridas cuyas latencias se juntan por carga de trabajo
+    results = []
+    for n in sizes:
+        for distribution in distributions:
+            tmp_dir = tempfile.mkdtemp()
+            try:
+                csv_path = os.path.join(tmp_dir, 'employee.csv')
+                generate_csv(csv_path, n, distribution, seed)
+                for engine in engines:
+                    pooled = {workload: [] for workload in SUITE_WORKLOADS}
+                    for run in range(warmup + runs):
+                        with contextlib.redirect_stdout(io.StringIO()):  # mensajes de los motores
+                            samples = run_workloads(engine, csv_path, n, distribution, ops, seed + run, workers)
+                        if run >= warmup:
+                            for workload in SUITE_WORKLOADS:
+                                pooled[workload].extend(samples[workload])
+                    for workload in SUITE_WORKLOADS:
+                        result = summarize(engine, distribution, n, workload, pooled[workload],
+                                           n if workload == 'load' else 1)
+                        results.append(result)
+                        print(f"{engine:10} {distribution:10} n={n:<9} {workload:8} "
+                              f"p50 {result['p50_us']:12,.1f} us  p95 {result['p95_us']:12,.1f} us  "
+                              f"p99 {result['p99_us']:12,.1f} us  {result['ops_per_s']:14,.0f} op/s")
+            finally:
+                shutil.rmtree(tmp_dir)
+    return results
+
+def bench_rebuild(sizes, k=1000, inserts=5000):
+    # latencia de insercion con la reconstruccion en primer plano y en segundo plano: en primer
+    # plano la insercion que llena el auxiliar paga la mezcla completa, asi que la cola crece con n
+    for n in sizes:
+        for mode, background in [('primer plano', False), ('segundo plano', True)]:
+            tmp_dir = tempfile.mkdtemp()
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    sf = sequentialFile(os.path.join(tmp_dir, 'employees.dat'),
+                                        os.path.join(tmp_dir, 'auxiliary.dat'), k=k, background=background)
+                    sf.bulk_load(make_record(2 * i) for i in range(1, n + 1))
+                    samples = []
+                    for i in range(inserts):
+                        record = make_record(2 * (i * 7919 % n) + 1)
+                        t0 = time.perf_counter_ns()
+                        sf.insert(record)
+                        samples.append(time.perf_counter_ns() - t0)
+                    sf.close()
+                result = summarize('sequential', mode, n, 'insert', samples)
+                print(f"Rebuild n={n:<9} {mode:14} p50 {result['p50_us']:10,.1f} us  "
+                      f"p99 {result['p99_us']:12,.1f} us  max {result['max_us']:12,.1f} us")
+            finally:
+                shutil.rmtree(tmp_dir)
+
+def write_report(path, results, meta):
+    # .json con metadatos y resultados; cualquier otra extension se escribe como csv
+    if path.endswith('.json'):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2)
+    else:
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+
+def compare_baseline(results, baseline, tolerance=0.2, metric='p50_us'):
+    # regresiones: resultados cuyo metric empeora mas de tolerance respecto a la linea base
+    def key(result):
+        return result['engine'], result['distribution'], result['rows'], result['workload']
+    previous = {key(result): result for result in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get(key(result))
+        if old and old[metric] > 0 and result[metric] > old[metric] * (1 + tolerance):
+            regressions.append((key(result), old[metric], result[metric]))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks de lab2')
+    sub = parser.add_subparsers(dest='command', required=True)
+    avl = sub.add_parser('avl', help='tasa de insercion y memoria por nodo del AVL')
+    avl.add_argument('--sizes', type=int, nargs='+', default=[30000, 1000000])
+    avl.add_argument('--index', choices=['file', 'array'], default='file')
+    wal = sub.add_parser('wal', help='tasa de escritura durable con y sin bitacora')
+    wal.add_argument('--n', type=int, default=5000)
+    wal.add_argument('--group-size', type=int, default=GROUP_SIZE)
+    wal.add_argument('--group-ms', type=float, default=GROUP_MS)
+    scan = sub.add_parser('scan', help='filtro completo en paralelo sobre el archivo principal')
+    scan.add_argument('--sizes', type=int, nargs='+', default=[30000, 1000000])
+    scan.add_argument('--workers', type=int, nargs='+', default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    readers = sub.add_parser('readers', help='busquedas con hilos lectores en modo concurrente (secuencial)')
+    readers.add_argument('--n', type=int, default=100000)
+    readers.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    readers.add_argument('--seconds', type=float, default=2.0)
+    readers.add_argument('--no-writer', action='store_true')
+    rebuild = sub.add_parser('rebuild', help='latencia de insercion con reconstruccion en primer y segundo plano')
+    rebuild.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    rebuild.add_argument('--k', type=int, default=1000)
+    rebuild.add_argument('--inserts', type=int, default=5000)
+    suite = sub.add_parser('suite', help='cargas de trabajo con percentiles, reporte y comparacion con linea base')
+    suite.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    suite.add_argument('--distributions', nargs='+', choices=DISTRIBUTIONS, default=list(DISTRIBUTIONS))
+    suite.add_argument('--engines', nargs='+', choices=list(SUITE_ENGINES), default=list(SUITE_ENGINES))
+    suite.add_argument('--runs', type=int, default=3)
+    suite.add_argument('--warmup', type=int, default=1)
+    suite.add_argument('--ops', type=int, default=1000, help='operaciones por carga de trabajo y corrida')
+    suite.add_argument('--seed', type=int, default=42)
+    suite.add_argument('--workers', type=int, default=None)
+    suite.add_argument('--report', nargs='+', default=['bench_report.json'], help='.json o .csv')
+    suite.add_argument('--baseline', help='reporte .json de una corrida anterior')
+    suite.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.command == 'avl':
+        bench_avl(args.sizes, args.index)
+    elif args.command == 'wal':
+        bench_wal(args.n, args.group_size, args.group_ms)
+    elif args.command == 'scan':
+        bench_scan(args.sizes, args.workers)
+    elif args.command == 'readers':
+        bench_readers(args.n, args.threads, args.seconds, not args.no_writer)
+    elif args.command == 'rebuild':
+        bench_rebuild(args.sizes, args.k, args.inserts)
+    elif args.command == 'suite':
+        results = bench_suite(args.sizes, args.distributions, args.engines, args.runs, args.warmup,
+                              args.ops, args.seed, args.workers)
+        meta = {'python': platform.python_version(), 'platform': platform.platform(),
+                'cpus': os.cpu_count(), 'numpy': np is not None, 'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'args': vars(args)}
+        for path in args.report:
+            write_report(path, results, meta)
+        if args.baseline:
+            with open(args.baseline, encoding='utf-8') as f:
+                regressions = compare_baseline(results, json.load(f), args.tolerance)
+            for (engine, distribution, rows, workload), old, new in regressions:
+                print(f"REGRESION {engine} {distribution} n={rows} {workload}: p50 {old:,.1f} -> {new:,.1f} us")
+            if regressions:
+                sys.exit(1)
+
+if __name__ == "__main__":
+    main()
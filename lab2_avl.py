@@ -1,11 +1,19 @@
 import struct
 import os 
-import csv
 import time
 import random 
-
-FORMAT = 'i30si20s20s20sf10s'  # Formato para struct (ajustado para los campos)
-RECORD_SIZE = struct.calcsize(FORMAT)
+from collections import OrderedDict
+from array import array
+from itertools import groupby, islice
+from bisect import bisect_left
+import heapq
+import mmap
+import tempfile
+
+from lab2_record import Record, RecordBatch, RECORD_SIZE, KEY_SCAN, record_key, read_csv_records
+from lab2_index import SecondaryIndex, RangeIndex
+from lab2_stats import instrument, AVL_OPS, AVL_HOOKS
+from lab2_concurrency import make_concurrent
 
 def time_execution(func, *args, **kwargs):
     start_time = time.time()
@@ -14,61 +22,291 @@ def time_execution(func, *args, **kwargs):
     execution_time = end_time - start_time
     return result, execution_time
 
-class Record:
-    def __init__(self,  Employee_ID, Employee_Name, Age, Country, Department, Position, Salary, Joining_Date):
-        self.Employee_ID = Employee_ID
-        self.Employee_Name = Employee_Name
-        self.Age = Age
-        self.Country = Country
-        self.Department = Department
-        self.Position = Position
-        self.Salary = Salary
-        self.Joining_Date = Joining_Date
-        self.is_deleted = False  
-
-    def pack(self):
-        name_bytes = self.Employee_Name.encode('utf-8')[:30].ljust(30, b'\x00')
-        country_bytes = self.Country.encode('utf-8')[:20].ljust(20, b'\x00')
-        department_bytes = self.Department.encode('utf-8')[:20].ljust(20, b'\x00')
-        position_bytes = self.Position.encode('utf-8')[:20].ljust(20, b'\x00')
-        joining_date_bytes = self.Joining_Date.encode('utf-8')[:10].ljust(10, b'\x00')
-        
-        return struct.pack(FORMAT, 
-                          self.Employee_ID,           
-                          name_bytes,                 
-                          self.Age,                   
-                          country_bytes,              
-                          department_bytes,           
-                          position_bytes,             
-                          self.Salary,                
-                          joining_date_bytes)
-
-    @classmethod
-    def unpack(cls, data):
-        unpacked_data = struct.unpack(FORMAT, data)
-        employee_id = unpacked_data[0]
-        employee_name = unpacked_data[1].decode('utf-8').rstrip('\x00')
-        age = unpacked_data[2]
-        country = unpacked_data[3].decode('utf-8').rstrip('\x00')
-        department = unpacked_data[4].decode('utf-8').rstrip('\x00')
-        position = unpacked_data[5].decode('utf-8').rstrip('\x00')
-        salary = unpacked_data[6]
-        joining_date = unpacked_data[7].decode('utf-8').rstrip('\x00')
-        return cls(employee_id, employee_name, age, country, department, position, salary, joining_date)
+NODE_FORMAT = '<qqbqq'  # employee_id, record_pos, height, left, right
+NODE = struct.Struct(NODE_FORMAT)
+HEADER = struct.Struct('<qqqq')  # raiz, cantidad de slots, slots libres, registros libres del archivo de datos
+FREE_RECORD = struct.Struct('iq')  # registro muerto: ID -1 y posicion del siguiente registro libre
+NIL = -1  # slot nulo
+NODE_CACHE = 1024  # nodos en el buffer del indice
+RECORD_CACHE = 4096  # registros decodificados en la cache LRU
 
 class AVLNode:
-    def __init__(self, employee_id, record_pos):
+    __slots__ = ('employee_id', 'record_pos', 'height', 'left', 'right', 'slot')
+
+    def __init__(self, employee_id, record_pos, slot=NIL):
         self.employee_id = employee_id  # Llave (ID del empleado)
         self.record_pos = record_pos    # Posición del registro en el archivo
         self.height = 1                 # Altura del nodo
-        self.left = None               # Puntero izquierdo
-        self.right = None              # Puntero derecho
-    
+        self.left = NIL                 # Slot del hijo izquierdo
+        self.right = NIL                # Slot del hijo derecho
+        self.slot = slot                # Posición del nodo en el archivo de índice
+
+
+class AVLIndexFile:
+    node_size = NODE.size
+    # nodos de tamaño fijo en disco; el slot i vive en HEADER.size + i * NODE.size
+    def __init__(self, index_file, cache_size=NODE_CACHE):
+        self.index_file = index_file
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # slot -> AVLNode, escritura inmediata (write-through)
+
+        if not os.path.exists(self.index_file):
+            with open(self.index_file, 'wb') as f:
+                f.write(HEADER.pack(NIL, 0, NIL, NIL))
+        self.file = open(self.index_file, 'r+b')
+        self.root, self.slots, self.free_head, self.free_record = HEADER.unpack(self.file.read(HEADER.size))
+
+    def close(self):
+        self.file.close()
+
+    def flush(self):
+        self.file.flush()
+
+    def write_header(self):
+        self.file.seek(0)
+        self.file.write(HEADER.pack(self.root, self.slots, self.free_head, self.free_record))
+
+    def set_root(self, slot):
+        if slot != self.root:
+            self.root = slot
+            self.write_header()
+
+    def set_free_record(self, pos):
+        self.free_record = pos
+        self.write_header()
+
+    def read_node(self, slot):
+        node = self.cache.get(slot)
+        if node is not None:
+            self.cache.move_to_end(slot)
+            return node
+        self.file.seek(HEADER.size + slot * NODE.size)
+        employee_id, record_pos, height, left, right = NODE.unpack(self.file.read(NODE.size))
+        node = AVLNode(employee_id, record_pos, slot)
+        node.height = height
+        node.left = left
+        node.right = right
+        self.remember(node)
+        return node
+
+    def write_node(self, node):
+        self.file.seek(HEADER.size + node.slot * NODE.size)
+        self.file.write(NODE.pack(node.employee_id, node.record_pos, node.height, node.left, node.right))
+        self.remember(node)
+
+    def remember(self, node):
+        self.cache[node.slot] = node
+        self.cache.move_to_end(node.slot)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def height_of(self, slot):
+        return self.read_node(slot).height
+
+    def load(self, keys, positions, heights, lefts, rights, root):
+        # reemplaza todo el indice con una sola escritura; el slot i es el nodo i
+        self.cache.clear()
+        self.root, self.slots, self.free_head = root, len(keys), NIL
+        self.file.seek(0)
+        self.file.truncate()
+        self.write_header()
+        self.file.write(b''.join(NODE.pack(*node) for node in zip(keys, positions, heights, lefts, rights)))
+
+    def find(self, employee_id):
+        slot = self.root
+        while slot != NIL:
+            node = self.read_node(slot)
+            if employee_id == node.employee_id:
+                return node
+            slot = node.left if employee_id < node.employee_id else node.right
+        return None
+
+    def new_node(self, employee_id, record_pos):
+        # reutiliza slots liberados antes de crecer el archivo
+        if self.free_head != NIL:
+            slot = self.free_head
+            self.free_head = self.read_node(slot).left
+        else:
+            slot = self.slots
+            self.slots += 1
+        node = AVLNode(employee_id, record_pos, slot)
+        self.write_node(node)
+        self.write_header()
+        return node
+
+    def free_node(self, node):
+        # el slot libre guarda en left el siguiente de la lista
+        node.employee_id = NIL
+        node.record_pos = NIL
+        node.height = 0
+        node.left = self.free_head
+        node.right = NIL
+        self.write_node(node)
+        self.free_head = node.slot
+        self.write_header()
+
+
+class ArrayIndex:
+    # indice compacto en memoria: columnas paralelas indexadas por slot (33 bytes por llave);
+    # usa el mismo formato de archivo que AVLIndexFile, que se lee completo al abrir
+    # y se reescribe en flush/close
+    def __init__(self, index_file, cache_size=None):
+        self.index_file = index_file
+        self.keys = array('q')
+        self.positions = array('q')
+        self.heights = array('b')
+        self.lefts = array('q')
+        self.rights = array('q')
+        self.root, self.slots, self.free_head, self.free_record = NIL, 0, NIL, NIL
+
+        if os.path.exists(self.index_file):
+            with open(self.index_file, 'rb') as f:
+                self.root, self.slots, self.free_head, self.free_record = HEADER.unpack(f.read(HEADER.size))
+                data = f.read(self.slots * NODE.size)
+            for employee_id, record_pos, height, left, right in NODE.iter_unpack(data):
+                self.keys.append(employee_id)
+                self.positions.append(record_pos)
+                self.heights.append(height)
+                self.lefts.append(left)
+                self.rights.append(right)
+        else:
+            self.flush()
+
+    def close(self):
+        self.flush()
+
+    def flush(self):
+        with open(self.index_file, 'wb') as f:
+            f.write(HEADER.pack(self.root, self.slots, self.free_head, self.free_record))
+            for slot in range(self.slots):
+                f.write(NODE.pack(self.keys[slot], self.positions[slot], self.heights[slot],
+                                  self.lefts[slot], self.rights[slot]))
+
+    def set_root(self, slot):
+        self.root = slot
+
+    def set_free_record(self, pos):
+        self.free_record = pos
+
+    def read_node(self, slot):
+        # vista temporal del slot; los cambios se guardan con write_node
+        node = AVLNode(self.keys[slot], self.positions[slot], slot)
+        node.height = self.heights[slot]
+        node.left = self.lefts[slot]
+        node.right = self.rights[slot]
+        return node
+
+    def write_node(self, node):
+        slot = node.slot
+        self.keys[slot] = node.employee_id
+        self.positions[slot] = node.record_pos
+        self.heights[slot] = node.height
+        self.lefts[slot] = node.left
+        self.rights[slot] = node.right
+
+    def height_of(self, slot):
+        return self.heights[slot]
+
+    def load(self, keys, positions, heights, lefts, rights, root):
+        self.keys = array('q', keys)
+        self.positions = array('q', positions)
+        self.heights = array('b', heights)
+        self.lefts = array('q', lefts)
+        self.rights = array('q', rights)
+        self.root, self.slots, self.free_head = root, len(self.keys), NIL
+
+    def find(self, employee_id):
+        # recorre solo la columna de llaves y la de hijos; crea el nodo solo al encontrarlo
+        keys, lefts, rights = self.keys, self.lefts, self.rights
+        slot = self.root
+        while slot != NIL:
+            key = keys[slot]
+            if employee_id == key:
+                return self.read_node(slot)
+            slot = lefts[slot] if employee_id < key else rights[slot]
+        return None
+
+    def new_node(self, employee_id, record_pos):
+        if self.free_head != NIL:
+            slot = self.free_head
+            self.free_head = self.lefts[slot]
+        else:
+            slot = self.slots
+            self.slots += 1
+            self.keys.append(NIL)
+            self.positions.append(NIL)
+            self.heights.append(0)
+            self.lefts.append(NIL)
+            self.rights.append(NIL)
+        node = AVLNode(employee_id, record_pos, slot)
+        self.write_node(node)
+        return node
+
+    def free_node(self, node):
+        node.employee_id = NIL
+        node.record_pos = NIL
+        node.height = 0
+        node.left = self.free_head
+        node.right = NIL
+        self.write_node(node)
+        self.free_head = node.slot
+
+    def memory_usage(self):
+        return sum(col.buffer_info()[1] * col.itemsize
+                   for col in (self.keys, self.positions, self.heights, self.lefts, self.rights))
+
+INDEX_TYPES = {'file': AVLIndexFile, 'array': ArrayIndex}
+
+class RecordCache:
+    # LRU de Record decodificados por record_pos
+    def __init__(self, capacity=RECORD_CACHE):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, pos):
+        record = self.entries.get(pos)
+        if record is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(pos)
+        return record
+
+    def put(self, pos, record):
+        if self.capacity <= 0:
+            return
+        self.entries[pos] = record
+        self.entries.move_to_end(pos)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, pos):
+        self.entries.pop(pos, None)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        return {'size': len(self.entries), 'capacity': self.capacity, 'hits': self.hits, 'misses': self.misses}
 
 class AVLFile:
-    def __init__(self, data_file='employees_avl.dat'):
-        self.root = None
+    unpack = staticmethod(Record.unpack)  # por la instancia, para poder contarlo con stats=True
+    # modo concurrente: solo seguro entre hilos, sin lecturas en paralelo. No hay instantanea
+    # (los nodos se reescriben en su lugar, sin copia de caminos), asi que un escritor excluye
+    # a los lectores durante toda la escritura, y cada lectura de nodo o de registro pasa por un
+    # unico mutex de E/S (descriptor de datos, el del indice y las caches LRU compartidos). Con
+    # varios hilos lectores el rendimiento es el de uno solo
+    lock_readers = ('search', 'get_many', 'range_search', 'find_by', 'range_by')
+    lock_writers = ('insert', 'insert_many', 'insert_packed', 'delete', 'bulk_load', 'compact', 'flush', 'close')
+    lock_serialized = ('index.read_node', 'read_record_from_file', 'read_records', 'ranges.range')
+
+    def __init__(self, data_file='employees_avl.dat', index_file=None, cache_size=NODE_CACHE, index_type='file',
+                 record_cache_size=RECORD_CACHE, secondary_fields=(),
+                 range_fields=(), stats=False, concurrent=False):
         self.data_file = data_file
+        self.index_file = index_file or os.path.splitext(data_file)[0] + '.idx'
         self.record_size = RECORD_SIZE
         
         # Crear archivo de datos si no existe
@@ -76,10 +314,244 @@ class AVLFile:
             with open(self.data_file, 'wb'):
                 pass
 
-    def get_height(self, node):
-        if not node:
+        # abrir un indice existente es O(1): solo se lee la cabecera
+        rebuild = not os.path.exists(self.index_file) and os.path.getsize(self.data_file) > 0
+        self.index = INDEX_TYPES[index_type](self.index_file, cache_size)
+
+        # un solo descriptor abierto para todas las lecturas y escrituras de datos
+        self.data = open(self.data_file, 'r+b')
+        self.record_cache = RecordCache(record_cache_size)
+        if rebuild:
+            self.rebuild_index()
+
+        # indices secundarios opcionales, guardados junto al archivo de datos
+        self.secondary = None
+        if secondary_fields:
+            self.secondary = SecondaryIndex(os.path.splitext(data_file)[0] + '.sidx', secondary_fields)
+            if not self.secondary.load([self.data_file]):
+                positions = [pos for _, pos in self.items()]
+                for start in range(0, len(positions), RECORD_CACHE):
+                    for record in self.read_records(positions[start:start + RECORD_CACHE]).values():
+                        self.secondary.add(record)
+                self.save_secondary()
+
+        # arboles B+ opcionales por Salary, Age o Joining_Date
+        self.ranges = None
+        if range_fields:
+            self.ranges = RangeIndex(os.path.splitext(data_file)[0], range_fields)
+            if not self.ranges.load([self.data_file]):
+                self.rebuild_ranges()
+
+        # estadisticas opcionales: sin stats no hay envoltorios y los metodos son los de la clase
+        self.metrics = instrument(self, AVL_OPS, AVL_HOOKS) if stats else None
+        self.lock = None
+        if concurrent:
+            self.lock = make_concurrent(self, self.lock_readers, self.lock_writers, self.lock_serialized)
+
+    def stats(self):
+        if self.metrics is None:
+            return None
+        snapshot = self.metrics.snapshot()
+        snapshot['record_cache'] = self.record_cache.stats()
+        return snapshot
+
+    def reset_stats(self):
+        if self.metrics is not None:
+            self.metrics.reset()
+
+    def rebuild_ranges(self):
+        positions = [pos for _, pos in self.items()]
+        def live_records():
+            for start in range(0, len(positions), RECORD_CACHE):
+                yield from self.read_records(positions[start:start + RECORD_CACHE]).values()
+        self.ranges.build(live_records())
+
+    def index_record(self, record):
+        # antes de escribir: el indice de rangos quita los valores de la version anterior
+        if self.ranges is not None:
+            old = self.search(record.Employee_ID)
+            if old is not None:
+                self.ranges.discard(old)
+            self.ranges.add(record)
+        if self.secondary is not None:
+            self.secondary.add(record)
+
+    def unindex(self, record):
+        if self.ranges is not None:
+            self.ranges.discard(record)
+        if self.secondary is not None:
+            self.secondary.discard(record.Employee_ID)
+
+    def save_secondary(self):
+        if self.secondary is not None:
+            self.data.flush()
+            self.secondary.save([self.data_file])
+
+    @property
+    def root(self):
+        return self.index.root
+
+    def close(self):
+        self.save_secondary()
+        if self.ranges is not None:
+            self.data.flush()
+            self.ranges.close([self.data_file])
+        self.data.close()
+        self.index.close()
+
+    def flush(self):
+        self.data.flush()
+        self.index.flush()
+
+    def append_records(self, data):
+        # devuelve la posicion donde quedo el primer registro
+        self.data.seek(0, os.SEEK_END)
+        pos = self.data.tell()
+        self.data.write(data)
+        return pos
+
+    def write_record(self, pos, data):
+        # sobrescritura en su lugar: la version en cache deja de ser valida
+        self.record_cache.invalidate(pos)
+        self.data.seek(pos)
+        self.data.write(data)
+
+    def allocate_record(self):
+        # reutiliza el primer registro muerto de la lista libre o crece el archivo
+        pos = self.index.free_record
+        if pos == NIL:
+            self.data.seek(0, os.SEEK_END)
+            return self.data.tell()
+        self.data.seek(pos)
+        _, next_pos = FREE_RECORD.unpack(self.data.read(FREE_RECORD.size))
+        self.index.set_free_record(next_pos)
+        return pos
+
+    def release_record(self, pos):
+        # el registro muerto queda enlazado en la lista libre (ID -1 + siguiente)
+        self.write_record(pos, FREE_RECORD.pack(NIL, self.index.free_record))
+        self.index.set_free_record(pos)
+
+    def compact(self):
+        # reescribe los registros vivos en orden de llave y reconstruye el indice
+        self.data.flush()
+        old_size = os.path.getsize(self.data_file)
+        keys = []
+        directory = os.path.dirname(os.path.abspath(self.data_file))
+        fd, tmp_path = tempfile.mkstemp(prefix='.avl-', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                if old_size > 0:
+                    with mmap.mmap(self.data.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                        block = []
+                        for employee_id, pos in self.items():
+                            keys.append(employee_id)
+                            block.append(view[pos:pos + self.record_size])
+                            if len(block) >= 4096:
+                                out.write(b''.join(block))
+                                block = []
+                        out.write(b''.join(block))
+            self.data.close()
+            os.replace(tmp_path, self.data_file)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        finally:
+            if self.data.closed:
+                self.data = open(self.data_file, 'r+b')
+
+        self.record_cache.clear()
+        self.index.set_free_record(NIL)
+        self._build_index(keys, [i * self.record_size for i in range(len(keys))])
+        self.save_secondary()
+        reclaimed = old_size - len(keys) * self.record_size
+        print(f"Archivo de datos '{self.data_file}' compactado: {reclaimed} bytes recuperados.")
+        return reclaimed
+
+    def rebuild_index(self):
+        # datos sin indice: se recorre el archivo, la ultima version de cada ID gana
+        with open(self.data_file, 'rb') as f:
+            record_pos = 0
+            while (data := f.read(self.record_size)):
+                employee_id = record_key(data)
+                if employee_id == NIL:
+                    self.release_record(record_pos)
+                else:
+                    old_pos = self._insert_node(employee_id, record_pos)
+                    if old_pos != NIL:
+                        self.release_record(old_pos)
+                record_pos += self.record_size
+
+    def items(self):
+        # pares (employee_id, record_pos) en orden de llave
+        read_node = self.index.read_node
+        stack = []
+        slot = self.index.root
+        while stack or slot != NIL:
+            while slot != NIL:
+                node = read_node(slot)
+                stack.append(node)
+                slot = node.left
+            node = stack.pop()
+            yield node.employee_id, node.record_pos
+            slot = node.right
+
+    def bulk_load(self, records):
+        # ultima version de cada ID, escrita en orden de llave con una sola escritura
+        latest = {}
+        for record in records:
+            latest[record.Employee_ID] = record
+            if self.secondary is not None:
+                self.secondary.add(record)
+        ordered = sorted(latest.items())
+        base = self.append_records(b''.join(record.pack() for _, record in ordered))
+        loaded = [(employee_id, base + i * self.record_size) for i, (employee_id, _) in enumerate(ordered)]
+
+        # mezcla con el indice existente; en empate gana el registro nuevo
+        keys = []
+        positions = []
+        for employee_id, group in groupby(heapq.merge(self.items(), loaded, key=lambda item: item[0]),
+                                          key=lambda item: item[0]):
+            group = list(group)
+            keys.append(employee_id)
+            positions.append(group[-1][1])
+            # las versiones reemplazadas pasan a la lista libre
+            for _, pos in group[:-1]:
+                self.release_record(pos)
+
+        self._build_index(keys, positions)
+        if self.ranges is not None:
+            self.rebuild_ranges()
+        return len(ordered)
+
+    def _build_index(self, keys, positions):
+        # arbol perfectamente balanceado desde el medio de cada rango: O(n)
+        n = len(keys)
+        heights = [0] * n
+        lefts = [NIL] * n
+        rights = [NIL] * n
+        def build(low, high):
+            # la profundidad de la recursion es log2(n)
+            if low >= high:
+                return NIL, 0
+            mid = (low + high) // 2
+            lefts[mid], left_height = build(low, mid)
+            rights[mid], right_height = build(mid + 1, high)
+            heights[mid] = 1 + max(left_height, right_height)
+            return mid, heights[mid]
+        root, _ = build(0, n)
+        self.index.load(keys, positions, heights, lefts, rights, root)
+
+    def node(self, slot):
+        if slot == NIL:
+            return None
+        return self.index.read_node(slot)
+
+    def get_height(self, slot):
+        if slot == NIL:
             return 0
-        return node.height
+        return self.index.height_of(slot)
 
     def get_balance(self, node):
         if not node:
@@ -91,152 +563,334 @@ class AVLFile:
             node.height = 1 + max(self.get_height(node.left), self.get_height(node.right))
 
     def insert(self, record):
-        # insertr registro en archivo y pos
-        with open(self.data_file, 'ab') as f:
-            record_pos = f.tell()
-            f.write(record.pack())
-        
-        # insert nodo
-        self.root = self._insert_node(self.root, record.Employee_ID, record_pos)
-
-    def _insert_node(self, node, employee_id, record_pos):
-        # nuevo nodo
-        if not node:
-            return AVLNode(employee_id, record_pos)
+        # insertr registro en archivo y pos (reutilizando registros muertos)
+        self.index_record(record)
+        record_pos = self.allocate_record()
+        self.write_record(record_pos, record.pack())
         
-        # inset recursivo
-        if employee_id < node.employee_id:
-            node.left = self._insert_node(node.left, employee_id, record_pos)
-            node = self.rebalance(node)
-        elif employee_id > node.employee_id:
-            node.right = self._insert_node(node.right, employee_id, record_pos)
-            node = self.rebalance(node)
+        # insert nodo; si el ID ya existia, su version anterior queda libre
+        old_pos = self._insert_node(record.Employee_ID, record_pos)
+        if old_pos != NIL:
+            self.release_record(old_pos)
+
+    def insert_many(self, records):
+        # ultima version de cada ID en orden de llave: un arbol vacio se construye
+        # balanceado (sin rotaciones); si no, las inserciones ordenadas reusan los mismos
+        # caminos del buffer del indice
+        latest = {}
+        for record in records:
+            latest[record.Employee_ID] = record
+        if self.index.root == NIL:
+            return self.bulk_load(latest.values())
+        ordered = [record for _, record in sorted(latest.items())]
+        for record in ordered:
+            self.index_record(record)
+
+        # primero los registros muertos de la lista libre, el resto en una sola escritura
+        positions = []
+        while len(positions) < len(ordered) and self.index.free_record != NIL:
+            pos = self.allocate_record()
+            self.write_record(pos, ordered[len(positions)].pack())
+            positions.append(pos)
+        rest = ordered[len(positions):]
+        if rest:
+            base = self.append_records(b''.join(record.pack() for record in rest))
+            positions.extend(base + i * self.record_size for i in range(len(rest)))
+
+        for record, record_pos in zip(ordered, positions):
+            old_pos = self._insert_node(record.Employee_ID, record_pos)
+            if old_pos != NIL:
+                self.release_record(old_pos)
+        return len(ordered)
+
+    def insert_packed(self, data):
+        # bloque de registros ya empaquetados (ver lab2_ingest) en una sola escritura al
+        # final; solo se decodifican las llaves, salvo que haya indices que mantener
+        if self.secondary is not None or self.ranges is not None:
+            return self.insert_many(RecordBatch.from_bytes(data).records())
+        latest = {}
+        for i, (employee_id,) in enumerate(KEY_SCAN.iter_unpack(data)):
+            latest[employee_id] = i
+        base = self.append_records(data)
+        ordered = sorted(latest.items())
+        if self.index.root == NIL:
+            self._build_index([employee_id for employee_id, _ in ordered],
+                              [base + i * self.record_size for _, i in ordered])
         else:
-            # existe id, entonces actualizamos
-            node.record_pos = record_pos
-            return node
+            for employee_id, i in ordered:
+                old_pos = self._insert_node(employee_id, base + i * self.record_size)
+                if old_pos != NIL:
+                    self.release_record(old_pos)
+        # las copias repetidas dentro del bloque pasan a la lista libre
+        kept = set(latest.values())
+        for i in range(len(data) // self.record_size):
+            if i not in kept:
+                self.release_record(base + i * self.record_size)
+        return len(ordered)
+
+    def _insert_node(self, employee_id, record_pos):
+        # descenso iterativo guardando el camino (nodo, fue_a_la_izquierda)
+        read_node = self.index.read_node
+        path = []
+        slot = self.index.root
+        while slot != NIL:
+            node = read_node(slot)
+            if employee_id < node.employee_id:
+                path.append((node, True))
+                slot = node.left
+            elif employee_id > node.employee_id:
+                path.append((node, False))
+                slot = node.right
+            else:
+                # existe id, entonces actualizamos
+                old_pos = node.record_pos
+                node.record_pos = record_pos
+                self.index.write_node(node)
+                return old_pos
 
-        # upd altura
-        self.update_height(node)
-        
-        return node
+        # nuevo nodo
+        child = self.index.new_node(employee_id, record_pos).slot
+        self.index.set_root(self._retrace(path, child))
+        return NIL
+
+    def _retrace(self, path, child):
+        # re-enlaza y rebalancea de abajo hacia arriba; si un subarbol no cambia
+        # de raiz ni de altura, los ancestros ya no se ven afectados
+        while path:
+            node, went_left = path.pop()
+            height = node.height
+            if went_left:
+                node.left = child
+            else:
+                node.right = child
+            child = self.rebalance(node)
+            if child == node.slot and node.height == height:
+                return self.index.root
+        return child
 
     def rotate_right(self, y):
-        x = y.left
+        x = self.index.read_node(y.left)
         T2 = x.right
 
         # Rotación
-        x.right = y
+        x.right = y.slot
         y.left = T2
 
         # Actualizar alturas
         self.update_height(y)
+        self.index.write_node(y)
         self.update_height(x)
+        self.index.write_node(x)
 
         return x
     
     def rotate_left(self, x):
-        y = x.right
+        y = self.index.read_node(x.right)
         T2 = y.left
 
         # Rotación
-        y.left = x
+        y.left = x.slot
         x.right = T2
 
         # Actualizar alturas
         self.update_height(x)
+        self.index.write_node(x)
         self.update_height(y)
+        self.index.write_node(y)
 
         return y
 
+    # un metodo por caso de rebalanceo, para contar las rotaciones por caso con stats=True
+    fix_left_left = rotate_right
+    fix_right_right = rotate_left
+
+    def fix_left_right(self, node):
+        node.left = self.rotate_left(self.node(node.left)).slot
+        return self.rotate_right(node)
+
+    def fix_right_left(self, node):
+        node.right = self.rotate_right(self.node(node.right)).slot
+        return self.rotate_left(node)
+
     def rebalance(self, node):
+        # actualiza la altura, rota si hace falta y devuelve el slot de la raiz del subarbol
+        self.update_height(node)
         balance = self.get_balance(node)
-        # caso izquierda-izquierda
-        if balance > 1 and self.get_balance(node.left) >= 0:
-            #print("Rebalanceo: izquierda-izquierda")
-            return self.rotate_right(node)
-        # caso derecha-derecha
-        if balance < -1 and self.get_balance(node.right) <= 0:
-            #print("Rebalanceo: derecha-derecha")
-            return self.rotate_left(node)
-        # caso izquierda-derecha
-        if balance > 1 and self.get_balance(node.left) < 0:
-            node.left = self.rotate_left(node.left)
-            #print("Rebalanceo: izquierda-derecha")
-            return self.rotate_right(node)
-        # caso derecha-izquierda
-        if balance < -1 and self.get_balance(node.right) > 0:
-            node.right = self.rotate_right(node.right)
-            #print("Rebalanceo: derecha-izquierda")
-            return self.rotate_left(node)
-        return node
+        # caso izquierda-izquierda / izquierda-derecha
+        if balance > 1:
+            if self.get_balance(self.node(node.left)) < 0:
+                return self.fix_left_right(node).slot
+            return self.fix_left_left(node).slot
+        # caso derecha-derecha / derecha-izquierda
+        if balance < -1:
+            if self.get_balance(self.node(node.right)) > 0:
+                return self.fix_right_left(node).slot
+            return self.fix_right_right(node).slot
+        self.index.write_node(node)
+        return node.slot
 
     def read_record_from_file(self, pos):
-        with open(self.data_file, 'rb') as f:
-            f.seek(pos)
-            data = f.read(self.record_size)
-            if data:
-                return Record.unpack(data)
-        return None
+        record = self.record_cache.get(pos)
+        if record is not None:
+            return record
+        self.data.seek(pos)
+        data = self.data.read(self.record_size)
+        if len(data) < self.record_size:
+            return None
+        record = self.unpack(data)
+        self.record_cache.put(pos, record)
+        return record
+
+    def read_records(self, positions):
+        # posiciones ordenadas; las contiguas se leen juntas en una sola lectura
+        records = {}
+        missing = []
+        for pos in sorted(set(positions)):
+            record = self.record_cache.get(pos)
+            if record is not None:
+                records[pos] = record
+            else:
+                missing.append(pos)
+
+        i = 0
+        while i < len(missing):
+            j = i + 1
+            while j < len(missing) and missing[j] == missing[j - 1] + self.record_size:
+                j += 1
+            self.data.seek(missing[i])
+            data = self.data.read((j - i) * self.record_size)
+            for k, pos in enumerate(missing[i:j]):
+                offset = k * self.record_size
+                if offset + self.record_size <= len(data):
+                    record = self.unpack(data[offset:offset + self.record_size])
+                    self.record_cache.put(pos, record)
+                    records[pos] = record
+            i = j
+        return records
 
     def search(self, employee_id):
-        node = self._search_node(self.root, employee_id)
+        node = self._search_node(employee_id)
         if node:
             return self.read_record_from_file(node.record_pos)
         return None
 
-    def _search_node(self, node, employee_id):
-        if not node or node.employee_id == employee_id:
-            return node
-        
-        if employee_id < node.employee_id:
-            return self._search_node(node.left, employee_id)
-        else:
-            return self._search_node(node.right, employee_id)
-    def delete(self, employee_id):
-        self.root = self._delete_node(self.root, employee_id)
+    def get_many(self, ids):
+        # busqueda por lotes, en el orden de ids (None si no esta): las llaves ordenadas bajan
+        # juntas por el arbol, asi cada nodo se lee a lo sumo una vez por lote, y los registros
+        # se leen agrupados por posicion
+        keys = sorted(set(ids))
+        positions = {}
+        read_node = self.index.read_node
+        stack = [(self.index.root, 0, len(keys))]
+        while stack:
+            slot, low, high = stack.pop()
+            if slot == NIL or low >= high:
+                continue
+            node = read_node(slot)
+            i = bisect_left(keys, node.employee_id, low, high)
+            j = i
+            if i < high and keys[i] == node.employee_id:
+                positions[keys[i]] = node.record_pos
+                j = i + 1
+            stack.append((node.left, low, i))
+            stack.append((node.right, j, high))
+        records = self.read_records(positions.values())
+        return [records.get(positions.get(employee_id)) for employee_id in ids]
+
+    def _search_node(self, employee_id):
+        return self.index.find(employee_id)
 
-    def _delete_node(self, node, employee_id):
-        if not node:
-            return node
-        if employee_id < node.employee_id:
-            node.left = self._delete_node(node.left, employee_id)
-        elif employee_id > node.employee_id:
-            node.right = self._delete_node(node.right, employee_id)
-        else:
-            # Nodo con un solo hijo o sin hijos
-            if not node.left:
-                return node.right
-            elif not node.right:
-                return node.left
-            # Nodo con dos hijos: obtener el sucesor inorder (el más pequeño en el subárbol derecho)
-            temp = self.get_min_value_node(node.right)
+    def delete(self, employee_id):
+        record_pos = self._delete_node(employee_id)
+        if record_pos != NIL:
+            if self.secondary is not None or self.ranges is not None:
+                self.unindex(self.read_record_from_file(record_pos))
+            self.release_record(record_pos)
+
+    def _delete_node(self, employee_id):
+        read_node = self.index.read_node
+        path = []
+        slot = self.index.root
+        while slot != NIL:
+            node = read_node(slot)
+            if employee_id == node.employee_id:
+                break
+            went_left = employee_id < node.employee_id
+            path.append((node, went_left))
+            slot = node.left if went_left else node.right
+        if slot == NIL:
+            return NIL
+        record_pos = node.record_pos
+
+        # Nodo con dos hijos: se copia el sucesor inorder (el más pequeño en el subárbol derecho)
+        # y se elimina el sucesor, que tiene a lo sumo un hijo
+        if node.left != NIL and node.right != NIL:
+            path.append((node, False))
+            temp = read_node(node.right)
+            while temp.left != NIL:
+                path.append((temp, True))
+                temp = read_node(temp.left)
             node.employee_id = temp.employee_id
             node.record_pos = temp.record_pos
-            node.right = self._delete_node(node.right, temp.employee_id)
-        self.update_height(node)
-        return self.rebalance(node)
+            self.index.write_node(node)
+            node = temp
+
+        # Nodo con un solo hijo o sin hijos
+        child = node.left if node.left != NIL else node.right
+        self.index.free_node(node)
+        self.index.set_root(self._retrace(path, child))
+        return record_pos
+
     def get_min_value_node(self, node):
-        if node is None or node.left is None:
-            return node
-        return self.get_min_value_node(node.left)
+        while node is not None and node.left != NIL:
+            node = self.index.read_node(node.left)
+        return node
 
     def range_search(self, start_id, end_id):
-        results = []
-        def inorder(node):
-            if not node:
-                return
-            if node.employee_id > start_id:
-                inorder(node.left)
+        # recorrido inorder con pila explicita, podando fuera del rango
+        positions = []
+        read_node = self.index.read_node
+        stack = []
+        slot = self.index.root
+        while stack or slot != NIL:
+            while slot != NIL:
+                node = read_node(slot)
+                stack.append(node)
+                slot = node.left if node.employee_id > start_id else NIL
+            node = stack.pop()
             if start_id <= node.employee_id <= end_id:
-                rec = self.read_record_from_file(node.record_pos)
-                if rec:
-                    results.append(rec)
-            if node.employee_id < end_id:
-                inorder(node.right)
-        inorder(self.root)
-        results.sort(key=lambda r: r.Employee_ID)
-        return results
+                positions.append(node.record_pos)
+            slot = node.right if node.employee_id < end_id else NIL
+
+        # lectura de los registros agrupando posiciones contiguas; se devuelven en orden de llave
+        records = self.read_records(positions)
+        return [records[pos] for pos in positions if pos in records]
+
+    def find_by(self, **equals):
+        # consulta de igualdad compuesta sobre los indices secundarios; una busqueda
+        # por ID en el AVL y lecturas agrupadas de los registros
+        if self.secondary is None:
+            raise ValueError("AVLFile abierto sin secondary_fields.")
+        positions = []
+        for employee_id in self.secondary.query(**equals):
+            node = self.index.find(employee_id)
+            if node:
+                positions.append(node.record_pos)
+        records = self.read_records(positions)
+        return [records[pos] for pos in positions if pos in records]
+
+    def range_by(self, field, low=None, high=None):
+        # rango inclusivo sobre Salary, Age o Joining_Date ('d/mm/yyyy' o 'yyyy-mm-dd'),
+        # en orden del campo: O(log n + k) con el arbol B+
+        if self.ranges is None:
+            raise ValueError("AVLFile abierto sin range_fields.")
+        positions = []
+        for employee_id in self.ranges.range(field, low, high):
+            node = self.index.find(employee_id)
+            if node:
+                positions.append(node.record_pos)
+        records = self.read_records(positions)
+        return [records[pos] for pos in positions if pos in records]
 
 def main():
     avl = AVLFile()
@@ -246,30 +900,13 @@ def main():
     print("Solo probando INSERT y SEARCH (con rotaciones)")
 
     def insertar_datos():
-        with open('employee.csv', 'r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile, delimiter=';')
-            rows = list(reader)
-            print(f"Total de filas en CSV: {len(rows)}")
-            
-            rows = rows[:100]
-            print(f"Procesando {len(rows)} registros...")
-            
-            for i, row in enumerate(rows):
-                if i % 20 == 0:  # Mostrar progreso cada 20 registros
-                    print(f"Procesando registro {i+1}/{len(rows)}")
-                    
-                record = Record(
-                    Employee_ID=int(row['Employee_ID']),
-                    Employee_Name=row['Employee_Name'],
-                    Age=int(row['Age']),
-                    Country=row['Country'],
-                    Department=row['Department'],
-                    Position=row['Position'],
-                    Salary=float(row['Salary']),
-                    Joining_Date=row['Joining_Date']
-                )
-                avl.insert(record)
-                all_ids.append(record.Employee_ID)
+        # se leen solo las filas necesarias del csv, sin materializarlo
+        records = list(islice(read_csv_records('employee.csv'), 100))
+        print(f"Procesando {len(records)} registros...")
+
+        # un solo lote: una escritura de datos y llaves ordenadas
+        avl.insert_many(records)
+        all_ids.extend(record.Employee_ID for record in records)
 
     _, insert_time = time_execution(insertar_datos)
     print(f"Datos insertados en {insert_time:.6f} segundos.")
@@ -312,6 +949,7 @@ def main():
             print(f"✗ Error al eliminar ID {eid}.")
     _, delete_time = time_execution(lambda: [avl.delete(eid) for eid in delete_ids])
     print(f"Eliminaciones completadas en {delete_time:.6f} segundos.")
+    avl.close()
 
 
 
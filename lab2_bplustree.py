@@ -0,0 +1,223 @@
+import os
+import struct
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+# arbol B+ en disco con paginas de tamaño fijo; la pagina 0 es la cabecera
+PAGE_SIZE = 4096
+TREE_HEADER = struct.Struct('<qq')  # pagina raiz, cantidad de paginas
+NODE_HEADER = struct.Struct('<?iq')  # es_hoja, cantidad de llaves, siguiente hoja
+ENTRY = struct.Struct('<di')  # llave compuesta (valor, Employee_ID): admite valores repetidos
+CHILD = struct.Struct('<q')
+NIL = -1
+MIN_ID = -2 ** 31
+MAX_ID = 2 ** 31 - 1
+NODE_CACHE = 256  # paginas decodificadas en memoria
+
+class BPlusNode:
+    __slots__ = ('page', 'leaf', 'keys', 'children', 'next')
+
+    def __init__(self, page, leaf, keys=None, children=None, next=NIL):
+        self.page = page
+        self.leaf = leaf
+        self.keys = keys or []
+        self.children = children or []
+        self.next = next
+
+class BPlusTree:
+    def __init__(self, path, page_size=PAGE_SIZE, cache_size=NODE_CACHE):
+        self.path = path
+        self.page_size = page_size
+        body = page_size - NODE_HEADER.size
+        self.leaf_capacity = body // ENTRY.size
+        self.inner_capacity = (body - CHILD.size) // (ENTRY.size + CHILD.size)
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, 'wb'):
+                pass
+            self.file = open(path, 'r+b')
+            self.clear()
+        else:
+            self.file = open(path, 'r+b')
+            self.root, self.pages = TREE_HEADER.unpack(self.file.read(TREE_HEADER.size))
+
+    def close(self):
+        self.file.close()
+
+    def flush(self):
+        self.file.flush()
+
+    def clear(self):
+        # arbol vacio: cabecera y una hoja raiz sin llaves
+        self.file.truncate(0)
+        self.cache.clear()
+        self.root = 1
+        self.pages = 2
+        self.write_header()
+        self.write(BPlusNode(1, True))
+
+    def write_header(self):
+        self.file.seek(0)
+        self.file.write(TREE_HEADER.pack(self.root, self.pages).ljust(self.page_size, b'\x00'))
+
+    def read(self, page):
+        node = self.cache.get(page)
+        if node is not None:
+            self.cache.move_to_end(page)
+            return node
+        self.file.seek(page * self.page_size)
+        data = self.file.read(self.page_size)
+        leaf, count, next_page = NODE_HEADER.unpack_from(data)
+        offset = NODE_HEADER.size
+        keys = [ENTRY.unpack_from(data, offset + i * ENTRY.size) for i in range(count)]
+        children = []
+        if not leaf:
+            offset += count * ENTRY.size
+            children = list(struct.unpack_from(f'<{count + 1}q', data, offset))
+        node = BPlusNode(page, leaf, keys, children, next_page)
+        self.remember(node)
+        return node
+
+    def write(self, node):
+        # escritura inmediata de la pagina completa (write-through)
+        data = [NODE_HEADER.pack(node.leaf, len(node.keys), node.next)]
+        data.extend(ENTRY.pack(*key) for key in node.keys)
+        if not node.leaf:
+            data.append(struct.pack(f'<{len(node.children)}q', *node.children))
+        self.file.seek(node.page * self.page_size)
+        self.file.write(b''.join(data).ljust(self.page_size, b'\x00'))
+        self.remember(node)
+
+    def remember(self, node):
+        self.cache[node.page] = node
+        self.cache.move_to_end(node.page)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def new_node(self, leaf):
+        node = BPlusNode(self.pages, leaf)
+        self.pages += 1
+        self.write_header()
+        return node
+
+    def find_leaf(self, key, path=None):
+        node = self.read(self.root)
+        while not node.leaf:
+            i = bisect_right(node.keys, key)
+            if path is not None:
+                path.append((node, i))
+            node = self.read(node.children[i])
+        return node
+
+    def insert(self, value, employee_id):
+        key = (value, employee_id)
+        path = []
+        node = self.find_leaf(key, path)
+        i = bisect_left(node.keys, key)
+        if i < len(node.keys) and node.keys[i] == key:
+            return
+        node.keys.insert(i, key)
+        split = self.split(node) if len(node.keys) > self.leaf_capacity else None
+        self.write(node)
+
+        # la llave separadora sube mientras los padres se sigan llenando
+        while split and path:
+            parent, i = path.pop()
+            separator, right = split
+            parent.keys.insert(i, separator)
+            parent.children.insert(i + 1, right)
+            split = self.split(parent) if len(parent.keys) > self.inner_capacity else None
+            self.write(parent)
+        if split:
+            separator, right = split
+            root = self.new_node(False)
+            root.keys = [separator]
+            root.children = [self.root, right]
+            self.write(root)
+            self.root = root.page
+            self.write_header()
+
+    def split(self, node):
+        # devuelve (separador, pagina derecha); la izquierda conserva node.page
+        right = self.new_node(node.leaf)
+        mid = len(node.keys) // 2
+        if node.leaf:
+            right.keys = node.keys[mid:]
+            node.keys = node.keys[:mid]
+            right.next = node.next
+            node.next = right.page
+            separator = right.keys[0]
+        else:
+            separator = node.keys[mid]
+            right.keys = node.keys[mid + 1:]
+            right.children = node.children[mid + 1:]
+            node.keys = node.keys[:mid]
+            node.children = node.children[:mid + 1]
+        self.write(right)
+        return separator, right.page
+
+    def delete(self, value, employee_id):
+        # borrado perezoso: se quita de la hoja sin fusionar paginas
+        key = (value, employee_id)
+        node = self.find_leaf(key)
+        i = bisect_left(node.keys, key)
+        if i < len(node.keys) and node.keys[i] == key:
+            del node.keys[i]
+            self.write(node)
+            return True
+        return False
+
+    def items(self, low=None, high=None):
+        # pares (valor, Employee_ID) en orden, recorriendo la cadena de hojas;
+        # low/high inclusivos, None deja ese lado abierto
+        node = self.find_leaf((low, MIN_ID) if low is not None else (float('-inf'), MIN_ID))
+        i = bisect_left(node.keys, (low, MIN_ID)) if low is not None else 0
+        while True:
+            for key in node.keys[i:]:
+                if high is not None and key[0] > high:
+                    return
+                yield key
+            if node.next == NIL:
+                return
+            node = self.read(node.next)
+            i = 0
+
+    def range(self, low=None, high=None):
+        return [employee_id for _, employee_id in self.items(low, high)]
+
+    def load(self, entries):
+        # construccion de abajo hacia arriba desde pares ordenados: hojas llenas y encadenadas
+        self.clear()
+        self.pages = 1
+        level = []
+        leaf = None
+        for key in entries:
+            if leaf is None or len(leaf.keys) >= self.leaf_capacity:
+                previous = leaf
+                leaf = BPlusNode(self.pages, True)
+                self.pages += 1
+                if previous is not None:
+                    previous.next = leaf.page
+                    self.write(previous)
+                level.append((key, leaf.page))
+            leaf.keys.append(tuple(key))
+        if leaf is None:
+            leaf = BPlusNode(self.pages, True)
+            self.pages += 1
+            level.append((None, leaf.page))
+        self.write(leaf)
+
+        while len(level) > 1:
+            upper = []
+            fan_out = self.inner_capacity + 1
+            for start in range(0, len(level), fan_out):
+                group = level[start:start + fan_out]
+                node = BPlusNode(self.pages, False, [key for key, _ in group[1:]], [page for _, page in group])
+                self.pages += 1
+                self.write(node)
+                upper.append((group[0][0], node.page))
+            level = upper
+        self.root = level[0][1]
+        self.write_header()
@@ -0,0 +1,108 @@
+import threading
+from contextlib import contextmanager
+
+class RWLock:
+    # muchos lectores o un escritor, por turnos: un escritor en espera bloquea a los lectores
+    # nuevos y al salir deja pasar a los lectores que esperaban antes del siguiente escritor,
+    # asi ninguno de los dos lados queda postergado. El escritor puede leer y volver a escribir
+    # sin bloquearse, y con downgraded() deja entrar lectores mientras conserva la exclusion
+    # frente a otros escritores
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.readers = 0
+        self.owner = None  # hilo escritor, exclusivo o degradado
+        self.exclusive = False
+        self.waiting = 0
+        self.read_waiting = 0
+        self.admit = 0  # lectores con turno ganado al salir el ultimo escritor
+        self.local = threading.local()
+
+    @contextmanager
+    def read(self):
+        depth = getattr(self.local, 'depth', 0)
+        if depth or self.owner == threading.get_ident():
+            self.local.depth = depth + 1
+            try:
+                yield
+            finally:
+                self.local.depth = depth
+            return
+        with self.cond:
+            self.read_waiting += 1
+            while not self.admit and (self.exclusive or (self.waiting and self.owner is None)):
+                self.cond.wait()
+            self.read_waiting -= 1
+            if self.admit:
+                self.admit -= 1
+            self.readers += 1
+        self.local.depth = 1
+        try:
+            yield
+        finally:
+            self.local.depth = 0
+            with self.cond:
+                self.readers -= 1
+                if not self.readers:
+                    self.cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        me = threading.get_ident()
+        if self.owner == me:
+            yield
+            return
+        with self.cond:
+            self.waiting += 1
+            while self.owner is not None or self.readers or self.admit:
+                self.cond.wait()
+            self.waiting -= 1
+            self.owner = me
+            self.exclusive = True
+        try:
+            yield
+        finally:
+            with self.cond:
+                self.owner = None
+                self.exclusive = False
+                self.admit = self.read_waiting
+                self.cond.notify_all()
+
+    @contextmanager
+    def downgraded(self):
+        # solo para el escritor: el estado en memoria debe quedar consistente antes de llamarlo.
+        # Al salir se cierra el paso a lectores nuevos y se espera a que terminen los que entraron
+        with self.cond:
+            self.exclusive = False
+            self.cond.notify_all()
+        try:
+            yield
+        finally:
+            with self.cond:
+                self.exclusive = True
+                while self.readers:
+                    self.cond.wait()
+
+def locked(lock_context, method):
+    def wrapper(*args, **kwargs):
+        with lock_context():
+            return method(*args, **kwargs)
+    return wrapper
+
+def make_concurrent(engine, readers, writers, serialized=()):
+    # envuelve en la instancia: lecturas compartidas, escrituras exclusivas y, en serialized,
+    # lo que usa un descriptor o una cache compartida ('atributo.metodo' para objetos internos)
+    lock = RWLock()
+    io = threading.RLock()
+    for name in serialized:
+        owner = engine
+        if '.' in name:
+            attr, name = name.split('.')
+            owner = getattr(engine, attr)
+            if owner is None:
+                continue
+        setattr(owner, name, locked(lambda: io, getattr(owner, name)))
+    for name in readers:
+        setattr(engine, name, locked(lock.read, getattr(engine, name)))
+    for name in writers:
+        setattr(engine, name, locked(lock.write, getattr(engine, name)))
+    return lock
@@ -0,0 +1,12 @@
+from lab2_record import Record
+
+# datos sinteticos compartidos por las pruebas y los benchmarks; no forman parte de los motores
+
+def make_record(i, **fields):
+    # registro derivado del ID; cada campo se puede reemplazar por un valor fijo o por una funcion del ID
+    values = {'Employee_Name': f'Name{i}', 'Age': 20 + (i % 45), 'Country': f'Country{i % 7}',
+              'Department': f'Dep{i % 5}', 'Position': f'Pos{i % 9}', 'Salary': float(30000 + (i % 1000)),
+              'Joining_Date': '2020-01-01'}
+    for name, value in fields.items():
+        values[name] = value(i) if callable(value) else value
+    return Record(i, **values)
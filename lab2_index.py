@@ -0,0 +1,181 @@
+import json
+import os
+import struct
+import tempfile
+from datetime import date
+
+from lab2_record import FIELDS
+from lab2_bplustree import BPlusTree
+
+SECONDARY_FIELDS = ('Department', 'Country', 'Position')  # campos de texto de baja cardinalidad
+RANGE_FIELDS = ('Salary', 'Age', 'Joining_Date')  # campos con consultas por rango
+
+def data_stamp(data_files):
+    # tamaño y mtime de los datos: si no coinciden al abrir, el indice esta desactualizado
+    return {os.path.basename(path): [os.path.getsize(path), os.stat(path).st_mtime_ns]
+            for path in data_files}
+
+def write_json(path, state):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.json-', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def read_json(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except ValueError:
+        return None
+
+class SecondaryIndex:
+    # por campo: valor -> conjunto de Employee_ID. Se guardan IDs y no offsets porque la
+    # reconstruccion del principal y compact() mueven los registros
+    def __init__(self, path, fields=SECONDARY_FIELDS):
+        self.path = path
+        self.fields = tuple(fields)
+        self.clear()
+
+    def clear(self):
+        self.postings = {field: {} for field in self.fields}
+        self.values = {}  # Employee_ID -> valores indexados, para quitarlo sin leer el registro
+
+    def __len__(self):
+        return len(self.values)
+
+    def add(self, record):
+        # un ID repetido reemplaza a su version anterior
+        self.discard(record.Employee_ID)
+        values = tuple(getattr(record, field) for field in self.fields)
+        self.values[record.Employee_ID] = values
+        for field, value in zip(self.fields, values):
+            self.postings[field].setdefault(value, set()).add(record.Employee_ID)
+
+    def discard(self, employee_id):
+        values = self.values.pop(employee_id, None)
+        if values is None:
+            return
+        for field, value in zip(self.fields, values):
+            ids = self.postings[field][value]
+            ids.discard(employee_id)
+            if not ids:
+                del self.postings[field][value]
+
+    def lookup(self, field, value):
+        if field not in self.postings:
+            raise ValueError(f"El campo '{field}' no tiene indice secundario.")
+        return self.postings[field].get(value, set())
+
+    def query(self, **equals):
+        # igualdad compuesta: interseccion empezando por la lista mas corta
+        postings = sorted((self.lookup(field, value) for field, value in equals.items()), key=len)
+        if not postings:
+            return sorted(self.values)
+        result = set(postings[0])
+        for ids in postings[1:]:
+            if not result:
+                break
+            result &= ids
+        return sorted(result)
+
+    def save(self, data_files):
+        state = {
+            'fields': list(self.fields),
+            'stamp': data_stamp(data_files),
+            'postings': {field: {value: sorted(ids) for value, ids in postings.items()}
+                         for field, postings in self.postings.items()},
+        }
+        write_json(self.path, state)
+
+    def load(self, data_files):
+        # True si el archivo existe, indexa los mismos campos y corresponde a los datos actuales
+        state = read_json(self.path)
+        if state is None or tuple(state['fields']) != self.fields or state['stamp'] != data_stamp(data_files):
+            return False
+        self.clear()
+        columns = {}
+        for i, field in enumerate(self.fields):
+            for value, ids in state['postings'][field].items():
+                self.postings[field][value] = set(ids)
+                for employee_id in ids:
+                    columns.setdefault(employee_id, [None] * len(self.fields))[i] = value
+        self.values = {employee_id: tuple(values) for employee_id, values in columns.items()}
+        return True
+
+def date_ordinal(text):
+    # 'd/mm/yyyy' del csv o 'yyyy-mm-dd' -> dias desde el 1/01/0001, ordenables como numero
+    text = text.strip()
+    if '/' in text:
+        day, month, year = text.split('/')
+    else:
+        year, month, day = text.split('-')
+    return date(int(year), int(month), int(day)).toordinal()
+
+FIELD_CODES = dict(FIELDS)
+
+def range_key(field, value):
+    # valor normalizado como se guarda en el archivo: fechas a ordinal y Salary a float32,
+    # asi coinciden el registro insertado y el mismo registro leido del disco
+    if field == 'Joining_Date':
+        return date_ordinal(value) if isinstance(value, str) else value
+    code = FIELD_CODES[field]
+    return struct.unpack(code, struct.pack(code, value))[0]
+
+class RangeIndex:
+    # un arbol B+ por campo (base.<campo>.bpt) con llaves (valor, Employee_ID).
+    # Los arboles se modifican en su lugar; el manifiesto solo existe mientras el indice
+    # esta cerrado y al dia con los datos, si falta al abrir se reconstruye
+    def __init__(self, base_path, fields=RANGE_FIELDS):
+        self.fields = tuple(fields)
+        for field in self.fields:
+            if field != 'Joining_Date' and FIELD_CODES.get(field) not in ('i', 'f'):
+                raise ValueError(f"El campo '{field}' no es numerico ni fecha.")
+        self.manifest = base_path + '.bpt.json'
+        self.trees = {field: BPlusTree(f'{base_path}.{field}.bpt') for field in self.fields}
+
+    def load(self, data_files):
+        state = read_json(self.manifest)
+        if os.path.exists(self.manifest):
+            os.unlink(self.manifest)
+        return state is not None and tuple(state['fields']) == self.fields and state['stamp'] == data_stamp(data_files)
+
+    def close(self, data_files):
+        for tree in self.trees.values():
+            tree.close()
+        write_json(self.manifest, {'fields': list(self.fields), 'stamp': data_stamp(data_files)})
+
+    def flush(self):
+        for tree in self.trees.values():
+            tree.flush()
+
+    def add(self, record):
+        for field, tree in self.trees.items():
+            tree.insert(range_key(field, getattr(record, field)), record.Employee_ID)
+
+    def discard(self, record):
+        for field, tree in self.trees.items():
+            tree.delete(range_key(field, getattr(record, field)), record.Employee_ID)
+
+    def build(self, records):
+        # carga masiva: pares ordenados por campo y construccion de abajo hacia arriba
+        entries = {field: [] for field in self.fields}
+        for record in records:
+            for field in self.fields:
+                entries[field].append((range_key(field, getattr(record, field)), record.Employee_ID))
+        for field, tree in self.trees.items():
+            tree.load(sorted(entries[field]))
+
+    def range(self, field, low=None, high=None):
+        # Employee_ID con low <= campo <= high, en orden de (valor, Employee_ID)
+        if field not in self.trees:
+            raise ValueError(f"El campo '{field}' no tiene indice de rangos.")
+        low = None if low is None else range_key(field, low)
+        high = None if high is None else range_key(field, high)
+        return self.trees[field].range(low, high)
@@ -0,0 +1,148 @@
+import argparse
+import csv
+import math
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from lab2_record import RECORD
+from lab2_sequential import sequentialFile
+from lab2_avl import AVLFile
+
+CHUNK_BYTES = 1 << 20  # bytes de csv por tarea
+COLUMNS = ['Employee_ID', 'Employee_Name', 'Age', 'Country', 'Department', 'Position', 'Salary', 'Joining_Date']
+
+DISTRIBUTIONS = ('sequential', 'uniform', 'skewed')
+
+def affine_permutation(m, rng):
+    # x -> (a*x + b) mod m con a coprimo con m: permutacion de 0..m-1 sin memoria extra
+    a = rng.randrange(1, m) if m > 1 else 1
+    while math.gcd(a, m) != 1:
+        a = rng.randrange(1, m)
+    b = rng.randrange(m)
+    return lambda x: (a * x + b) % m
+
+def id_sequence(n, distribution='sequential', seed=42):
+    # funcion i -> Employee_ID (0 <= i < n), todos distintos y reproducibles con la semilla:
+    #   sequential: 1..n en orden
+    #   uniform: n llaves repartidas al azar en 1..10n
+    #   skewed: el 80% denso en 1..0.8n y el 20% disperso en un rango 100 veces mayor
+    rng = random.Random(seed)
+    if distribution == 'sequential':
+        return lambda i: i + 1
+    if distribution == 'uniform':
+        perm = affine_permutation(10 * n, rng)
+        return lambda i: perm(i) + 1
+    if distribution == 'skewed':
+        cold_count = (n + 4) // 5
+        hot_count = n - cold_count
+        hot = affine_permutation(max(1, hot_count), rng)
+        cold = affine_permutation(100 * cold_count, rng)
+        return lambda i: hot_count + 1 + cold(i // 5) if i % 5 == 0 else hot(i - i // 5 - 1) + 1
+    raise ValueError(f"Distribucion desconocida: {distribution}")
+
+def id_space(n, distribution='sequential'):
+    # mayor Employee_ID posible de id_sequence
+    if distribution == 'uniform':
+        return 10 * n
+    if distribution == 'skewed':
+        cold_count = (n + 4) // 5
+        return n - cold_count + 100 * cold_count
+    return n
+
+def generate_csv(path, n, distribution='sequential', seed=42):
+    employee_id = id_sequence(n, distribution, seed)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(COLUMNS)
+        for i in range(n):
+            key = employee_id(i)
+            writer.writerow([
+                key,
+                f'Name{key}',
+                20 + (key % 45),
+                f'Country{key % 7}',
+                f'Dep{key % 5}',
+                f'Pos{key % 9}',
+                float(30000 + (key % 1000)),
+                f'2020-01-{(key % 28) + 1:02d}'
+            ])
+
+def read_chunks(path, chunk_bytes=CHUNK_BYTES):
+    # (cabecera, bloque de lineas completas); se asume que ningun campo contiene saltos de linea
+    with open(path, 'rb') as f:
+        header = f.readline()
+        while (data := f.read(chunk_bytes)):
+            yield header, data + f.readline()
+
+def encode_chunk(header, data):
+    # en el proceso trabajador: texto csv -> registros empaquetados contiguos.
+    # struct rellena con \x00 y trunca los campos de texto igual que Record.pack
+    columns = next(csv.reader([header.decode('utf-8-sig').strip()], delimiter=';'))
+    order = [columns.index(name) for name in COLUMNS]
+    packed = []
+    for row in csv.reader(data.decode('utf-8').splitlines(), delimiter=';'):
+        if not row:
+            continue
+        (employee_id, name, age, country, department, position, salary, joining_date) = [row[i] for i in order]
+        packed.append(RECORD.pack(int(employee_id), name.encode('utf-8'), int(age), country.encode('utf-8'),
+                                  department.encode('utf-8'), position.encode('utf-8'), float(salary),
+                                  joining_date.encode('utf-8')))
+    return len(packed), b''.join(packed)
+
+def encoded_blocks(path, workers=None, chunk_bytes=CHUNK_BYTES, max_pending=None, stats=None):
+    # bloques empaquetados en el orden del archivo. A lo sumo max_pending tareas en vuelo:
+    # si el consumidor se atrasa no se lee mas csv, asi la memoria no depende del tamaño del archivo
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    pending = deque()
+    chunks = read_chunks(path, chunk_bytes)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for header, data in chunks:
+            pending.append(pool.submit(encode_chunk, header, data))
+            if len(pending) >= max_pending:
+                rows, block = pending.popleft().result()
+                if stats is not None:
+                    stats['rows'] += rows
+                yield block
+        while pending:
+            rows, block = pending.popleft().result()
+            if stats is not None:
+                stats['rows'] += rows
+            yield block
+
+def load_blocks(engine, blocks):
+    # sequentialFile: ordenamiento externo de bulk_load (memoria acotada por run_size);
+    # AVLFile: una escritura por bloque con insert_packed
+    if isinstance(engine, sequentialFile):
+        engine.bulk_load(blocks)
+    else:
+        for block in blocks:
+            engine.insert_packed(block)
+
+def ingest(engine, path, workers=None, chunk_bytes=CHUNK_BYTES, max_pending=None):
+    stats = {'rows': 0}
+    t0 = time.perf_counter()
+    load_blocks(engine, encoded_blocks(path, workers, chunk_bytes, max_pending, stats))
+    stats['seconds'] = time.perf_counter() - t0
+    stats['rows_per_s'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+    print(f"Ingesta de '{path}': {stats['rows']} filas en {stats['seconds']:.3f} s "
+          f"({stats['rows_per_s']:,.0f} filas/s)")
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description='Carga en streaming de un csv con procesos paralelos')
+    parser.add_argument('csv_path', nargs='?', default='employee.csv')
+    parser.add_argument('--engine', choices=['sequential', 'avl'], default='sequential')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-bytes', type=int, default=CHUNK_BYTES)
+    args = parser.parse_args()
+
+    engine = sequentialFile() if args.engine == 'sequential' else AVLFile()
+    ingest(engine, args.csv_path, args.workers, args.chunk_bytes)
+    engine.close()
+
+if __name__ == "__main__":
+    main()
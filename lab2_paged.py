@@ -0,0 +1,277 @@
+import os
+import struct
+import heapq
+from bisect import bisect_left, bisect_right
+
+from lab2_sequential import sequentialFile, BLOCK_RECORDS, newest_versions
+from lab2_stats import PAGED_HOOKS
+from lab2_wal import WAL_INSERT, WAL_REMOVE, GROUP_SIZE, GROUP_MS
+from lab2_record import RecordBatch, RECORD_SIZE, KEY, KEY_SCAN, record_key
+
+# archivo principal organizado en paginas de tamaño fijo:
+# | cantidad | llave minima | llave maxima | registros ordenados | relleno |
+PAGE_SIZE = 4096
+PAGE_HEADER = struct.Struct('iii')
+FILL_FACTOR = 0.8  # fraccion ocupada por pagina al reconstruir; el resto queda para inserciones
+HAVE_PREAD = hasattr(os, 'pread')
+
+class pagedSequentialFile(sequentialFile):
+    page_header = PAGE_HEADER.size
+    stat_hooks = PAGED_HOOKS
+
+    def __init__(self, main_file='employees_paged.dat', aux_file='auxiliary_paged.dat', k=1000,
+                 page_size=PAGE_SIZE, fill_factor=FILL_FACTOR, secondary_fields=(),
+                 range_fields=(), wal=False, group_size=GROUP_SIZE, group_ms=GROUP_MS, stats=False,
+                 concurrent=False):
+        self.page_size = page_size
+        self.capacity = (page_size - PAGE_HEADER.size) // RECORD_SIZE
+        if self.capacity < 1:
+            raise ValueError(f"page_size {page_size} no alcanza para un registro de {RECORD_SIZE} bytes")
+        self.fill = max(1, int(self.capacity * fill_factor))
+        super().__init__(main_file, aux_file, k, secondary_fields, range_fields, wal, group_size, group_ms, stats,
+                         concurrent)
+
+    def open_storage(self):
+        self.file = open(self.main_file, 'r+b')
+        self.load_page_index()
+
+    def close(self):
+        super().close()
+        self.file.close()
+
+    def load_page_index(self):
+        # indice disperso: llave minima de cada pagina no vacia -> numero de pagina
+        self.page_keys = []
+        self.page_nums = []
+        self.page_count = os.path.getsize(self.main_file) // self.page_size
+        for page in range(self.page_count):
+            self.file.seek(page * self.page_size)
+            count, min_key, _ = PAGE_HEADER.unpack(self.file.read(PAGE_HEADER.size))
+            if count > 0:
+                self.page_keys.append(min_key)
+                self.page_nums.append(page)
+
+    def read_page(self, page):
+        # una sola lectura por pagina. Con pread no hay posicion compartida entre hilos lectores;
+        # write_page hace flush, asi que no quedan datos pendientes en el buffer del archivo
+        if HAVE_PREAD:
+            data = os.pread(self.file.fileno(), self.page_size, page * self.page_size)
+        else:
+            self.file.seek(page * self.page_size)
+            data = self.file.read(self.page_size)
+        count = PAGE_HEADER.unpack_from(data)[0]
+        body = data[PAGE_HEADER.size:PAGE_HEADER.size + count * self.record_size]
+        keys = [key for (key,) in KEY_SCAN.iter_unpack(body)]
+        return keys, body
+
+    def pack_page(self, records):
+        header = PAGE_HEADER.pack(len(records), record_key(records[0]) if records else 0,
+                                  record_key(records[-1]) if records else 0)
+        return (header + b''.join(records)).ljust(self.page_size, b'\x00')
+
+    def write_page(self, page, records):
+        self.file.seek(page * self.page_size)
+        self.file.write(self.pack_page(records))
+        self.file.flush()
+
+    def split_records(self, body):
+        return [body[i:i + self.record_size] for i in range(0, len(body), self.record_size)]
+
+    def locate(self, employee_id):
+        # entrada del indice disperso cuyo rango contiene a employee_id
+        if not self.page_keys:
+            return -1
+        return max(0, bisect_right(self.page_keys, employee_id) - 1)
+
+    def insert(self, record):
+        # primero se intenta en su pagina; si esta llena va al auxiliar. Un ID que ya esta
+        # en la pagina se sobrescribe en su slot y uno que ya esta en el auxiliar sigue ahi
+        self.log(WAL_INSERT, record.pack())
+        self.index_record(record)
+        entry = self.locate(record.Employee_ID) if record.Employee_ID not in self.aux_index else -1
+        if entry != -1:
+            page = self.page_nums[entry]
+            keys, body = self.read_page(page)
+            i = bisect_left(keys, record.Employee_ID)
+            records = None
+            if i < len(keys) and keys[i] == record.Employee_ID:
+                records = self.split_records(body)
+                records[i] = record.pack()
+            elif len(keys) < self.capacity:
+                records = self.split_records(body)
+                records.insert(i, record.pack())
+            if records is not None:
+                # la pagina se reescribe en su lugar: primero la bitacora
+                self.commit()
+                self.write_page(page, records)
+                if record.Employee_ID < self.page_keys[entry]:
+                    self.page_keys[entry] = record.Employee_ID
+                return
+        self.append_aux(record)
+
+    def insert_many(self, records):
+        # el lote se agrupa por pagina: cada pagina se reescribe una vez y lo que no
+        # cabe va al auxiliar en una sola escritura
+        batch = self.prepare_batch(records)
+        pages = {}
+        spill = []
+        for record in batch:
+            entry = self.locate(record.Employee_ID) if record.Employee_ID not in self.aux_index else -1
+            if entry == -1:
+                spill.append(record)
+            else:
+                pages.setdefault(entry, []).append(record)
+        if pages:
+            self.commit()
+        for entry, page_batch in pages.items():
+            page = self.page_nums[entry]
+            keys, body = self.read_page(page)
+            slots = dict(zip(keys, self.split_records(body)))
+            for record in page_batch:
+                if record.Employee_ID in slots or len(slots) < self.capacity:
+                    slots[record.Employee_ID] = record.pack()
+                else:
+                    spill.append(record)
+            self.write_page(page, [slots[key] for key in sorted(slots)])
+            self.page_keys[entry] = min(self.page_keys[entry], min(slots))
+        self.append_many(spill)
+        return len(batch)
+
+    def find_in_pages(self, employee_id):
+        entry = self.locate(employee_id)
+        if entry == -1:
+            return None
+        keys, body = self.read_page(self.page_nums[entry])
+        i = bisect_left(keys, employee_id)
+        if i < len(keys) and keys[i] == employee_id:
+            return self.unpack(body, i * self.record_size)
+        return None
+
+    def binary_search(self, employee_id):
+        if employee_id == -1:
+            return None
+        return self.find_in_pages(employee_id)
+
+    def probe_main(self, ids):
+        # ids ordenados: cada pagina se lee una sola vez para todas las llaves que caen en ella
+        found = {}
+        page = None
+        for employee_id in ids:
+            entry = self.locate(employee_id)
+            if entry == -1:
+                break
+            if self.page_nums[entry] != page:
+                page = self.page_nums[entry]
+                keys, body = self.read_page(page)
+            i = bisect_left(keys, employee_id)
+            if i < len(keys) and keys[i] == employee_id:
+                found[employee_id] = self.unpack(body, i * self.record_size)
+        return found
+
+    def search(self, employee_id):
+        return self.get(employee_id)
+
+    def remove_many(self, ids):
+        # en las paginas el registro se quita y la pagina se compacta, liberando su slot;
+        # cada pagina afectada se reescribe una sola vez
+        ids = sorted(set(ids))
+        self.log(WAL_REMOVE, b''.join(KEY.pack(employee_id) for employee_id in ids))
+        pages = {}
+        aux_ids = set()
+        removed = set()
+        for employee_id in ids:
+            if employee_id == -1:
+                continue
+            entry = self.locate(employee_id)
+            if entry != -1:
+                page = self.page_nums[entry]
+                keys, _ = self.read_page(page)
+                i = bisect_left(keys, employee_id)
+                if i < len(keys) and keys[i] == employee_id:
+                    pages.setdefault(page, []).append(i)
+                    removed.add(employee_id)
+            if employee_id in self.aux_index:
+                aux_ids.add(employee_id)
+                removed.add(employee_id)
+        self.unindex(removed)
+        if pages:
+            self.commit()
+        for page, positions in pages.items():
+            records = self.split_records(self.read_page(page)[1])
+            for i in reversed(positions):
+                del records[i]
+            self.write_page(page, records)
+        self.drop_aux(self.aux_file, self.aux_index, aux_ids)
+        return len(removed)
+
+    def range_search(self, start_id, end_id):
+        # paginas completas desde la que contiene start_id hasta pasar end_id
+        main_results = []
+        entry = self.locate(start_id)
+        if entry != -1:
+            first_entry = entry
+            while entry < len(self.page_nums) and (entry == first_entry or self.page_keys[entry] <= end_id):
+                keys, body = self.read_page(self.page_nums[entry])
+                first = bisect_left(keys, start_id)
+                last = bisect_right(keys, end_id)
+                main_results.extend(self.unpack(body, i * self.record_size) for i in range(first, last))
+                if keys and keys[-1] > end_id:
+                    break
+                entry += 1
+
+        aux_results = self.aux_range(start_id, end_id)
+        if not aux_results:
+            return main_results
+        found = {record.Employee_ID for record in aux_results}
+        main_results = [record for record in main_results if record.Employee_ID not in found]
+        return list(heapq.merge(main_results, aux_results, key=lambda r: r.Employee_ID))
+
+    def filter(self, **ranges):
+        # una version por ID: la del auxiliar reemplaza a la de las paginas
+        superseded = self.aux_ids()
+        main = []
+        block = []
+        for page in self.page_nums:
+            block.append(self.read_page(page)[1])
+            if len(block) * self.capacity >= BLOCK_RECORDS:
+                main.extend(self.decode(RecordBatch.from_bytes(b''.join(block)).where(**ranges).without(superseded)))
+                block = []
+        main.extend(self.decode(RecordBatch.from_bytes(b''.join(block)).where(**ranges).without(superseded)))
+        return list(heapq.merge(main, self.decode(self.aux_batch(**ranges)), key=lambda r: r.Employee_ID))
+
+    def iter_live(self, path):
+        if path != self.main_file:
+            return super().iter_live(path)
+        return (record for page in self.page_nums for record in self.split_records(self.read_page(page)[1]))
+
+    def merged_records(self):
+        aux_records = sorted(self.iter_live(self.aux_file), key=record_key)
+        return newest_versions(heapq.merge(self.iter_live(self.main_file), aux_records, key=record_key))
+
+    def write_records(self, f, sorted_records):
+        # paginas llenas hasta fill_factor
+        count = 0
+        page = []
+        for data in sorted_records:
+            for record in self.split_records(data):
+                page.append(record)
+                if len(page) >= self.fill:
+                    f.write(self.pack_page(page))
+                    count += len(page)
+                    page = []
+        if page:
+            f.write(self.pack_page(page))
+            count += len(page)
+        return count
+
+    def install_main(self, tmp_path):
+        self.file.close()
+        try:
+            super().install_main(tmp_path)
+        finally:
+            self.file = open(self.main_file, 'r+b')
+        self.load_page_index()
+
+    def sync_data(self):
+        self.file.flush()
+        super().sync_data()
@@ -0,0 +1,223 @@
+import struct
+import csv
+
+try:
+    import numpy as np
+except ImportError:  # sin numpy se usa struct.iter_unpack, con la misma interfaz
+    np = None
+
+FORMAT = 'i30si20s20s20sf10s'  # Formato para struct (ajustado para los campos)
+RECORD_SIZE = struct.calcsize(FORMAT)
+RECORD = struct.Struct(FORMAT)
+KEY = struct.Struct('i')  # Employee_ID al inicio de cada registro empaquetado
+KEY_SCAN = struct.Struct(f'i{RECORD_SIZE - KEY.size}x')  # solo la llave de cada registro
+
+FIELDS = [('Employee_ID', 'i'), ('Employee_Name', '30s'), ('Age', 'i'), ('Country', '20s'),
+          ('Department', '20s'), ('Position', '20s'), ('Salary', 'f'), ('Joining_Date', '10s')]
+TEXT_FIELDS = [name for name, code in FIELDS if code.endswith('s')]
+
+def field_offsets():
+    # offsets con la alineacion nativa de struct (la misma que usa FORMAT)
+    offsets = []
+    prefix = ''
+    for _, code in FIELDS:
+        offsets.append(struct.calcsize(prefix + code) - struct.calcsize(code))
+        prefix += code
+    return offsets
+
+if np is not None:
+    DTYPE = np.dtype({
+        'names': [name for name, _ in FIELDS],
+        'formats': ['i4' if code == 'i' else 'f4' if code == 'f' else 'S' + code[:-1] for _, code in FIELDS],
+        'offsets': field_offsets(),
+        'itemsize': RECORD_SIZE,
+    })
+    RAW = np.dtype((np.void, RECORD_SIZE))  # registro opaco: conserva tambien los bytes de relleno
+else:
+    DTYPE = RAW = None
+
+def record_key(data):
+    return KEY.unpack_from(data)[0]
+
+class Record:
+    def __init__(self,  Employee_ID, Employee_Name, Age, Country, Department, Position, Salary, Joining_Date):
+        self.Employee_ID = Employee_ID
+        self.Employee_Name = Employee_Name
+        self.Age = Age
+        self.Country = Country
+        self.Department = Department
+        self.Position = Position
+        self.Salary = Salary
+        self.Joining_Date = Joining_Date
+        self.is_deleted = False
+
+    def pack(self):
+        name_bytes = self.Employee_Name.encode('utf-8')[:30].ljust(30, b'\x00')
+        country_bytes = self.Country.encode('utf-8')[:20].ljust(20, b'\x00')
+        department_bytes = self.Department.encode('utf-8')[:20].ljust(20, b'\x00')
+        position_bytes = self.Position.encode('utf-8')[:20].ljust(20, b'\x00')
+        joining_date_bytes = self.Joining_Date.encode('utf-8')[:10].ljust(10, b'\x00')
+
+        return struct.pack(FORMAT,
+                          self.Employee_ID,
+                          name_bytes,
+                          self.Age,
+                          country_bytes,
+                          department_bytes,
+                          position_bytes,
+                          self.Salary,
+                          joining_date_bytes)
+
+    @classmethod
+    def unpack(cls, data, offset=0):
+        return cls.from_tuple(RECORD.unpack_from(data, offset))
+
+    @classmethod
+    def from_tuple(cls, unpacked_data):
+        employee_id = int(unpacked_data[0])
+        employee_name = unpacked_data[1].decode('utf-8').rstrip('\x00')
+        age = int(unpacked_data[2])
+        country = unpacked_data[3].decode('utf-8').rstrip('\x00')
+        department = unpacked_data[4].decode('utf-8').rstrip('\x00')
+        position = unpacked_data[5].decode('utf-8').rstrip('\x00')
+        salary = float(unpacked_data[6])
+        joining_date = unpacked_data[7].decode('utf-8').rstrip('\x00')
+        return cls(employee_id, employee_name, age, country, department, position, salary, joining_date)
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            Employee_ID=int(row['Employee_ID']),
+            Employee_Name=row['Employee_Name'],
+            Age=int(row['Age']),
+            Country=row['Country'],
+            Department=row['Department'],
+            Position=row['Position'],
+            Salary=float(row['Salary']),
+            Joining_Date=row['Joining_Date']
+        )
+
+def read_csv_records(path):
+    # lectura en streaming: una fila a la vez, sin materializar el csv
+    with open(path, 'r', encoding='utf-8') as csvfile:
+        for row in csv.DictReader(csvfile, delimiter=';'):
+            yield Record.from_row(row)
+
+
+class RecordBatch:
+    # bloque de registros empaquetados decodificado de una vez (np.frombuffer);
+    # los Record se construyen solo cuando se piden
+    def __init__(self, rows):
+        # numpy: arreglo de registros opacos (RAW) leido por columnas con la vista DTYPE;
+        # sin numpy: lista de tuplas de struct
+        self.rows = rows
+
+    @property
+    def fields(self):
+        return self.rows.view(DTYPE)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if np is not None:
+            return cls(np.frombuffer(data, dtype=RAW, count=len(data) // RECORD_SIZE))
+        return cls(list(RECORD.iter_unpack(memoryview(data)[:len(data) - len(data) % RECORD_SIZE])))
+
+    @classmethod
+    def from_records(cls, records):
+        records = list(records)
+        if np is None:
+            return cls([RECORD.unpack(record.pack()) for record in records])
+        rows = np.zeros(len(records), dtype=DTYPE)
+        for name, _ in FIELDS:
+            values = [getattr(record, name) for record in records]
+            if name in TEXT_FIELDS:
+                values = [value.encode('utf-8') for value in values]
+            rows[name] = values
+        return cls(rows.view(RAW))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def column(self, name):
+        if np is not None:
+            return self.fields[name]
+        i = [field for field, _ in FIELDS].index(name)
+        return [row[i] for row in self.rows]
+
+    def ids(self):
+        return self.column('Employee_ID')
+
+    def where(self, **ranges):
+        # filtro por rangos inclusivos (lo, hi) sobre columnas numericas;
+        # None en un extremo deja ese lado abierto. Siempre omite los eliminados (-1)
+        if np is not None:
+            fields = self.fields
+            mask = fields['Employee_ID'] != -1
+            for name, (low, high) in ranges.items():
+                column = fields[name]
+                if low is not None:
+                    mask &= column >= low
+                if high is not None:
+                    mask &= column <= high
+            return RecordBatch(self.rows[mask])
+        positions = [[field for field, _ in FIELDS].index(name) for name in ranges]
+        bounds = list(ranges.values())
+        rows = [row for row in self.rows if row[0] != -1 and all(
+            (low is None or row[i] >= low) and (high is None or row[i] <= high)
+            for i, (low, high) in zip(positions, bounds))]
+        return RecordBatch(rows)
+
+    def sort_by_id(self):
+        # orden estable: en empate se conserva el orden original
+        if np is not None:
+            return RecordBatch(self.rows[np.argsort(self.fields['Employee_ID'], kind='stable')])
+        return RecordBatch(sorted(self.rows, key=lambda row: row[0]))
+
+    def latest(self):
+        # ordenado por ID y, en empate, de la version mas vieja a la mas nueva: queda la ultima
+        if np is not None:
+            ids = self.fields['Employee_ID']
+            keep = np.ones(len(ids), dtype=bool)
+            keep[:-1] = ids[1:] != ids[:-1]
+            return RecordBatch(self.rows[keep])
+        rows = self.rows
+        return RecordBatch([row for i, row in enumerate(rows) if i + 1 == len(rows) or rows[i + 1][0] != row[0]])
+
+    def without(self, ids):
+        # omite las filas cuyo ID esta en el conjunto ids
+        if not ids:
+            return self
+        if np is not None:
+            drop = np.fromiter(ids, dtype=np.int32, count=len(ids))
+            return RecordBatch(self.rows[~np.isin(self.fields['Employee_ID'], drop)])
+        return RecordBatch([row for row in self.rows if row[0] not in ids])
+
+    def split(self, employee_id):
+        # (filas con ID <= employee_id, resto); requiere el bloque ordenado por ID
+        if np is not None:
+            cut = int(np.searchsorted(self.fields['Employee_ID'], employee_id, side='right'))
+        else:
+            cut = 0
+            while cut < len(self.rows) and self.rows[cut][0] <= employee_id:
+                cut += 1
+        return RecordBatch(self.rows[:cut]), RecordBatch(self.rows[cut:])
+
+    @classmethod
+    def concat(cls, batches):
+        if np is not None:
+            return cls(np.concatenate([batch.rows for batch in batches]))
+        return cls([row for batch in batches for row in batch.rows])
+
+    def tobytes(self):
+        if np is not None:
+            return self.rows.tobytes()
+        return b''.join(RECORD.pack(*row) for row in self.rows)
+
+    def record(self, i):
+        if np is not None:
+            return Record.from_tuple(self.fields[i])
+        return Record.from_tuple(self.rows[i])
+
+    def records(self):
+        for i in range(len(self.rows)):
+            yield self.record(i)
@@ -1,8 +1,22 @@
-import struct
 import os 
-import csv
+import struct
 import time
 import random 
+import heapq
+from itertools import islice, repeat
+import tempfile
+import threading
+import mmap
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+
+from lab2_record import (Record, RecordBatch, FORMAT, RECORD_SIZE, KEY, KEY_SCAN,
+                         record_key, read_csv_records, np)
+from lab2_index import SecondaryIndex, RangeIndex
+from lab2_stats import instrument, SEQUENTIAL_OPS, SEQUENTIAL_HOOKS
+from lab2_concurrency import make_concurrent
+from lab2_wal import (WriteAheadLog, WAL_INSERT, WAL_REMOVE, WAL_REBUILD, WAL_CHECKPOINT, WAL_SWAP, CHECKPOINT,
+                      GROUP_SIZE, GROUP_MS, fsync_directory)
 
 #pasos:
 # 1.- carga de datos de un archivo csv
@@ -14,9 +28,10 @@ import random
 #5.- funcion para la busqueda por rango que retorne todos los empleados
 # entre un rango de Employee_ID especificado
 
-FORMAT = 'i30si20s20s20sf10s'  # Formato para struct (ajustado para los campos)
-RECORD_SIZE = struct.calcsize(FORMAT)
 K = 5
+PAGE_COUNT = struct.Struct('i')  # cantidad de registros: primer campo de la cabecera de pagina
+RUN_SIZE = 100000  # registros por corrida en memoria para el ordenamiento externo
+BLOCK_RECORDS = 4096  # registros por bloque en lecturas y escrituras con buffer
 
 def time_execution(func, *args, **kwargs):
     start_time = time.time()
@@ -25,154 +40,895 @@ def time_execution(func, *args, **kwargs):
     execution_time = end_time - start_time
     return result, execution_time
 
-class Record:
-    def __init__(self,  Employee_ID, Employee_Name, Age, Country, Department, Position, Salary, Joining_Date):
-        self.Employee_ID = Employee_ID
-        self.Employee_Name = Employee_Name
-        self.Age = Age
-        self.Country = Country
-        self.Department = Department
-        self.Position = Position
-        self.Salary = Salary
-        self.Joining_Date = Joining_Date
-        self.is_deleted = False  
-
-    def pack(self):
-        name_bytes = self.Employee_Name.encode('utf-8')[:30].ljust(30, b'\x00')
-        country_bytes = self.Country.encode('utf-8')[:20].ljust(20, b'\x00')
-        department_bytes = self.Department.encode('utf-8')[:20].ljust(20, b'\x00')
-        position_bytes = self.Position.encode('utf-8')[:20].ljust(20, b'\x00')
-        joining_date_bytes = self.Joining_Date.encode('utf-8')[:10].ljust(10, b'\x00')
-        
-        return struct.pack(FORMAT, 
-                          self.Employee_ID,           
-                          name_bytes,                 
-                          self.Age,                   
-                          country_bytes,              
-                          department_bytes,           
-                          position_bytes,             
-                          self.Salary,                
-                          joining_date_bytes)
-
-    @classmethod
-    def unpack(cls, data):
-        unpacked_data = struct.unpack(FORMAT, data)
-        employee_id = unpacked_data[0]
-        employee_name = unpacked_data[1].decode('utf-8').rstrip('\x00')
-        age = unpacked_data[2]
-        country = unpacked_data[3].decode('utf-8').rstrip('\x00')
-        department = unpacked_data[4].decode('utf-8').rstrip('\x00')
-        position = unpacked_data[5].decode('utf-8').rstrip('\x00')
-        salary = unpacked_data[6]
-        joining_date = unpacked_data[7].decode('utf-8').rstrip('\x00')
-        return cls(employee_id, employee_name, age, country, department, position, salary, joining_date)
-                                                          
+def newest_versions(records):
+    # registros empaquetados ordenados por llave y, en empate, del mas viejo al mas nuevo
+    # (heapq.merge desempata por el orden de las fuentes): de cada ID queda el ultimo
+    previous = None
+    for data in records:
+        if previous is not None and record_key(previous) != record_key(data):
+            yield previous
+        previous = data
+    if previous is not None:
+        yield previous
+
+def shard_blocks(view, start, stop, page_size, page_header):
+    # bloques de a lo sumo BLOCK_RECORDS registros; en un archivo paginado se juntan
+    # los cuerpos de varias paginas (el primer campo de la cabecera es la cantidad)
+    if not page_size:
+        step = BLOCK_RECORDS * RECORD_SIZE
+        for i in range(start, stop, step):
+            yield view[i:min(i + step, stop)]
+        return
+    block = []
+    pending = 0
+    for page in range(start, stop, page_size):
+        count = PAGE_COUNT.unpack_from(view, page)[0]
+        block.append(view[page + page_header:page + page_header + count * RECORD_SIZE])
+        pending += count
+        if pending >= BLOCK_RECORDS:
+            yield b''.join(block)
+            block = []
+            pending = 0
+    yield b''.join(block)
+
+def scan_shard(path, start, stop, ranges, predicate=None, page_size=0, page_header=0):
+    # en el proceso trabajador: mmap propio del tramo [start, stop) y filtro por bloques.
+    # Devuelve los registros que cumplen, empaquetados y en el orden del archivo
+    offset = start - start % mmap.ALLOCATIONGRANULARITY
+    found = []
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), stop - offset, access=mmap.ACCESS_READ,
+                                          offset=offset) as view:
+        for block in shard_blocks(view, start - offset, stop - offset, page_size, page_header):
+            batch = RecordBatch.from_bytes(block).where(**ranges)
+            if predicate is None:
+                found.append(batch.tobytes())
+            else:
+                found.extend(record.pack() for record in batch.records() if predicate(record))
+    return b''.join(found)
 
 class sequentialFile:
-    def __init__(self, main_file='employees.dat', aux_file='auxiliary.dat', k=1000):  # Aumentamos K
+    page_size = 0  # principal sin paginas: registros contiguos
+    page_header = 0
+    unpack = staticmethod(Record.unpack)  # por la instancia, para poder contarlo con stats=True
+    stat_ops = SEQUENTIAL_OPS
+    stat_hooks = SEQUENTIAL_HOOKS
+    # modo concurrente: lecturas en paralelo, un escritor a la vez
+    lock_readers = ('search', 'get', 'get_many', 'binary_search', 'range_search', 'filter', 'parallel_filter',
+                    'find_by', 'range_by')
+    lock_writers = ('insert', 'insert_many', 'remove', 'remove_many', 'bulk_load', 'reconstruct_main_file',
+                    'wait_rebuild', 'commit', 'close')
+    lock_serialized = ('ranges.range',)  # el arbol B+ lee con seek y tiene cache propia
+
+    def __init__(self, main_file='employees.dat', aux_file='auxiliary.dat', k=1000,  # Aumentamos K
+                 secondary_fields=(), range_fields=(), wal=False, group_size=GROUP_SIZE, group_ms=GROUP_MS,
+                 stats=False, concurrent=False, background=False, rebuild_seconds=None, tombstone_ratio=None):
         self.main_file = main_file
         self.aux_file = aux_file
         self.k = k
         self.record_size = RECORD_SIZE
+        # recover() puede reconstruir el principal antes de que se envuelvan los metodos
+        self.metrics = self.lock = None
+
+        # politica de reconstruccion: k registros en el auxiliar, o rebuild_seconds desde la
+        # ultima con el auxiliar no vacio, o una fraccion tombstone_ratio de eliminados en el
+        # principal. Con background la mezcla corre en un hilo sobre un segmento congelado
+        self.background = background
+        self.rebuild_seconds = rebuild_seconds
+        self.tombstone_ratio = tombstone_ratio
+        self.tombstones = 0  # eliminados en el principal desde la ultima reconstruccion
+        self.last_rebuild = time.monotonic()
+        self.frozen_file = self.aux_file + '.frozen'
+        self.frozen = False
+        self.frozen_index = {}
+        self.pending_removes = set()  # eliminados del principal o del congelado durante la mezcla
+        self.rebuild_thread = None
+        self.rebuild_result = self.rebuild_error = None
 
         for i in [self.main_file, self.aux_file]:
             if not os.path.exists(i):
                 with open(i, 'wb'):
                     pass  # Crear archivo vacío
 
+        self._maps = {}  # mmap de solo lectura por archivo, se rehace tras cada escritura
+        self.open_storage()
+        if not wal:
+            self.thaw_frozen()
+        self.load_aux_index()
+
+        # bitacora opcional: inserciones y eliminaciones se registran antes de aplicarse
+        self.secondary = self.ranges = self.wal = None
+        self.replaying = False
+        if wal:
+            self.wal = WriteAheadLog(self.main_file + '.wal', group_size, group_ms)
+            self.recover()
+        self.open_secondary(secondary_fields)
+        self.open_ranges(range_fields)
+
+        # estadisticas opcionales: sin stats no hay envoltorios y los metodos son los de la clase
+        if stats:
+            self.metrics = instrument(self, self.stat_ops, self.stat_hooks)
+        if concurrent:
+            self.lock = make_concurrent(self, self.lock_readers, self.lock_writers, self.lock_serialized)
+
+    def stats(self):
+        return self.metrics.snapshot() if self.metrics is not None else None
+
+    def reset_stats(self):
+        if self.metrics is not None:
+            self.metrics.reset()
+
+    def open_storage(self):
+        # para subclases que mantienen el principal abierto
+        pass
+
+    def log(self, op, payload):
+        if self.wal is not None and not self.replaying:
+            self.wal.append(op, payload)
+
+    def commit(self):
+        # fuerza el fsync de las operaciones pendientes del grupo
+        if self.wal is not None:
+            self.wal.commit()
+
+    def sync_data(self):
+        for path in [self.main_file, self.aux_file]:
+            with open(path, 'rb') as f:
+                os.fsync(f.fileno())
+
+    def checkpoint(self):
+        # datos sincronizados: la bitacora solo necesita recordar el tamaño del auxiliar
+        if self.wal is not None:
+            self.sync_data()
+            self.wal.checkpoint(self.aux_size)
+
+    def recover(self):
+        # se rehace lo registrado despues de la ultima marca
+        op, payload, entries = self.wal.replay_state()
+        if op == WAL_SWAP:
+            # caida al instalar una reconstruccion en segundo plano: el temporal ya tiene las
+            # eliminaciones hechas durante la mezcla y el auxiliar activo es durable hasta aux_size
+            (aux_size,) = CHECKPOINT.unpack_from(payload)
+            tmp_path = os.path.join(os.path.dirname(os.path.abspath(self.main_file)),
+                                    payload[CHECKPOINT.size:].decode())
+            if os.path.exists(tmp_path):
+                os.replace(tmp_path, self.main_file)
+                self.invalidate(self.main_file)
+            if os.path.exists(self.frozen_file):
+                os.unlink(self.frozen_file)
+            with open(self.aux_file, 'r+b') as f:
+                f.truncate(min(aux_size, os.path.getsize(self.aux_file)))
+            self.invalidate(self.aux_file)
+            self.load_aux_index()
+        elif os.path.exists(self.frozen_file):
+            # caida durante la mezcla: el congelado vuelve a ser el auxiliar y lo escrito en el
+            # activo se rehace desde la bitacora, que no se vacia mientras hay un congelado
+            os.replace(self.frozen_file, self.aux_file)
+            self.invalidate(self.aux_file)
+            self.load_aux_index()
+        if op == WAL_REBUILD:
+            # caida durante la reconstruccion: si el temporal sigue ahi, el rename no ocurrio
+            tmp_path = os.path.join(os.path.dirname(os.path.abspath(self.main_file)), payload.decode())
+            if os.path.exists(tmp_path):
+                self.install_main(tmp_path)
+            self.clear_aux()
+        elif op == WAL_CHECKPOINT:
+            # lo escrito en el auxiliar despues de la marca se descarta y se rehace
+            (aux_size,) = CHECKPOINT.unpack(payload)
+            with open(self.aux_file, 'r+b') as f:
+                f.truncate(min(aux_size, os.path.getsize(self.aux_file)))
+            self.invalidate(self.aux_file)
+            self.load_aux_index()
+        if entries:
+            self.replaying = True
+            try:
+                for op, payload in entries:
+                    if op == WAL_INSERT:
+                        self.insert(self.unpack(payload))
+                    elif op == WAL_REMOVE:
+                        self.remove_many([employee_id for (employee_id,) in KEY.iter_unpack(payload)])
+            finally:
+                self.replaying = False
+            print(f"Bitacora '{self.wal.path}': {len(entries)} operaciones rehechas.")
+        self.checkpoint()
+        if self.is_full():
+            self.reconstruct_main_file()
+
+    def open_secondary(self, fields):
+        # indices secundarios opcionales, p. ej. secondary_fields=SECONDARY_FIELDS
+        self.secondary = None
+        if not fields:
+            return
+        self.secondary = SecondaryIndex(self.main_file + '.sidx', fields)
+        if not self.secondary.load([self.main_file, self.aux_file]):
+            for path in [self.main_file, self.aux_file]:
+                for data in self.iter_live(path):
+                    self.secondary.add(self.unpack(data))
+            self.save_secondary()
+
+    def save_secondary(self):
+        if self.secondary is not None:
+            self.secondary.save([self.main_file, self.aux_file])
+
+    def open_ranges(self, fields):
+        # arboles B+ opcionales por rango, p. ej. range_fields=RANGE_FIELDS
+        self.ranges = None
+        if not fields:
+            return
+        self.ranges = RangeIndex(self.main_file, fields)
+        if not self.ranges.load([self.main_file, self.aux_file]):
+            self.rebuild_ranges()
+
+    def rebuild_ranges(self):
+        # la version del auxiliar reemplaza a la del principal
+        def live_records():
+            for data in self.iter_live(self.main_file):
+                if record_key(data) not in self.aux_index:
+                    yield self.unpack(data)
+            for offset in self.aux_index.values():
+                yield self.unpack(self.view(self.aux_file), offset)
+        self.ranges.build(live_records())
+
+    def index_record(self, record):
+        # antes de escribir: el indice de rangos quita los valores de la version anterior
+        if self.ranges is not None:
+            old = self.get(record.Employee_ID)
+            if old is not None:
+                self.ranges.discard(old)
+            self.ranges.add(record)
+        if self.secondary is not None:
+            self.secondary.add(record)
+
+    def load_aux_index(self):
+        # Employee_ID -> offset en el auxiliar (gana la ultima version)
+        self.aux_index = {}
+        view = self.view(self.aux_file)
+        for i, (key,) in enumerate(KEY_SCAN.iter_unpack(view)):
+            if key != -1:
+                self.aux_index[key] = i * self.record_size
+        self.aux_size = len(view)
+
+    def clear_aux(self):
+        with open(self.aux_file, 'wb'):
+            pass
+        self.invalidate(self.aux_file)
+        self.aux_index = {}
+        self.aux_size = 0
+
+    def thaw_frozen(self):
+        # sin bitacora, un congelado que quedo de una caida se junta con el auxiliar; el activo
+        # va despues, asi su version de cada ID sigue ganando
+        if os.path.exists(self.frozen_file):
+            with open(self.frozen_file, 'ab') as f, open(self.aux_file, 'rb') as aux:
+                f.write(aux.read())
+            os.replace(self.frozen_file, self.aux_file)
+            self.invalidate(self.aux_file)
+
+    def aux_segments(self):
+        # el congelado solo existe mientras hay una reconstruccion en segundo plano
+        return [self.frozen_file, self.aux_file] if self.frozen else [self.aux_file]
+
+    def aux_versions(self):
+        # (archivo, indice) de los auxiliares, del mas nuevo al mas viejo; el indice de cada uno
+        # apunta a la version vigente de cada ID
+        if self.frozen:
+            return [(self.aux_file, self.aux_index), (self.frozen_file, self.frozen_index)]
+        return [(self.aux_file, self.aux_index)]
+
+    def aux_bytes(self):
+        if not self.frozen:
+            return self.view(self.aux_file)
+        return b''.join(self.view(path) for path in self.aux_segments())
+
+    def close(self):
+        self.wait_rebuild()
+        if self.wal is not None:
+            self.checkpoint()
+            self.wal.close()
+        self.save_secondary()
+        if self.ranges is not None:
+            self.ranges.close([self.main_file, self.aux_file])
+        for view in self._maps.values():
+            if view:
+                view.close()
+        self._maps = {}
+
+    def view(self, path):
+        # lectura sin copias: el archivo completo mapeado en memoria
+        if path not in self._maps:
+            self._maps[path] = self.map_file(path)
+        return self._maps[path]
+
+    def map_file(self, path):
+        if os.path.getsize(path) == 0:
+            return b''
+        with open(path, 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def invalidate(self, path):
+        # no se cierra el mapa anterior: quien lo este leyendo conserva su copia
+        self._maps.pop(path, None)
+
     def is_full(self):
-        return os.path.getsize(self.aux_file) // self.record_size >= self.k
+        return self.aux_size // self.record_size >= self.k
     
     def insert(self, record):
+        self.log(WAL_INSERT, record.pack())
+        self.index_record(record)
+        self.append_aux(record)
+
+    def append_aux(self, record):
+        self.append_many([record])
+
+    def insert_many(self, records):
+        # todo el lote en un solo buffer y una sola escritura; a lo sumo una reconstruccion
+        batch = self.prepare_batch(records)
+        self.append_many(batch)
+        return len(batch)
+
+    def prepare_batch(self, records):
+        # ultima version de cada ID del lote, registrada en la bitacora e indexada
+        latest = {}
+        for record in records:
+            latest.pop(record.Employee_ID, None)
+            latest[record.Employee_ID] = record
+        batch = list(latest.values())
+        for record in batch:
+            self.log(WAL_INSERT, record.pack())
+            self.index_record(record)
+        return batch
+
+    def append_many(self, batch):
+        if not batch:
+            return
         with open(self.aux_file, 'ab') as f:
-            f.write(record.pack())
+            f.write(b''.join(record.pack() for record in batch))
+        self.invalidate(self.aux_file)
+        for record in batch:
+            self.aux_index[record.Employee_ID] = self.aux_size
+            self.aux_size += self.record_size
+        self.maybe_rebuild()
+
+    def rebuild_due(self):
         if self.is_full():
+            return True
+        if (self.rebuild_seconds is not None and self.aux_size
+                and time.monotonic() - self.last_rebuild >= self.rebuild_seconds):
+            return True
+        return (self.tombstone_ratio is not None and self.tombstones > 0
+                and self.tombstones >= self.tombstone_ratio * len(self.view(self.main_file)) // self.record_size)
+
+    def maybe_rebuild(self):
+        # despues de cada escritura: instala una mezcla terminada y, si la politica lo pide,
+        # reconstruye (en primer plano) o congela el auxiliar y lanza la mezcla en segundo plano
+        if self.rebuild_thread is not None and not self.rebuild_thread.is_alive():
+            self.wait_rebuild()
+        if self.replaying or not self.rebuild_due():
+            return
+        if not self.background:
             self.reconstruct_main_file()
+        elif self.rebuild_thread is None:
+            self.start_rebuild()
+
+    def start_rebuild(self):
+        # el auxiliar pasa a ser el segmento congelado y las inserciones siguen en uno nuevo;
+        # si una mezcla anterior fallo, se reintenta con el mismo congelado
+        if not self.frozen:
+            os.replace(self.aux_file, self.frozen_file)
+            self.invalidate(self.frozen_file)
+            self.frozen_index = self.aux_index
+            self.clear_aux()
+            if self.wal is not None:
+                fsync_directory(self.aux_file)
+            self.frozen = True
+            self.pending_removes = set()
+        self.rebuild_thread = threading.Thread(target=self.background_merge, daemon=True)
+        self.rebuild_thread.start()
+
+    def background_merge(self):
+        # en el hilo de fondo: solo se leen el principal y el congelado, que no cambian salvo por
+        # las marcas de eliminacion, y esas se vuelven a aplicar al instalar
+        directory = os.path.dirname(os.path.abspath(self.main_file))
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix='.main-', suffix='.tmp', dir=directory)
+            with os.fdopen(fd, 'wb') as f:
+                self.write_records(f, self.merged_records(self.frozen_file))
+                if self.wal is not None:
+                    # el fsync del temporal completo se paga aqui y no en la escritura que lo instala
+                    f.flush()
+                    os.fsync(f.fileno())
+            self.rebuild_result = tmp_path
+        except BaseException as e:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            self.rebuild_error = e
+
+    def wait_rebuild(self):
+        # espera la mezcla en segundo plano, si hay una, y la instala
+        if self.rebuild_thread is None:
+            return False
+        self.rebuild_thread.join()
+        self.rebuild_thread = None
+        if self.rebuild_error is not None:
+            error, self.rebuild_error = self.rebuild_error, None
+            raise error
+        tmp_path, self.rebuild_result = self.rebuild_result, None
+        self.install_background(tmp_path)
+        return True
+
+    def install_background(self, tmp_path):
+        # corre dentro de la escritura que encuentra la mezcla terminada: solo trabajo proporcional
+        # a lo eliminado durante la mezcla y al auxiliar activo, nada que dependa del principal.
+        # Las eliminaciones hechas durante la mezcla se marcan en el temporal antes del rename
+        offsets = []
+        if self.pending_removes and os.path.getsize(tmp_path) > 0:
+            with open(tmp_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                for employee_id in sorted(self.pending_removes):
+                    i = self.find_main(employee_id, view)
+                    if i != -1:
+                        offsets.append(i * self.record_size)
+            self.mark_deleted(tmp_path, offsets)
+        if self.wal is not None:
+            # el temporal ya se sincronizo en el hilo de fondo; quedan sus marcas y el auxiliar
+            # activo, que la marca declara durable hasta aux_size. El principal anterior se descarta
+            for path in ([tmp_path] if offsets else []) + [self.aux_file]:
+                with open(path, 'rb') as f:
+                    os.fsync(f.fileno())
+            self.wal.append(WAL_SWAP, CHECKPOINT.pack(self.aux_size) + os.path.basename(tmp_path).encode())
+            self.wal.commit()
+        os.replace(tmp_path, self.main_file)
+        if self.wal is not None:
+            fsync_directory(self.main_file)
+        self.invalidate(self.main_file)
+        os.unlink(self.frozen_file)
+        self.invalidate(self.frozen_file)
+        self.frozen = False
+        self.frozen_index = {}
+        self.pending_removes = set()
+        self.tombstones = len(offsets)
+        self.last_rebuild = time.monotonic()
+        self.checkpoint()
+        # el indice secundario guarda IDs, no offsets: la mezcla no lo cambia. No se reescribe
+        # aqui (seria O(n) en la escritura); se guarda al cerrar y, si al abrir no coincide con
+        # los datos, se reconstruye
+        print(f"Archivo principal '{self.main_file}' reconstruido en segundo plano.")
+
     def reconstruct_main_file(self):
-        records = []
-        
-        # Leer archivo principal si existe y no está vacío
-        if os.path.exists(self.main_file) and os.path.getsize(self.main_file) > 0:
-            with open(self.main_file, 'rb') as f:
-                while (data := f.read(self.record_size)):
-                    record = Record.unpack(data)
-                    if record.Employee_ID != -1:
-                        records.append(record)
-
-        # Leer archivo auxiliar si existe y no está vacío
-        if os.path.exists(self.aux_file) and os.path.getsize(self.aux_file) > 0:
-            with open(self.aux_file, 'rb') as f:
-                while (data := f.read(self.record_size)):
-                    record = Record.unpack(data)
-                    if record.Employee_ID != -1:
-                        records.append(record)
-                        
-        records.sort(key=lambda r: r.Employee_ID)
-
-        # Escribir registros ordenados al archivo principal
-        with open(self.main_file, 'wb') as f:
-            for record in records:
-                f.write(record.pack())
-                
-        print(f"Archivo principal '{self.main_file}' reconstruido con {len(records)} registros.")
+        # reconstruccion completa en primer plano; una mezcla en curso se termina antes
+        self.wait_rebuild()
+        count = self.write_main_file(self.merged_records(), allow_readers=True)
+        self.tombstones = 0
+        self.last_rebuild = time.monotonic()
+        print(f"Archivo principal '{self.main_file}' reconstruido con {count} registros.")
 
         # Limpiar archivo auxiliar
-        with open(self.aux_file, 'wb'):
-            pass
+        self.clear_aux()
+        self.checkpoint()
+        self.save_secondary()
 
         print(f"Archivo auxiliar '{self.aux_file}' limpiado.")
 
+    def merged_records(self, aux_file=None):
+        # solo se ordena el auxiliar (a lo sumo k registros); el principal ya
+        # esta ordenado y se mezcla en streaming. De un ID repetido queda la version del
+        # auxiliar sobre la del principal y, dentro del auxiliar, la escrita al final
+        aux_file = aux_file or self.aux_file
+        if np is not None:
+            return self.merge_blocks(aux_file)
+        aux_records = sorted(self.iter_live(aux_file), key=record_key)
+        return newest_versions(heapq.merge(self.iter_live(self.main_file), aux_records, key=record_key))
+
+    def merge_blocks(self, aux_file):
+        # mezcla vectorizada: cada bloque vivo del principal se combina con la parte
+        # del auxiliar cuyas llaves no superan la ultima llave del bloque
+        aux = self.scan(self.view(aux_file)).where().sort_by_id()
+        view = self.view(self.main_file)
+        step = BLOCK_RECORDS * self.record_size
+        for start in range(0, len(view), step):
+            block = self.scan(view[start:start + step]).where()
+            if len(block) == 0:
+                continue
+            head, aux = aux.split(int(block.ids()[-1]))
+            if len(head):
+                block = RecordBatch.concat([block, head]).sort_by_id().latest()
+            yield block.tobytes()
+        yield aux.latest().tobytes()
+
+    def filter(self, **ranges):
+        # filtro vectorizado por rangos inclusivos, p. ej. filter(Age=(30, 40), Salary=(None, 5e4));
+        # solo se construyen los Record que cumplen. Una version por ID, como en range_search
+        main = self.scan(self.view(self.main_file)).where(**ranges).without(self.aux_ids())
+        aux = self.aux_batch(**ranges)
+        return list(heapq.merge(self.decode(main), self.decode(aux), key=lambda r: r.Employee_ID))
+
+    def scan(self, data):
+        # bloque leido completo de un archivo mapeado; por aqui se cuentan los bytes leidos
+        return RecordBatch.from_bytes(data)
+
+    def decode(self, batch):
+        # Record de un bloque ya filtrado; por aqui se cuentan los registros decodificados
+        return batch.records()
+
+    def aux_ids(self):
+        # IDs cuya version vigente esta en un auxiliar: su fila del principal ya no cuenta
+        return self.aux_index.keys() | self.frozen_index.keys()
+
+    def aux_batch(self, **ranges):
+        # version vigente de cada ID de los auxiliares, ordenada por ID; el activo va despues del
+        # congelado y gana. Se filtra despues de elegir la version, no antes
+        return self.scan(self.aux_bytes()).where().sort_by_id().latest().where(**ranges)
+
+    def shards(self, count):
+        # tramos de bytes del principal que empiezan y terminan en limites de registro
+        unit = self.page_size or self.record_size
+        units = os.path.getsize(self.main_file) // unit
+        bounds = [units * i // count for i in range(count + 1)]
+        return [(bounds[i] * unit, bounds[i + 1] * unit) for i in range(count) if bounds[i] < bounds[i + 1]]
+
+    def parallel_filter(self, workers=None, predicate=None, executor=None, **ranges):
+        # filter() repartido en procesos: cada uno mapea su tramo del principal y filtra por
+        # rangos inclusivos (Employee_ID incluido) y, si se da, por predicate(record), que debe
+        # ser serializable (funcion a nivel de modulo). Los tramos llegan en orden de llave
+        workers = workers or os.cpu_count() or 1
+        shards = self.shards(workers)
+        main = []
+        if shards:
+            # como en filter(): una version por ID, la del auxiliar reemplaza a la del principal
+            data = self.read_shards(shards, ranges, predicate, workers, executor)
+            main = self.decode(RecordBatch.from_bytes(data).without(self.aux_ids()))
+
+        aux = self.decode(self.aux_batch(**ranges))
+        if predicate is not None:
+            aux = (record for record in aux if predicate(record))
+        return list(heapq.merge(main, aux, key=lambda r: r.Employee_ID))
+
+    def read_shards(self, shards, ranges, predicate, workers, executor=None):
+        # registros que cumplen de cada tramo, leidos y filtrados en otros procesos
+        starts = [start for start, _ in shards]
+        stops = [stop for _, stop in shards]
+        args = (scan_shard, repeat(self.main_file), starts, stops, repeat(ranges), repeat(predicate),
+                repeat(self.page_size), repeat(self.page_header))
+        if executor is not None:
+            return b''.join(executor.map(*args))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return b''.join(pool.map(*args))
+
+    def iter_raw(self, path):
+        # registros empaquetados leidos por bloques
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as f:
+            while (block := f.read(self.record_size * BLOCK_RECORDS)):
+                yield from self.block_records(block)
+
+    def block_records(self, block):
+        # registros de un bloque leido con read(); por aqui se cuentan los bytes leidos
+        return [block[i:i + self.record_size] for i in range(0, len(block) - self.record_size + 1, self.record_size)]
+
+    def iter_live(self, path):
+        # omite los registros marcados como eliminados (-1)
+        return (data for data in self.iter_raw(path) if record_key(data) != -1)
+
+    def write_main_file(self, sorted_records, allow_readers=False):
+        # escribe en un archivo temporal y lo reemplaza de forma atomica. En modo concurrente,
+        # con allow_readers los lectores siguen usando el principal anterior mientras se escribe
+        # el temporal; solo el reemplazo es exclusivo
+        directory = os.path.dirname(os.path.abspath(self.main_file))
+        fd, tmp_path = tempfile.mkstemp(prefix='.main-', suffix='.tmp', dir=directory)
+        readers = self.lock.downgraded() if allow_readers and self.lock is not None else nullcontext()
+        try:
+            with readers, os.fdopen(fd, 'wb') as f:
+                count = self.write_records(f, sorted_records)
+                if self.wal is not None:
+                    f.flush()
+                    os.fsync(f.fileno())
+            self.install_main(tmp_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return count
+
+    def write_records(self, f, sorted_records):
+        # cada elemento es uno o mas registros empaquetados y consecutivos
+        written = 0
+        block = []
+        pending = 0
+        for data in sorted_records:
+            block.append(data)
+            pending += len(data)
+            if pending >= BLOCK_RECORDS * self.record_size:
+                f.write(b''.join(block))
+                written += pending
+                block = []
+                pending = 0
+        f.write(b''.join(block))
+        written += pending
+        return written // self.record_size
+
+    def install_main(self, tmp_path):
+        # con bitacora, la marca con el temporal es durable antes del rename: si se cae
+        # despues, al abrir se sabe que el principal ya incluye al auxiliar
+        if self.wal is not None:
+            self.wal.append(WAL_REBUILD, os.path.basename(tmp_path).encode())
+            self.wal.commit()
+        os.replace(tmp_path, self.main_file)
+        if self.wal is not None:
+            fsync_directory(self.main_file)
+        self.invalidate(self.main_file)
+
+    def bulk_load(self, source, run_size=RUN_SIZE):
+        self.wait_rebuild()
+        if isinstance(source, str):
+            source = read_csv_records(source)
+
+        # corridas ordenadas: en memoria mientras quepan, en disco si no
+        runs = []
+        buffer = list(self.iter_live(self.aux_file))
+        try:
+            for item in source:
+                # Record o bloque de registros ya empaquetados (ver lab2_ingest)
+                if isinstance(item, Record):
+                    if self.secondary is not None:
+                        self.secondary.add(item)
+                    buffer.append(item.pack())
+                else:
+                    for i in range(0, len(item) - self.record_size + 1, self.record_size):
+                        data = bytes(item[i:i + self.record_size])
+                        if self.secondary is not None:
+                            self.secondary.add(self.unpack(data))
+                        buffer.append(data)
+                if len(buffer) >= run_size:
+                    runs.append(self._write_run(buffer))
+                    buffer = []
+            buffer.sort(key=record_key)
+
+            # mezcla de las corridas con el archivo principal (ya ordenado). Las fuentes van de la
+            # mas vieja a la mas nueva, asi de un ID repetido queda la ultima version cargada
+            sources = [self.iter_live(self.main_file)]
+            sources.extend(self.iter_raw(run) for run in runs)
+            sources.append(buffer)
+            count = self.write_main_file(newest_versions(heapq.merge(*sources, key=record_key)))
+        finally:
+            for run in runs:
+                os.unlink(run)
+
+        self.clear_aux()
+        self.checkpoint()
+        self.save_secondary()
+        if self.ranges is not None:
+            self.rebuild_ranges()
+
+        print(f"Archivo principal '{self.main_file}' cargado con {count} registros.")
+        return count
+
+    def _write_run(self, buffer):
+        buffer.sort(key=record_key)
+        directory = os.path.dirname(os.path.abspath(self.main_file))
+        fd, run_path = tempfile.mkstemp(prefix='.run-', suffix='.tmp', dir=directory)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b''.join(buffer))
+        return run_path
+
     def search(self, employee_id): # secuencial
-        for file in [self.main_file, self.aux_file]:
-            with open(file, 'rb') as f:
-                while (data := f.read(self.record_size)):
-                    record = Record.unpack(data)
-                    if record.Employee_ID == employee_id and record.Employee_ID != -1:
-                        return record
+        if employee_id == -1:
+            return None
+        # del auxiliar mas nuevo al principal, como get: en un auxiliar solo cuenta la version
+        # que marca su indice
+        for file, index in self.aux_versions() + [(self.main_file, None)]:
+            view = self.view(file)
+            # se comparan solo las llaves; el registro se decodifica al encontrarlo
+            for i, (key,) in enumerate(KEY_SCAN.iter_unpack(view)):
+                if key == employee_id and (index is None or index.get(key) == i * self.record_size):
+                    return self.unpack(view, i * self.record_size)
         return None
-    
+
+    def key_at(self, view, i):
+        return KEY.unpack_from(view, i * self.record_size)[0]
+
+    def find_main(self, employee_id, view=None):
+        # busqueda binaria en el principal (o en view); los eliminados (-1) rompen el orden,
+        # asi que desde mid se avanza al primer registro vivo
+        if view is None:
+            view = self.view(self.main_file)
+        low = 0
+        high = len(view) // self.record_size - 1
+        while low <= high:
+            mid = (low + high) // 2
+            i = mid
+            while i <= high and (key := self.key_at(view, i)) == -1:
+                i += 1
+            if i > high:
+                high = mid - 1
+            elif key == employee_id:
+                return i
+            elif key < employee_id:
+                low = i + 1
+            else:
+                high = mid - 1
+        return -1
+
     def binary_search(self, employee_id):
-        with open(self.main_file, 'rb') as f:
-            low = 0
-            high = os.path.getsize(self.main_file) // self.record_size - 1
-            while low <= high:
-                mid = (low + high) // 2
-                f.seek(mid * self.record_size)
-                data = f.read(self.record_size)
-                record = Record.unpack(data)
-                if record.Employee_ID == employee_id and record.Employee_ID != -1:
-                    return record
-                elif record.Employee_ID < employee_id:
-                    low = mid + 1
-                else:
-                    high = mid - 1
-        return None
-    
+        if employee_id == -1:
+            return None
+        i = self.find_main(employee_id)
+        if i == -1:
+            return None
+        return self.unpack(self.view(self.main_file), i * self.record_size)
+
+    def mark_deleted(self, file, offsets):
+        # solo se sobrescriben los 4 bytes de la llave, con un unico open
+        if not offsets:
+            return
+        with open(file, 'r+b') as f:
+            for offset in offsets:
+                f.seek(offset)
+                f.write(KEY.pack(-1))
+
+    def drop_aux(self, path, index, ids):
+        # se marcan todas las copias de esos IDs en el auxiliar, no solo la vigente: una version
+        # anterior que quedara viva volveria a aparecer al releer el archivo. El indice se
+        # actualiza sin recorrerlo de nuevo
+        if not ids:
+            return
+        view = self.view(path)
+        self.mark_deleted(path, [i * self.record_size for i, (key,) in enumerate(KEY_SCAN.iter_unpack(view))
+                                 if key in ids])
+        for employee_id in ids:
+            del index[employee_id]
+
     def remove(self, employee_id):
-        found = False
-        for file in [self.main_file, self.aux_file]:
-            with open(file, 'r+b') as f:
-                while (data := f.tell())< os.path.getsize(file):
-                    record_data = f.read(self.record_size)
-                    record = Record.unpack(record_data)
-                    if record.Employee_ID == employee_id and record.Employee_ID != -1:
-                        record.Employee_ID = -1
-                        f.seek(data)
-                        f.write(record.pack())
-                        found = True
-                        break
+        return self.remove_many([employee_id]) == 1
+
+    def remove_many(self, ids):
+        # ids ordenados: cada busqueda en el principal arranca donde termino la anterior
+        ids = sorted(set(ids))
+        self.log(WAL_REMOVE, b''.join(KEY.pack(employee_id) for employee_id in ids))
+        view = self.view(self.main_file)
+        n = len(view) // self.record_size
+        main_offsets = []
+        aux_ids = set()
+        frozen_ids = set()
+        removed = set()
+        i = 0
+        for employee_id in ids:
+            if employee_id == -1:
+                continue
+            i = self.lower_bound(employee_id, i)
+            while i < n and self.key_at(view, i) == -1:
+                i += 1
+            if i < n and self.key_at(view, i) == employee_id:
+                main_offsets.append(i * self.record_size)
+                removed.add(employee_id)
+            if employee_id in self.aux_index:
+                aux_ids.add(employee_id)
+                removed.add(employee_id)
+            if employee_id in self.frozen_index:
+                frozen_ids.add(employee_id)
+                removed.add(employee_id)
+        self.unindex(removed)
+        if main_offsets:
+            # el principal se modifica en su lugar: primero la bitacora
+            self.commit()
+        self.mark_deleted(self.main_file, main_offsets)
+        self.drop_aux(self.aux_file, self.aux_index, aux_ids)
+        if self.frozen:
+            # la mezcla puede haber copiado ya estos registros: se vuelven a marcar al instalarla
+            self.drop_aux(self.frozen_file, self.frozen_index, frozen_ids)
+            self.pending_removes.update(removed)
+        self.tombstones += len(main_offsets)
+        if main_offsets and self.tombstone_ratio is not None:
+            self.maybe_rebuild()
+        return len(removed)
+
+    def unindex(self, ids):
+        # se llama antes de marcar los registros: el indice de rangos necesita sus valores
+        for employee_id in ids:
+            if self.ranges is not None:
+                self.ranges.discard(self.get(employee_id))
+            if self.secondary is not None:
+                self.secondary.discard(employee_id)
+
+    def find_by(self, **equals):
+        # consulta de igualdad compuesta, p. ej. find_by(Department='Sales', Country='Peru');
+        # los IDs salen de la interseccion de los indices secundarios, en orden
+        if self.secondary is None:
+            raise ValueError("sequentialFile abierto sin secondary_fields.")
+        records = (self.get(employee_id) for employee_id in self.secondary.query(**equals))
+        return [record for record in records if record is not None]
+
+    def range_by(self, field, low=None, high=None):
+        # rango inclusivo sobre Salary, Age o Joining_Date ('d/mm/yyyy' o 'yyyy-mm-dd'),
+        # en orden del campo: O(log n + k) con el arbol B+
+        if self.ranges is None:
+            raise ValueError("sequentialFile abierto sin range_fields.")
+        records = (self.get(employee_id) for employee_id in self.ranges.range(field, low, high))
+        return [record for record in records if record is not None]
+
+    def get(self, employee_id):
+        # primero el auxiliar (hash en memoria), luego busqueda binaria en el principal
+        offset = self.aux_index.get(employee_id)
+        if offset is not None:
+            return self.unpack(self.view(self.aux_file), offset)
+        if self.frozen_index:
+            offset = self.frozen_index.get(employee_id)
+            if offset is not None:
+                return self.unpack(self.view(self.frozen_file), offset)
+        return self.binary_search(employee_id)
+
+    def get_many(self, ids):
+        # busqueda puntual por lotes, en el orden de ids (None si no esta). Las llaves que no estan
+        # en los auxiliares se buscan ordenadas en el principal, en una sola pasada
+        found = {}
+        main_ids = []
+        for employee_id in sorted(set(ids)):
+            offset = self.aux_index.get(employee_id)
+            if offset is not None:
+                found[employee_id] = self.unpack(self.view(self.aux_file), offset)
+            elif employee_id in self.frozen_index:
+                found[employee_id] = self.unpack(self.view(self.frozen_file), self.frozen_index[employee_id])
+            elif employee_id != -1:
+                main_ids.append(employee_id)
+        found.update(self.probe_main(main_ids))
+        return [found.get(employee_id) for employee_id in ids]
+
+    def probe_main(self, ids):
+        # ids ordenados: cada busqueda binaria arranca donde termino la anterior
+        view = self.view(self.main_file)
+        n = len(view) // self.record_size
+        found = {}
+        i = 0
+        for employee_id in ids:
+            i = self.lower_bound(employee_id, i)
+            while i < n and self.key_at(view, i) == -1:
+                i += 1
+            if i < n and self.key_at(view, i) == employee_id:
+                found[employee_id] = self.unpack(view, i * self.record_size)
         return found
-    
+
+    def lower_bound(self, employee_id, low=0):
+        # primera posicion del principal cuya llave viva es >= employee_id
+        view = self.view(self.main_file)
+        high = len(view) // self.record_size
+        while low < high:
+            mid = (low + high) // 2
+            i = mid
+            while i < high and (key := self.key_at(view, i)) == -1:
+                i += 1
+            if i < high and key < employee_id:
+                low = i + 1
+            else:
+                high = mid
+        return low
+
     def range_search(self, start_id, end_id):
-        results = []
-        for file in [self.main_file, self.aux_file]:
-            with open(file, 'rb') as f:
-                while (data := f.read(self.record_size)):
-                    record = Record.unpack(data)
-                    if start_id <= record.Employee_ID <= end_id and record.Employee_ID != -1:
-                        results.append(record)
-        results.sort(key=lambda r: r.Employee_ID)
-        return results
+        # auxiliar: a lo sumo k registros por segmento, recorrido lineal; una version por ID
+        aux_results = self.aux_range(start_id, end_id)
+        found = {record.Employee_ID for record in aux_results}
+
+        # principal: busqueda binaria del inicio y lectura del tramo contiguo
+        view = self.view(self.main_file)
+        first = self.lower_bound(start_id)
+        main_results = []
+        for i, (key,) in enumerate(KEY_SCAN.iter_unpack(memoryview(view)[first * self.record_size:]), first):
+            if key > end_id:
+                break
+            if key != -1 and key not in found:
+                main_results.append(self.unpack(view, i * self.record_size))
+        if not aux_results:
+            return main_results
+        return list(heapq.merge(main_results, aux_results, key=lambda r: r.Employee_ID))
+
+    def aux_range(self, start_id, end_id):
+        # version vigente de cada ID del rango en los auxiliares (la que marca su indice), ordenadas
+        results = {}
+        for path, index in self.aux_versions():
+            view = self.view(path)
+            for i, (key,) in enumerate(KEY_SCAN.iter_unpack(view)):
+                if (start_id <= key <= end_id and key not in results
+                        and index.get(key) == i * self.record_size):
+                    results[key] = self.unpack(view, i * self.record_size)
+        return [results[key] for key in sorted(results)]
 
 def main():
     sf = sequentialFile()
@@ -181,31 +937,14 @@ def main():
     print("Cargando datos desde employee.csv...")
 
     def insertar_datos():
-        with open('employee.csv', 'r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile, delimiter=';')
-            rows = list(reader)
-            print(f"Total de filas en CSV: {len(rows)}")
-            
-            # Limitar a 1000 registros para pruebas iniciales
-            rows = rows[:1000]
-            print(f"Procesando {len(rows)} registros...")
-            
-            for i, row in enumerate(rows):
-                if i % 100 == 0:  # Mostrar progreso cada 100 registros
-                    print(f"Procesando registro {i+1}/{len(rows)}")
-                    
-                record = Record(
-                    Employee_ID=int(row['Employee_ID']),
-                    Employee_Name=row['Employee_Name'],
-                    Age=int(row['Age']),
-                    Country=row['Country'],
-                    Department=row['Department'],
-                    Position=row['Position'],
-                    Salary=float(row['Salary']),
-                    Joining_Date=row['Joining_Date']
-                )
-                sf.insert(record)
-                all_ids.append(record.Employee_ID)
+        # Limitar a 1000 registros para pruebas iniciales; se leen solo esas filas del csv
+        records = list(islice(read_csv_records('employee.csv'), 1000))
+        print(f"Procesando {len(records)} registros...")
+
+        # un solo lote: una escritura y a lo sumo una reconstruccion
+        sf.insert_many(records)
+        all_ids.extend(record.Employee_ID for record in records)
+
     _, insert_time = time_execution(insertar_datos)
     print(f"Datos insertados en {insert_time:.6f} segundos.")
     print(f"Total de registros insertados: {len(all_ids)}")
@@ -215,6 +954,11 @@ def main():
     _, search_time = time_execution(lambda: [sf.search(eid) for eid in search_ids])
     print(f"Búsquedas completadas en {search_time:.6f} segundos.")
 
+    print("\nRealizando búsquedas con get (auxiliar + binaria)...")
+    search_ids = random.sample(all_ids, min(10, len(all_ids)))
+    _, get_time = time_execution(lambda: [sf.get(eid) for eid in search_ids])
+    print(f"Búsquedas con get completadas en {get_time:.6f} segundos.")
+
     print("\nRealizando búsquedas binarias...")
     search_ids = random.sample(all_ids, min(10, len(all_ids)))
     _, binary_time = time_execution(lambda: [sf.binary_search(eid) for eid in search_ids])
@@ -0,0 +1,268 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from lab2_record import Record, FIELDS
+from lab2_sequential import sequentialFile
+from lab2_avl import AVLFile
+from lab2_stats import Histogram
+
+# servicio local sobre los motores: una peticion JSON por linea sobre TCP, p. ej.
+#   {"id": 1, "op": "get", "key": 42}
+#   {"id": 2, "op": "range", "low": 10, "high": 20}
+#   {"id": 3, "op": "insert", "record": {"Employee_ID": 7, "Employee_Name": "Ana", ...}}
+#   {"id": 4, "op": "delete", "key": 42}
+# y una respuesta por linea con el mismo id: {"id": 1, "ok": true, "result": ...} o
+# {"id": 1, "ok": false, "error": "..."}. Las respuestas de una conexion pueden llegar en
+# otro orden que las peticiones
+HOST = '127.0.0.1'
+PORT = 8642
+ENGINE_METHODS = {
+    # motor: (busqueda por rango, insercion, eliminacion)
+    'sequential': ('range_search', 'insert', 'remove'),
+    'avl': ('range_search', 'insert', 'delete'),
+}
+MIX = {'get': 90, 'range': 5, 'insert': 5, 'delete': 0}  # pesos del generador de carga
+RANGE_WIDTH = 20
+
+def record_to_json(record):
+    if record is None:
+        return None
+    return {name: getattr(record, name) for name, _ in FIELDS}
+
+def open_engine(name, workers=1, background=False):
+    # con mas de un hilo el motor se abre en modo concurrente: lectores en paralelo y un escritor en
+    # el secuencial; el AVL solo queda seguro entre hilos y sus lecturas se serializan.
+    # background solo aplica al secuencial: la reconstruccion no frena a la insercion que la dispara
+    concurrent = workers > 1
+    if name == 'sequential':
+        return sequentialFile(concurrent=concurrent, background=background)
+    return AVLFile(concurrent=concurrent)
+
+class QueryServer:
+    def __init__(self, engine, engine_name, workers=1):
+        if workers > 1 and engine.lock is None:
+            raise ValueError("Con mas de un hilo el motor debe abrirse con concurrent=True.")
+        self.engine = engine
+        self.range_method, self.insert_method, self.delete_method = ENGINE_METHODS[engine_name]
+        # la E/S de los motores es bloqueante: corre en hilos y el loop solo atiende sockets
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.pending = []  # (Employee_ID, future) de los get que esperan lote
+        self.in_flight = False
+        self.batches = 0
+        self.batched = 0
+        self.server = None
+
+    async def start(self, host=HOST, port=PORT):
+        # port=0 elige un puerto libre; se devuelve el puerto real
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.executor.shutdown(wait=True)
+
+    async def handle(self, reader, writer):
+        # cada linea se atiende en su propia tarea, asi los get de una conexion con peticiones
+        # en cola tambien se juntan en el mismo lote
+        tasks = set()
+        try:
+            while (line := await reader.readline()):
+                task = asyncio.ensure_future(self.respond(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, line, writer):
+        request = {}
+        try:
+            request = json.loads(line)
+            response = {'id': request.get('id'), 'ok': True, 'result': await self.execute(request)}
+        except Exception as e:
+            response = {'id': request.get('id') if isinstance(request, dict) else None, 'ok': False,
+                        'error': f'{type(e).__name__}: {e}'}
+        if not writer.is_closing():
+            writer.write(json.dumps(response).encode() + b'\n')
+
+    async def execute(self, request):
+        op = request.get('op')
+        if op == 'get':
+            return record_to_json(await self.get(int(request['key'])))
+        if op == 'range':
+            range_search = getattr(self.engine, self.range_method)
+            records = await self.run(range_search, int(request['low']), int(request['high']))
+            return [record_to_json(record) for record in records]
+        if op == 'insert':
+            await self.run(getattr(self.engine, self.insert_method), Record.from_row(request['record']))
+            return None
+        if op == 'delete':
+            return await self.run(getattr(self.engine, self.delete_method), int(request['key']))
+        if op == 'stats':
+            return {'batches': self.batches, 'batched_gets': self.batched}
+        raise ValueError(f"Operacion desconocida: {op}")
+
+    def run(self, method, *args):
+        return asyncio.get_running_loop().run_in_executor(self.executor, method, *args)
+
+    def get(self, employee_id):
+        # los get que llegan en el mismo ciclo del loop, o mientras corre el lote anterior, se
+        # resuelven con un solo get_many: llaves ordenadas y una sola pasada por el motor
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self.pending and not self.in_flight:
+            loop.call_soon(self.flush)
+        self.pending.append((employee_id, future))
+        return future
+
+    def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        self.in_flight = True
+        self.batches += 1
+        self.batched += len(batch)
+        probe = self.run(self.engine.get_many, [employee_id for employee_id, _ in batch])
+        probe.add_done_callback(lambda done: self.resolve(batch, done))
+
+    def resolve(self, batch, done):
+        self.in_flight = False
+        error = done.exception()
+        results = [None] * len(batch) if error is not None else done.result()
+        for (_, future), record in zip(batch, results):
+            if future.done():
+                continue  # la conexion se cerro
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(record)
+        self.flush()
+
+async def serve(engine_name, host=HOST, port=PORT, workers=1, background=False):
+    engine = open_engine(engine_name, workers, background)
+    server = QueryServer(engine, engine_name, workers)
+    port = await server.start(host, port)
+    print(f"Sirviendo '{engine_name}' en {host}:{port} con {workers} hilo(s) de E/S.")
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.stop()
+        engine.close()
+
+def make_request(rng, mix, key_space, next_id):
+    op = rng.choices(list(mix), weights=list(mix.values()))[0]
+    if op == 'get':
+        return {'op': 'get', 'key': rng.randint(1, key_space)}
+    if op == 'range':
+        low = rng.randint(1, key_space)
+        return {'op': 'range', 'low': low, 'high': low + RANGE_WIDTH - 1}
+    if op == 'delete':
+        return {'op': 'delete', 'key': rng.randint(1, key_space)}
+    employee_id = next_id()
+    record = {'Employee_ID': employee_id, 'Employee_Name': f'Name{employee_id}', 'Age': 30, 'Country': 'Peru',
+              'Department': 'Dep', 'Position': 'Pos', 'Salary': 30000.0, 'Joining_Date': '2020-01-01'}
+    return {'op': 'insert', 'record': record}
+
+async def load_client(host=HOST, port=PORT, connections=16, requests=10000, key_space=1000, mix=None, seed=42):
+    # lazo cerrado: cada conexion manda una peticion y espera su respuesta antes de la siguiente,
+    # asi la concurrencia la fija connections. Latencias en nanosegundos en un Histogram
+    mix = mix or MIX
+    hist = Histogram()
+    errors = [0]
+    inserted = [0]
+
+    def next_id():
+        inserted[0] += 1
+        return key_space + inserted[0]
+
+    async def connection(c):
+        rng = random.Random(seed + c)
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for n in range(requests // connections + (c < requests % connections)):
+                request = make_request(rng, mix, key_space, next_id)
+                request['id'] = n
+                t0 = time.perf_counter_ns()
+                writer.write(json.dumps(request).encode() + b'\n')
+                await writer.drain()
+                response = json.loads(await reader.readline())
+                hist.record(time.perf_counter_ns() - t0)
+                if not response['ok']:
+                    errors[0] += 1
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(connection(c) for c in range(connections)))
+    elapsed = time.perf_counter() - t0
+    summary = hist.summary()
+    summary['seconds'] = elapsed
+    summary['qps'] = summary['count'] / elapsed if elapsed else 0.0
+    summary['errors'] = errors[0]
+    return summary
+
+async def server_stats(host=HOST, port=PORT):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b'{"op": "stats"}\n')
+    response = json.loads(await reader.readline())
+    writer.close()
+    await writer.wait_closed()
+    return response['result']
+
+def parse_mix(text):
+    # 'get=90,range=5,insert=5'
+    mix = {op: 0 for op in MIX}
+    for item in text.split(','):
+        op, weight = item.split('=')
+        if op not in mix:
+            raise ValueError(f"Operacion desconocida en la mezcla: {op}")
+        mix[op] = float(weight)
+    return mix
+
+def main():
+    parser = argparse.ArgumentParser(description='Servicio de consultas sobre los motores y generador de carga')
+    sub = parser.add_subparsers(dest='command', required=True)
+    server = sub.add_parser('serve', help='atiende get, range, insert y delete en JSON por linea')
+    server.add_argument('--engine', choices=list(ENGINE_METHODS), default='sequential')
+    server.add_argument('--host', default=HOST)
+    server.add_argument('--port', type=int, default=PORT)
+    server.add_argument('--workers', type=int, default=1, help='hilos de E/S; con mas de uno, modo concurrente')
+    server.add_argument('--background', action='store_true', help='reconstruccion del secuencial en segundo plano')
+    load = sub.add_parser('load', help='genera carga contra un servidor y reporta op/s y percentiles')
+    load.add_argument('--host', default=HOST)
+    load.add_argument('--port', type=int, default=PORT)
+    load.add_argument('--connections', type=int, default=16)
+    load.add_argument('--requests', type=int, default=10000)
+    load.add_argument('--keys', type=int, default=1000, help='las llaves de get, range y delete salen de 1..keys')
+    load.add_argument('--mix', type=parse_mix, default=MIX, help="pesos, p. ej. 'get=90,range=5,insert=5'")
+    load.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        try:
+            asyncio.run(serve(args.engine, args.host, args.port, args.workers, args.background))
+        except KeyboardInterrupt:
+            pass
+    elif args.command == 'load':
+        summary = asyncio.run(load_client(args.host, args.port, args.connections, args.requests, args.keys,
+                                          args.mix, args.seed))
+        stats = asyncio.run(server_stats(args.host, args.port))
+        print(f"{summary['count']} peticiones en {summary['seconds']:.2f} s: {summary['qps']:,.0f} op/s, "
+              f"{summary['errors']} errores")
+        print("Latencia (us): " + "  ".join(f"{name} {summary[name] / 1000:,.1f}"
+                                            for name in ('p50', 'p90', 'p99', 'p99.9', 'max')))
+        if stats['batches']:
+            print(f"Lotes de get en el servidor: {stats['batches']} "
+                  f"({stats['batched_gets'] / stats['batches']:.1f} get por lote)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import math
+import mmap
+import os
+import time
+from collections import defaultdict
+
+# estadisticas opcionales de los motores. Con stats=False no se envuelve nada y los metodos
+# son los de la clase; con stats=True instrument() reemplaza en la instancia las operaciones
+# por versiones medidas y agrega contadores a los metodos de E/S
+SUB_BITS = 5  # 32 subcubetas lineales por potencia de dos: error relativo < 1/32
+REPORTED = (50, 90, 99, 99.9)
+
+class Histogram:
+    # tipo HDR: cubetas log-lineales en un dict disperso (limite inferior -> cantidad)
+    def __init__(self, sub_bits=SUB_BITS):
+        self.sub_bits = sub_bits
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def shift(self, value):
+        return max(0, value.bit_length() - self.sub_bits - 1)
+
+    def record(self, value):
+        low = value >> self.shift(value) << self.shift(value)
+        self.counts[low] = self.counts.get(low, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, q):
+        # mayor valor equivalente de la cubeta que contiene el percentil q
+        if not self.count:
+            return 0
+        target = max(1, math.ceil(q / 100 * self.count))
+        seen = 0
+        for low in sorted(self.counts):
+            seen += self.counts[low]
+            if seen >= target:
+                return min(low + (1 << self.shift(low)) - 1, self.max)
+        return self.max
+
+    def summary(self):
+        result = {'count': self.count, 'mean': self.total / self.count if self.count else 0.0,
+                  'min': self.min or 0, 'max': self.max}
+        for q in REPORTED:
+            result[f'p{q:g}'] = self.percentile(q)
+        return result
+
+class EngineStats:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counters = defaultdict(int)
+        self.latency = defaultdict(Histogram)  # operacion -> nanosegundos
+
+    def snapshot(self):
+        return {'counters': dict(sorted(self.counters.items())),
+                'latency_ns': {op: hist.summary() for op, hist in sorted(self.latency.items())}}
+
+def timed(stats, name, method):
+    def wrapper(*args, **kwargs):
+        t0 = time.perf_counter_ns()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            stats.latency[name].record(time.perf_counter_ns() - t0)
+            stats.counters['ops.' + name] += 1
+    return wrapper
+
+def counted(stats, engine, hook, method):
+    # el gancho ve los argumentos antes de la llamada (p. ej. si la cache ya tiene la posicion)
+    def wrapper(*args, **kwargs):
+        hook(stats, engine, *args)
+        return method(*args, **kwargs)
+    return wrapper
+
+def instrument(engine, ops, hooks):
+    # hooks: 'metodo' o 'atributo.metodo' -> gancho(stats, engine, *args)
+    stats = EngineStats()
+    for name, hook in hooks.items():
+        owner = engine
+        if '.' in name:
+            attr, name = name.split('.')
+            owner = getattr(engine, attr)
+        setattr(owner, name, counted(stats, engine, hook, getattr(owner, name)))
+    for name in ops:
+        setattr(engine, name, timed(stats, name, getattr(engine, name)))
+    return stats
+
+# ganchos de los archivos secuenciales. bytes_read cuenta los registros que una operacion lee
+# completos: decodificados uno a uno del archivo mapeado, leidos por bloques o en paginas;
+# mapear un archivo no cuenta como leerlo
+def on_decode(stats, engine, *args):
+    stats.counters['records_decoded'] += 1
+    if args and isinstance(args[0], mmap.mmap):
+        stats.counters['bytes_read'] += engine.record_size
+
+def on_decode_batch(stats, engine, batch):
+    stats.counters['records_decoded'] += len(batch)
+
+def on_scan(stats, engine, data):
+    stats.counters['bytes_read'] += len(data)
+
+def on_read_shards(stats, engine, shards, *args):
+    stats.counters['bytes_read'] += sum(stop - start for start, stop in shards)
+
+def on_map_file(stats, engine, path):
+    stats.counters['file_opens'] += 1
+
+def on_append(stats, engine, batch):
+    if batch:
+        stats.counters['file_opens'] += 1
+        stats.counters['bytes_written'] += len(batch) * engine.record_size
+
+def on_mark_deleted(stats, engine, file, offsets):
+    stats.counters['file_opens'] += 1
+    stats.counters['bytes_written'] += 4 * len(offsets)
+
+def on_write_run(stats, engine, buffer):
+    stats.counters['file_opens'] += 1
+    stats.counters['bytes_written'] += len(buffer) * engine.record_size
+
+def on_install_main(stats, engine, tmp_path):
+    stats.counters['file_opens'] += 1
+    stats.counters['bytes_written'] += os.path.getsize(tmp_path)
+
+def on_rebuild(stats, engine, *args):
+    stats.counters['rebuilds'] += 1
+
+def on_read_page(stats, engine, page):
+    stats.counters['pages_read'] += 1
+    stats.counters['bytes_read'] += engine.page_size
+
+def on_write_page(stats, engine, page, records):
+    stats.counters['pages_written'] += 1
+    stats.counters['bytes_written'] += engine.page_size
+
+SEQUENTIAL_OPS = ('insert', 'insert_many', 'search', 'get', 'get_many', 'binary_search', 'range_search',
+                  'remove', 'remove_many', 'filter', 'parallel_filter', 'find_by', 'range_by', 'bulk_load',
+                  'reconstruct_main_file')
+SEQUENTIAL_HOOKS = {
+    'unpack': on_decode,
+    'decode': on_decode_batch,
+    'scan': on_scan,
+    'block_records': on_scan,
+    'read_shards': on_read_shards,
+    'map_file': on_map_file,
+    'append_many': on_append,
+    'mark_deleted': on_mark_deleted,
+    '_write_run': on_write_run,
+    'install_main': on_install_main,
+    'reconstruct_main_file': on_rebuild,
+    'install_background': on_rebuild,
+}
+PAGED_HOOKS = dict(SEQUENTIAL_HOOKS, read_page=on_read_page, write_page=on_write_page)
+
+# ganchos del AVL
+def on_read_node(stats, engine, slot):
+    # solo el indice en archivo tiene buffer; el de arreglos esta todo en memoria
+    cache = getattr(engine.index, 'cache', None)
+    if cache is None:
+        return
+    if slot in cache:
+        stats.counters['node_cache_hits'] += 1
+    else:
+        stats.counters['node_cache_misses'] += 1
+        stats.counters['bytes_read'] += engine.index.node_size
+
+def on_write_node(stats, engine, node):
+    if getattr(engine.index, 'cache', None) is not None:
+        stats.counters['bytes_written'] += engine.index.node_size
+
+def on_read_record(stats, engine, pos):
+    if pos in engine.record_cache.entries:
+        stats.counters['record_cache_hits'] += 1
+    else:
+        stats.counters['record_cache_misses'] += 1
+        stats.counters['bytes_read'] += engine.record_size
+
+def on_read_records(stats, engine, positions):
+    positions = set(positions)
+    hits = sum(1 for pos in positions if pos in engine.record_cache.entries)
+    stats.counters['record_cache_hits'] += hits
+    stats.counters['record_cache_misses'] += len(positions) - hits
+    stats.counters['bytes_read'] += (len(positions) - hits) * engine.record_size
+
+def on_write_data(stats, engine, *args):
+    stats.counters['bytes_written'] += len(args[-1])
+
+def rotation(case):
+    def hook(stats, engine, node):
+        stats.counters['rotations.' + case] += 1
+    return hook
+
+AVL_OPS = ('insert', 'insert_many', 'insert_packed', 'search', 'get_many', 'delete', 'range_search', 'find_by',
+           'range_by', 'bulk_load', 'compact')
+AVL_HOOKS = {
+    'unpack': on_decode,
+    'index.read_node': on_read_node,
+    'index.write_node': on_write_node,
+    'read_record_from_file': on_read_record,
+    'read_records': on_read_records,
+    'write_record': on_write_data,
+    'append_records': on_write_data,
+    'compact': on_rebuild,
+    'fix_left_left': rotation('left_left'),
+    'fix_left_right': rotation('left_right'),
+    'fix_right_right': rotation('right_right'),
+    'fix_right_left': rotation('right_left'),
+}
@@ -0,0 +1,102 @@
+import os
+import struct
+import time
+import zlib
+
+# bitacora de escritura anticipada: | op | largo | crc32 | payload |
+WAL_HEADER = struct.Struct('<BII')
+WAL_INSERT = 1  # payload: registro empaquetado
+WAL_REMOVE = 2  # payload: Employee_ID a eliminar ('<i' cada uno)
+WAL_REBUILD = 3  # marca: principal nuevo escrito y sincronizado en el temporal del payload
+WAL_CHECKPOINT = 4  # marca: datos sincronizados; payload: tamaño del auxiliar ('<q')
+WAL_SWAP = 5  # marca: principal nuevo de una reconstruccion en segundo plano; payload: tamaño
+              # sincronizado del auxiliar activo ('<q') y el temporal
+CHECKPOINT = struct.Struct('<q')
+GROUP_SIZE = 64  # operaciones por fsync
+GROUP_MS = 10  # o milisegundos desde el ultimo fsync, lo que ocurra primero
+
+def fsync_directory(path):
+    # el rename solo es durable cuando se sincroniza el directorio que lo contiene
+    if hasattr(os, 'O_DIRECTORY'):
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+class WriteAheadLog:
+    # commit en grupo: un fsync cada group_size operaciones o cada group_ms; no hay hilo
+    # de fondo, el plazo se revisa en cada append y commit() fuerza el resto
+    def __init__(self, path, group_size=GROUP_SIZE, group_ms=GROUP_MS):
+        self.path = path
+        self.group_size = max(1, group_size)
+        self.group_ms = group_ms
+        self.truncate_torn_tail()
+        self.file = open(path, 'ab')
+        self.pending = 0
+        self.last_sync = time.monotonic()
+        self.syncs = 0
+
+    def close(self):
+        self.commit()
+        self.file.close()
+
+    def read_entries(self):
+        # (op, payload) validos desde el inicio y el largo que ocupan;
+        # se detiene en la primera entrada cortada o con crc invalido
+        entries = []
+        valid = 0
+        if not os.path.exists(self.path):
+            return entries, valid
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        while valid + WAL_HEADER.size <= len(data):
+            op, length, crc = WAL_HEADER.unpack_from(data, valid)
+            start = valid + WAL_HEADER.size
+            payload = data[start:start + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            entries.append((op, payload))
+            valid = start + length
+        return entries, valid
+
+    def truncate_torn_tail(self):
+        # una escritura a medias al final (caida durante el append) se descarta
+        if os.path.exists(self.path):
+            _, valid = self.read_entries()
+            if valid < os.path.getsize(self.path):
+                with open(self.path, 'r+b') as f:
+                    f.truncate(valid)
+
+    def replay_state(self):
+        # ultima marca (op, payload) y las operaciones posteriores, que son las que hay que rehacer
+        entries, _ = self.read_entries()
+        for i in range(len(entries) - 1, -1, -1):
+            op, payload = entries[i]
+            if op in (WAL_REBUILD, WAL_CHECKPOINT, WAL_SWAP):
+                return op, payload, entries[i + 1:]
+        return None, b'', entries
+
+    def append(self, op, payload=b''):
+        self.file.write(WAL_HEADER.pack(op, len(payload), zlib.crc32(payload)) + payload)
+        self.pending += 1
+        if (self.pending >= self.group_size
+                or (time.monotonic() - self.last_sync) * 1000 >= self.group_ms):
+            self.commit()
+
+    def commit(self):
+        # todo lo escrito hasta aqui sobrevive a una caida
+        if self.pending:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.pending = 0
+            self.syncs += 1
+        self.last_sync = time.monotonic()
+
+    def checkpoint(self, aux_size):
+        # los archivos de datos ya estan sincronizados: el log se vacia y queda solo la marca
+        # con el tamaño durable del auxiliar, desde donde se rehace tras una caida
+        self.file.flush()
+        self.file.truncate(0)
+        self.append(WAL_CHECKPOINT, CHECKPOINT.pack(aux_size))
+        self.commit()
@@ -0,0 +1,47 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from bench_lab2 import bench_suite, compare_baseline, percentile, summarize, write_report, SUITE_WORKLOADS
+from lab2_ingest import DISTRIBUTIONS, id_sequence, id_space
+
+class TestBenchSuite(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_distributions_are_unique_ids(self):
+        for distribution in DISTRIBUTIONS:
+            for n in (1, 7, 500):
+                employee_id = id_sequence(n, distribution, seed=3)
+                ids = [employee_id(i) for i in range(n)]
+                self.assertEqual(len(set(ids)), n)
+                self.assertTrue(all(1 <= i <= id_space(n, distribution) for i in ids))
+        self.assertEqual([id_sequence(5)(i) for i in range(5)], [1, 2, 3, 4, 5])
+
+    def test_percentiles(self):
+        values = list(range(1, 101))
+        self.assertEqual([percentile(values, q) for q in (50, 95, 99, 100)], [50, 95, 99, 100])
+        result = summarize('avl', 'uniform', 10, 'lookup', [2000, 1000, 3000])
+        self.assertEqual((result['p50_us'], result['max_us'], result['mean_us']), (2.0, 3.0, 2.0))
+        self.assertAlmostEqual(result['ops_per_s'], 500000)
+
+    def test_report_and_baseline(self):
+        results = bench_suite([200], ['skewed'], ['sequential', 'avl'], runs=1, warmup=0, ops=20, workers=1)
+        self.assertEqual(len(results), 2 * len(SUITE_WORKLOADS))
+        self.assertTrue(all(result['samples'] > 0 and result['p99_us'] >= result['p50_us'] for result in results))
+        path = os.path.join(self.tmp_dir, 'report.json')
+        write_report(path, results, {})
+        with open(path, encoding='utf-8') as f:
+            baseline = json.load(f)
+        self.assertEqual(compare_baseline(results, baseline), [])
+        slower = [dict(result, p50_us=result['p50_us'] * 2) for result in results]
+        self.assertEqual(len(compare_baseline(slower, baseline, tolerance=0.5)), len(results))
+        write_report(os.path.join(self.tmp_dir, 'report.csv'), results, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,233 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from lab2_avl import AVLFile, NIL
+from lab2_fixtures import make_record
+
+class TestAVLFile(unittest.TestCase):
+    index_type = 'file'
+
+    def open(self, **kwargs):
+        return AVLFile(self.data_file, index_type=self.index_type, **kwargs)
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data_file = os.path.join(self.tmp_dir, "employees_avl.dat")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def check_balanced(self, avl):
+        # recorre el arbol y valida orden, alturas y factor de balance
+        keys = []
+        def walk(slot):
+            if slot == NIL:
+                return 0
+            node = avl.node(slot)
+            left = walk(node.left)
+            keys.append(node.employee_id)
+            right = walk(node.right)
+            self.assertLessEqual(abs(left - right), 1)
+            self.assertEqual(node.height, 1 + max(left, right))
+            return node.height
+        walk(avl.root)
+        self.assertEqual(keys, sorted(keys))
+        return keys
+
+    def test_insert_search_delete_range(self):
+        avl = self.open()
+        ids = list(range(1, 501))
+        random.Random(3).shuffle(ids)
+        for i in ids:
+            avl.insert(make_record(i))
+        self.assertEqual(self.check_balanced(avl), list(range(1, 501)))
+        self.assertEqual(avl.search(250).Employee_Name, 'Name250')
+        self.assertIsNone(avl.search(501))
+
+        avl.insert(make_record(250, Employee_Name='Updated'))
+        self.assertEqual(avl.search(250).Employee_Name, 'Updated')
+
+        for i in ids[:200]:
+            avl.delete(i)
+        remaining = sorted(ids[200:])
+        self.assertEqual(self.check_balanced(avl), remaining)
+        self.assertIsNone(avl.search(ids[0]))
+        self.assertEqual([r.Employee_ID for r in avl.range_search(100, 200)],
+                         [i for i in remaining if 100 <= i <= 200])
+        avl.close()
+
+    def test_random_operations_keep_tree_balanced(self):
+        avl = self.open(cache_size=16)
+        rng = random.Random(11)
+        expected = {}
+        for step in range(3000):
+            i = rng.randint(1, 400)
+            if rng.random() < 0.6:
+                avl.insert(make_record(i, Employee_Name=f'V{step}'))
+                expected[i] = f'V{step}'
+            else:
+                avl.delete(i)
+                expected.pop(i, None)
+        self.assertEqual(self.check_balanced(avl), sorted(expected))
+        for i in range(1, 401):
+            rec = avl.search(i)
+            self.assertEqual(rec.Employee_Name if rec else None, expected.get(i))
+        avl.close()
+
+    def test_bulk_load_builds_balanced_index(self):
+        avl = self.open()
+        for i in [5000, 3, 7]:
+            avl.insert(make_record(i, Employee_Name='Old'))
+        ids = list(range(1, 1001))
+        random.Random(5).shuffle(ids)
+        self.assertEqual(avl.bulk_load(make_record(i) for i in ids), 1000)
+        self.assertEqual(self.check_balanced(avl), list(range(1, 1001)) + [5000])
+        self.assertEqual(avl.search(7).Employee_Name, 'Name7')
+        self.assertEqual(avl.search(5000).Employee_Name, 'Old')
+        self.assertEqual([r.Employee_ID for r in avl.range_search(10, 20)], list(range(10, 21)))
+
+        avl.delete(500)
+        avl.insert(make_record(1500))
+        self.assertEqual(self.check_balanced(avl), [i for i in range(1, 1001) if i != 500] + [1500, 5000])
+        avl.close()
+
+        avl = self.open()
+        self.assertEqual(avl.search(999).Employee_Name, 'Name999')
+        avl.close()
+
+    def test_insert_many(self):
+        avl = self.open()
+        self.assertEqual(avl.insert_many(make_record(i) for i in range(1, 101)), 100)
+        self.assertEqual(self.check_balanced(avl), list(range(1, 101)))
+        for i in range(1, 11):
+            avl.delete(i)
+        avl.flush()
+        size = os.path.getsize(avl.data_file)
+
+        # los 10 registros muertos se reutilizan y el resto va al final en una escritura
+        ids = list(range(101, 131)) + [50]
+        random.Random(2).shuffle(ids)
+        self.assertEqual(avl.insert_many([make_record(i, Employee_Name='New') for i in ids] + [make_record(101, Employee_Name='Last')]), 31)
+        avl.flush()
+        self.assertEqual(os.path.getsize(avl.data_file), size + 21 * avl.record_size)
+        self.assertEqual(self.check_balanced(avl), list(range(11, 131)))
+        self.assertEqual(avl.search(50).Employee_Name, 'New')
+        self.assertEqual(avl.search(101).Employee_Name, 'Last')
+        avl.close()
+
+    def test_record_cache(self):
+        avl = self.open(record_cache_size=50)
+        avl.bulk_load(make_record(i) for i in range(1, 201))
+        self.assertEqual([r.Employee_ID for r in avl.range_search(1, 200)], list(range(1, 201)))
+        self.assertEqual(avl.record_cache.stats()['size'], 50)
+        misses = avl.record_cache.misses
+        self.assertEqual(avl.search(200).Employee_ID, 200)
+        self.assertEqual(avl.record_cache.misses, misses)
+        self.assertGreater(avl.record_cache.hits, 0)
+
+        pos = avl._search_node(200).record_pos
+        avl.write_record(pos, make_record(200, Employee_Name='Rewritten').pack())
+        self.assertEqual(avl.search(200).Employee_Name, 'Rewritten')
+        avl.close()
+
+    def test_dead_records_are_reused(self):
+        avl = self.open()
+        for i in range(1, 101):
+            avl.insert(make_record(i))
+        avl.flush()
+        size = os.path.getsize(self.data_file)
+        for round_ in range(5):
+            for i in range(1, 101):
+                avl.insert(make_record(i, Employee_Name=f'R{round_}'))
+        for i in range(1, 51):
+            avl.delete(i)
+        for i in range(101, 151):
+            avl.insert(make_record(i))
+        avl.flush()
+        self.assertEqual(os.path.getsize(self.data_file), size + avl.record_size)
+        self.assertEqual(avl.search(60).Employee_Name, 'R4')
+        self.assertEqual(avl.search(120).Employee_Name, 'Name120')
+        self.assertIsNone(avl.search(10))
+        avl.close()
+
+    def test_compact(self):
+        avl = self.open()
+        ids = list(range(1, 301))
+        random.Random(9).shuffle(ids)
+        avl.bulk_load(make_record(i) for i in ids[:150])
+        for i in ids[150:]:
+            avl.insert(make_record(i))
+        for i in range(1, 301, 2):
+            avl.delete(i)
+        avl.flush()
+        size = os.path.getsize(self.data_file)
+        reclaimed = avl.compact()
+        self.assertEqual(reclaimed, size - 150 * avl.record_size)
+        self.assertEqual(os.path.getsize(self.data_file), 150 * avl.record_size)
+        self.assertEqual(self.check_balanced(avl), list(range(2, 301, 2)))
+        # tras compactar, el orden fisico coincide con el orden de llave
+        self.assertEqual([pos for _, pos in avl.items()], [i * avl.record_size for i in range(150)])
+        self.assertEqual([r.Employee_ID for r in avl.range_search(1, 20)], list(range(2, 21, 2)))
+        avl.insert(make_record(1))
+        avl.close()
+
+        avl = self.open()
+        self.assertEqual(avl.search(1).Employee_Name, 'Name1')
+        self.assertEqual(avl.search(300).Employee_Name, 'Name300')
+        avl.close()
+
+    def test_index_survives_reopen(self):
+        avl = self.open(cache_size=8)
+        for i in range(1, 301):
+            avl.insert(make_record(i))
+        for i in range(1, 301, 3):
+            avl.delete(i)
+        slots = avl.index.slots
+        avl.close()
+
+        avl = self.open(cache_size=8)
+        self.assertEqual(self.check_balanced(avl), [i for i in range(1, 301) if i % 3 != 1])
+        self.assertEqual(avl.search(2).Employee_Name, 'Name2')
+        self.assertIsNone(avl.search(4))
+        # los slots liberados se reutilizan
+        for i in range(1, 301, 3):
+            avl.insert(make_record(i))
+        self.assertEqual(avl.index.slots, slots)
+        self.assertEqual(self.check_balanced(avl), list(range(1, 301)))
+        avl.close()
+
+    def test_rebuild_index_from_data_file(self):
+        avl = self.open()
+        for i in [5, 3, 8, 1]:
+            avl.insert(make_record(i))
+        avl.insert(make_record(3, Employee_Name='Updated'))
+        avl.delete(8)
+        avl.close()
+        os.remove(avl.index_file)
+
+        avl = self.open()
+        self.assertEqual(self.check_balanced(avl), [1, 3, 5])
+        self.assertEqual(avl.search(3).Employee_Name, 'Updated')
+        # los registros muertos vuelven a la lista libre
+        size = os.path.getsize(self.data_file)
+        avl.insert(make_record(9))
+        avl.insert(make_record(10))
+        avl.flush()
+        self.assertEqual(os.path.getsize(self.data_file), size)
+        avl.close()
+
+class TestAVLFileArrayIndex(TestAVLFile):
+    index_type = 'array'
+
+    def test_array_index_is_compact(self):
+        avl = self.open()
+        for i in range(1, 2001):
+            avl.insert(make_record(i))
+        self.assertLess(avl.index.memory_usage() / 2000, 40)
+        avl.close()
+
+if __name__ == "__main__":
+    unittest.main()
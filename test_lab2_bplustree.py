@@ -0,0 +1,55 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from lab2_bplustree import BPlusTree
+
+class TestBPlusTree(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'tree.bpt')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_insert_splits_and_range(self):
+        # paginas pequeñas para forzar varios niveles
+        tree = BPlusTree(self.path, page_size=128)
+        entries = [(float(i % 50), i) for i in range(1000)]
+        random.Random(3).shuffle(entries)
+        for value, employee_id in entries:
+            tree.insert(value, employee_id)
+        self.assertFalse(tree.read(tree.root).leaf)
+        self.assertEqual(list(tree.items()), sorted(entries))
+        self.assertEqual(tree.range(10, 12), [i for _, i in sorted(e for e in entries if 10 <= e[0] <= 12)])
+        self.assertEqual(tree.range(None, -1), [])
+        self.assertEqual(len(tree.range(49)), 20)
+        tree.close()
+
+    def test_delete_and_reopen(self):
+        tree = BPlusTree(self.path, page_size=128)
+        for i in range(300):
+            tree.insert(float(i), i)
+        for i in range(0, 300, 3):
+            self.assertTrue(tree.delete(float(i), i))
+        self.assertFalse(tree.delete(0.0, 0))
+        tree.close()
+        tree = BPlusTree(self.path, page_size=128)
+        self.assertEqual(tree.range(), [i for i in range(300) if i % 3])
+        tree.close()
+
+    def test_bulk_load_matches_inserts(self):
+        entries = sorted((float(random.Random(i).randint(0, 30)), i) for i in range(500))
+        tree = BPlusTree(self.path, page_size=128)
+        tree.load(entries)
+        self.assertEqual(list(tree.items()), entries)
+        tree.insert(5.5, 1000)
+        self.assertIn(1000, tree.range(5.5, 5.5))
+        tree.load([])
+        self.assertEqual(tree.range(), [])
+        tree.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import os
+import random
+import shutil
+import tempfile
+import threading
+import unittest
+
+from lab2_concurrency import RWLock
+from lab2_sequential import sequentialFile
+from lab2_paged import pagedSequentialFile
+from lab2_avl import AVLFile
+from lab2_fixtures import make_record
+
+class TestRWLock(unittest.TestCase):
+    def test_readers_share_writer_excludes(self):
+        lock = RWLock()
+        inside = threading.Barrier(2, timeout=5)
+        def reader():
+            with lock.read():
+                inside.wait()  # solo pasa si los dos lectores estan dentro a la vez
+        threads = [threading.Thread(target=reader) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertFalse(inside.broken)
+
+        entered = threading.Event()
+        release = threading.Event()
+        def blocked_reader():
+            with lock.read():
+                entered.set()
+                release.wait(5)
+        with lock.write():
+            t = threading.Thread(target=blocked_reader)
+            t.start()
+            self.assertFalse(entered.wait(0.05))
+            with lock.read(), lock.write():  # el escritor puede volver a entrar
+                pass
+            with lock.downgraded():
+                self.assertTrue(entered.wait(5))
+                release.set()
+        t.join(5)
+        self.assertEqual(lock.readers, 0)
+
+class EngineMixin:
+    base = 2000
+    writes = 600
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_readers_with_writer(self):
+        engine = self.open()
+        engine.bulk_load(make_record(i) for i in range(1, self.base + 1))
+        errors = []
+        reads = [0]
+        done = threading.Event()
+        removed = set()
+
+        def writer():
+            try:
+                for j in range(1, self.writes + 1):
+                    engine.insert(make_record(self.base + j))
+                    if j % 3 == 0:
+                        self.remove(engine, self.base + j - 1)
+                        removed.add(self.base + j - 1)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                done.set()
+
+        def reader(seed):
+            rng = random.Random(seed)
+            try:
+                while not done.is_set():
+                    i = rng.randint(1, self.base)
+                    record = self.get(engine, i)
+                    if record is None or record.Employee_Name != f'Name{i}':
+                        errors.append(('get', i, record))
+                    start = rng.randint(1, self.base - 20)
+                    ids = [r.Employee_ID for r in engine.range_search(start, start + 20)]
+                    if ids != list(range(start, start + 21)):
+                        errors.append(('range', start, ids))
+                    reads[0] += 2
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=reader, args=(seed,)) for seed in range(4)]
+        threads.append(threading.Thread(target=writer))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(60)
+        self.assertEqual(errors, [])
+        self.assertGreater(reads[0], 0)
+        expected = [i for i in range(1, self.base + self.writes + 1) if i not in removed]
+        self.assertEqual([r.Employee_ID for r in engine.range_search(1, self.base + self.writes)], expected)
+        engine.close()
+
+class TestSequentialConcurrency(EngineMixin, unittest.TestCase):
+    def open(self):
+        return sequentialFile(os.path.join(self.tmp_dir, 'main.dat'), os.path.join(self.tmp_dir, 'aux.dat'),
+                              k=50, concurrent=True)
+
+    def get(self, engine, i):
+        return engine.get(i)
+
+    def remove(self, engine, i):
+        engine.remove(i)
+
+class TestPagedConcurrency(TestSequentialConcurrency):
+    def open(self):
+        return pagedSequentialFile(os.path.join(self.tmp_dir, 'main.dat'), os.path.join(self.tmp_dir, 'aux.dat'),
+                                   k=50, page_size=1024, concurrent=True)
+
+class TestAVLConcurrency(EngineMixin, unittest.TestCase):
+    # el AVL no tiene lecturas en paralelo: aqui solo se comprueba que es seguro entre hilos
+    def open(self):
+        return AVLFile(os.path.join(self.tmp_dir, 'data.dat'), cache_size=64, record_cache_size=64,
+                       concurrent=True)
+
+    def get(self, engine, i):
+        return engine.search(i)
+
+    def remove(self, engine, i):
+        engine.delete(i)
+
+if __name__ == '__main__':
+    unittest.main()
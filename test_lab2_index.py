@@ -0,0 +1,174 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from lab2_index import SecondaryIndex, SECONDARY_FIELDS, RANGE_FIELDS, date_ordinal, range_key
+from lab2_sequential import sequentialFile
+from lab2_paged import pagedSequentialFile
+from lab2_avl import AVLFile
+from lab2_fixtures import make_record as base_record
+
+# pocos valores distintos por campo indexado, para que las consultas devuelvan varios IDs
+INDEXED_FIELDS = {'Country': lambda i: f'Country{i % 3}', 'Position': lambda i: f'Pos{i % 2}',
+                  'Salary': lambda i: 30000 + (i % 7) * 1000.1,
+                  'Joining_Date': lambda i: f'{(i % 28) + 1}/0{(i % 9) + 1}/20{10 + i % 10}'}
+
+def make_record(i, **fields):
+    return base_record(i, **{**INDEXED_FIELDS, **fields})
+
+def expected_ids(ids, **equals):
+    return [i for i in sorted(ids) if all(getattr(make_record(i), f) == v for f, v in equals.items())]
+
+class TestSecondaryIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'data.sidx')
+        self.data = os.path.join(self.tmp_dir, 'data.dat')
+        with open(self.data, 'wb') as f:
+            f.write(b'x')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_query_intersects_postings(self):
+        index = SecondaryIndex(self.path)
+        for i in range(1, 61):
+            index.add(make_record(i))
+        self.assertEqual(index.query(Department='Dep1', Country='Country2'),
+                         expected_ids(range(1, 61), Department='Dep1', Country='Country2'))
+        self.assertEqual(index.query(Department='Nada'), [])
+        self.assertEqual(index.query(), list(range(1, 61)))
+        with self.assertRaises(ValueError):
+            index.query(Employee_Name='Name1')
+
+    def test_update_and_discard(self):
+        index = SecondaryIndex(self.path)
+        index.add(make_record(1))
+        index.add(make_record(1, Department='Otro'))
+        self.assertEqual(index.query(Department='Dep1'), [])
+        self.assertEqual(index.query(Department='Otro'), [1])
+        index.discard(1)
+        index.discard(1)
+        self.assertEqual(index.postings['Department'], {})
+        self.assertEqual(len(index), 0)
+
+    def test_save_and_stale_detection(self):
+        index = SecondaryIndex(self.path)
+        for i in range(1, 11):
+            index.add(make_record(i))
+        index.save([self.data])
+        loaded = SecondaryIndex(self.path)
+        self.assertTrue(loaded.load([self.data]))
+        self.assertEqual(loaded.values, index.values)
+        self.assertFalse(SecondaryIndex(self.path, fields=('Country',)).load([self.data]))
+        with open(self.data, 'ab') as f:
+            f.write(b'y')
+        self.assertFalse(SecondaryIndex(self.path).load([self.data]))
+
+def expected_range(ids, field, low, high):
+    records = [make_record(i) for i in ids]
+    keys = [(range_key(field, getattr(r, field)), r.Employee_ID) for r in records]
+    return [i for key, i in sorted(keys) if range_key(field, low) <= key <= range_key(field, high)]
+
+class TestRangeKeys(unittest.TestCase):
+    def test_dates_sort_as_ordinals(self):
+        self.assertEqual(date_ordinal('1/02/2020'), date_ordinal('2020-02-01'))
+        self.assertLess(date_ordinal('31/12/2019'), date_ordinal('1/01/2020'))
+        self.assertEqual(range_key('Salary', 30000.1), range_key('Salary', range_key('Salary', 30000.1)))
+
+class EngineMixin:
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_maintained_on_writes(self):
+        engine = self.open()
+        for i in range(1, 41):
+            engine.insert(make_record(i))
+        self.remove(engine, [5, 10, 15])
+        engine.insert(make_record(7, Department='Otro'))
+        ids = set(range(1, 41)) - {5, 10, 15, 7}
+        self.assertEqual([r.Employee_ID for r in engine.find_by(Department='Dep0')], expected_ids(ids, Department='Dep0'))
+        self.assertEqual([r.Employee_ID for r in engine.find_by(Department='Otro')], [7])
+        self.assertEqual([r.Employee_ID for r in engine.find_by(Country='Country1', Position='Pos0')],
+                         expected_ids(ids | {7}, Country='Country1', Position='Pos0'))
+        self.assertEqual([r.Employee_ID for r in engine.range_by('Salary', 31000, 33000.3)],
+                         expected_range(ids | {7}, 'Salary', 31000, 33000.3))
+        self.assertEqual([r.Employee_ID for r in engine.range_by('Joining_Date', '1/03/2012', '2016-06-30')],
+                         expected_range(ids | {7}, 'Joining_Date', '1/03/2012', '2016-06-30'))
+        engine.close()
+
+    def test_range_index_persisted_and_rebuilt(self):
+        engine = self.open()
+        engine.bulk_load(make_record(i) for i in range(1, 61))
+        engine.insert(make_record(70))
+        engine.close()
+        engine = self.open()
+        self.assertEqual([r.Employee_ID for r in engine.range_by('Age', 30, 40)],
+                         expected_range(list(range(1, 61)) + [70], 'Age', 30, 40))
+        engine.close()
+
+        # datos modificados sin el indice abierto: el manifiesto no coincide y se reconstruye
+        engine = self.open_plain()
+        self.remove(engine, [31, 32])
+        engine.close()
+        engine = self.open()
+        self.assertEqual([r.Employee_ID for r in engine.range_by('Age', 30, 40)],
+                         expected_range([i for i in list(range(1, 61)) + [70] if i not in (31, 32)], 'Age', 30, 40))
+        with self.assertRaises(ValueError):
+            engine.range_by('Department', 'a', 'b')
+        engine.close()
+
+    def test_persisted_and_rebuilt(self):
+        engine = self.open()
+        engine.bulk_load(make_record(i) for i in range(1, 31))
+        engine.close()
+        engine = self.open()
+        self.assertTrue(os.path.exists(engine.secondary.path))
+        self.assertEqual(len(engine.secondary), 30)
+        path = engine.secondary.path
+        engine.close()
+        os.unlink(path)
+        engine = self.open()
+        self.assertEqual([r.Employee_ID for r in engine.find_by(Department='Dep2')],
+                         expected_ids(range(1, 31), Department='Dep2'))
+        engine.close()
+
+class TestSequentialIndexes(EngineMixin, unittest.TestCase):
+    def open(self):
+        return sequentialFile(os.path.join(self.tmp_dir, 'main.dat'), os.path.join(self.tmp_dir, 'aux.dat'),
+                              k=7, secondary_fields=SECONDARY_FIELDS, range_fields=RANGE_FIELDS)
+
+    def open_plain(self):
+        return sequentialFile(os.path.join(self.tmp_dir, 'main.dat'), os.path.join(self.tmp_dir, 'aux.dat'), k=7)
+
+    def remove(self, engine, ids):
+        engine.remove_many(ids)
+
+class TestPagedIndexes(TestSequentialIndexes):
+    def open(self):
+        return pagedSequentialFile(os.path.join(self.tmp_dir, 'main.dat'), os.path.join(self.tmp_dir, 'aux.dat'),
+                                   k=7, page_size=1024, secondary_fields=SECONDARY_FIELDS,
+                                   range_fields=RANGE_FIELDS)
+
+    def open_plain(self):
+        return pagedSequentialFile(os.path.join(self.tmp_dir, 'main.dat'), os.path.join(self.tmp_dir, 'aux.dat'),
+                                   k=7, page_size=1024)
+
+class TestAVLIndexes(EngineMixin, unittest.TestCase):
+    def open(self):
+        return AVLFile(os.path.join(self.tmp_dir, 'data.dat'), secondary_fields=SECONDARY_FIELDS,
+                       range_fields=RANGE_FIELDS)
+
+    def open_plain(self):
+        return AVLFile(os.path.join(self.tmp_dir, 'data.dat'))
+
+    def remove(self, engine, ids):
+        for i in ids:
+            engine.delete(i)
+
+if __name__ == '__main__':
+    unittest.main()
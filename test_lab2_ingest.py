@@ -0,0 +1,57 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from lab2_ingest import generate_csv, read_chunks, encode_chunk, ingest
+from lab2_sequential import sequentialFile
+from lab2_avl import AVLFile
+from lab2_record import Record, RECORD_SIZE, read_csv_records
+
+class TestIngest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.tmp_dir, 'employee.csv')
+        generate_csv(self.csv_path, 500)
+        self.expected = list(read_csv_records(self.csv_path))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir, name)
+
+    def test_chunks_end_on_line_boundaries(self):
+        blocks = [encode_chunk(header, data) for header, data in read_chunks(self.csv_path, 100)]
+        self.assertGreater(len(blocks), 10)
+        self.assertEqual(sum(rows for rows, _ in blocks), 500)
+        packed = b''.join(block for _, block in blocks)
+        self.assertEqual(packed, b''.join(record.pack() for record in self.expected))
+
+    def test_header_order_and_long_text(self):
+        with open(self.path('shuffled.csv'), 'w', encoding='utf-8') as f:
+            f.write('Age;Employee_ID;Salary;Joining_Date;Position;Department;Country;Employee_Name\n')
+            f.write(f'30;7;1500.5;1/02/2020;Dev;Sales;Perú;{"N" * 40}\n')
+        rows, block = encode_chunk(*next(read_chunks(self.path('shuffled.csv'))))
+        self.assertEqual(rows, 1)
+        self.assertEqual(block, Record(7, 'N' * 40, 30, 'Perú', 'Sales', 'Dev', 1500.5, '1/02/2020').pack())
+
+    def test_ingest_sequential(self):
+        sf = sequentialFile(self.path('main.dat'), self.path('aux.dat'))
+        stats = ingest(sf, self.csv_path, workers=2, chunk_bytes=2048)
+        self.assertEqual(stats['rows'], 500)
+        self.assertGreater(stats['rows_per_s'], 0)
+        self.assertEqual(os.path.getsize(self.path('main.dat')), 500 * RECORD_SIZE)
+        self.assertEqual([r.Employee_ID for r in sf.range_search(1, 500)], list(range(1, 501)))
+        sf.close()
+
+    def test_ingest_avl(self):
+        avl = AVLFile(self.path('data.dat'))
+        ingest(avl, self.csv_path, workers=2, chunk_bytes=2048, max_pending=2)
+        ingest(avl, self.csv_path, workers=2, chunk_bytes=4096)
+        self.assertEqual([r.Employee_ID for r in avl.range_search(1, 500)], list(range(1, 501)))
+        self.assertEqual(avl.search(250).Employee_Name, 'Name250')
+        avl.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from lab2_paged import pagedSequentialFile, PAGE_HEADER
+from lab2_record import RECORD_SIZE
+from lab2_fixtures import make_record
+
+class TestPagedSequentialFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def open(self, **kw):
+        return pagedSequentialFile(os.path.join(self.tmp_dir, 'main.dat'),
+                                   os.path.join(self.tmp_dir, 'aux.dat'), **kw)
+
+    def test_bulk_load_writes_pages(self):
+        sf = self.open(page_size=1024)
+        ids = list(range(1, 201))
+        random.Random(1).shuffle(ids)
+        sf.bulk_load(make_record(i) for i in ids)
+        self.assertEqual(os.path.getsize(sf.main_file) % 1024, 0)
+        self.assertEqual(sf.page_keys, sorted(sf.page_keys))
+        self.assertEqual(len(sf.page_keys), (200 + sf.fill - 1) // sf.fill)
+        self.assertEqual([r.Employee_ID for r in sf.range_search(1, 200)], list(range(1, 201)))
+        for i in [1, 57, 200]:
+            self.assertEqual(sf.get(i).Employee_Name, f'Name{i}')
+        self.assertIsNone(sf.get(500))
+        sf.close()
+
+    def test_sparse_index_loaded_at_open(self):
+        sf = self.open(page_size=1024)
+        sf.bulk_load(make_record(i) for i in range(1, 101))
+        keys = sf.page_keys
+        sf.close()
+        sf = self.open(page_size=1024)
+        self.assertEqual(sf.page_keys, keys)
+        self.assertEqual(sf.binary_search(42).Employee_ID, 42)
+        sf.close()
+
+    def test_insert_uses_free_slots_before_aux(self):
+        sf = self.open(page_size=1024, k=5)
+        sf.bulk_load(make_record(i) for i in range(0, 200, 2))
+        free = sum(sf.capacity - len(sf.read_page(p)[0]) for p in sf.page_nums)
+        for i in range(1, 200, 2):
+            sf.insert(make_record(i))
+        # solo lo que no cabe en las paginas pasa por el auxiliar
+        self.assertLessEqual(sf.aux_size // RECORD_SIZE, sf.k)
+        self.assertGreater(free, 0)
+        self.assertEqual([r.Employee_ID for r in sf.range_search(0, 199)], list(range(200)))
+        for p in sf.page_nums:
+            keys = sf.read_page(p)[0]
+            self.assertEqual(keys, sorted(keys))
+        sf.close()
+
+    def test_insert_below_first_key(self):
+        sf = self.open(page_size=1024)
+        sf.bulk_load(make_record(i) for i in range(10, 20))
+        sf.insert(make_record(3))
+        self.assertEqual(sf.page_keys[0], 3)
+        self.assertEqual(sf.get(3).Employee_ID, 3)
+        self.assertEqual(sf.aux_size, 0)
+        sf.close()
+
+    def test_insert_many_groups_by_page(self):
+        sf = self.open(page_size=1024, k=50)
+        sf.bulk_load(make_record(i) for i in range(0, 60, 2))
+        writes = []
+        original = sf.write_page
+        sf.write_page = lambda page, records: (writes.append(page), original(page, records))
+        self.assertEqual(sf.insert_many([make_record(i) for i in range(1, 60, 2)] + [make_record(4)]), 31)
+        self.assertEqual(len(writes), len(set(writes)))
+        self.assertEqual([r.Employee_ID for r in sf.range_search(0, 59)], list(range(60)))
+        self.assertGreater(sf.aux_size, 0)
+        sf.close()
+
+    def test_remove_and_rebuild(self):
+        sf = self.open(page_size=1024, k=3)
+        sf.bulk_load(make_record(i) for i in range(1, 51))
+        self.assertEqual(sf.remove_many([5, 6, 7, 999]), 3)
+        self.assertFalse(sf.remove(5))
+        self.assertIsNone(sf.get(6))
+        sf.reconstruct_main_file()
+        self.assertEqual([r.Employee_ID for r in sf.range_search(1, 50)],
+                         [i for i in range(1, 51) if i not in (5, 6, 7)])
+        sf.close()
+
+    def test_rebuild_keeps_newest_version(self):
+        sf = self.open(page_size=1024, fill_factor=1.0)
+        sf.bulk_load(make_record(i) for i in range(1, 9))
+        for name in ['v1', 'v2']:
+            sf.insert(make_record(20, Employee_Name=name))
+        self.assertEqual([r.Employee_Name for r in sf.range_search(20, 20)], ['v2'])
+        sf.reconstruct_main_file()
+        self.assertEqual([r.Employee_ID for r in sf.range_search(1, 100)], list(range(1, 9)) + [20])
+        self.assertEqual(sf.get(20).Employee_Name, 'v2')
+        sf.close()
+
+    def test_remove_drops_every_aux_version(self):
+        # pagina llena: las dos versiones de 20 van al auxiliar
+        sf = self.open(page_size=1024, fill_factor=1.0)
+        sf.bulk_load(make_record(i) for i in range(1, 9))
+        for name in ['v1', 'v2']:
+            sf.insert(make_record(20, Employee_Name=name))
+        self.assertTrue(sf.remove(20))
+        self.assertIsNone(sf.get(20))
+        self.assertEqual([r.Employee_ID for r in sf.range_search(1, 100)], list(range(1, 9)))
+        sf.close()
+        sf = self.open(page_size=1024, fill_factor=1.0)
+        self.assertIsNone(sf.get(20))
+        sf.reconstruct_main_file()
+        self.assertEqual([r.Employee_ID for r in sf.range_search(1, 100)], list(range(1, 9)))
+        sf.close()
+
+    def test_filter_reads_pages_and_aux(self):
+        sf = self.open(page_size=1024, fill_factor=1.0)
+        sf.bulk_load(make_record(i) for i in range(1, 41))
+        sf.insert(make_record(41))
+        result = sf.filter(Age=(30, 40))
+        expected = [i for i in range(1, 42) if 30 <= 20 + (i % 45) <= 40]
+        self.assertEqual([r.Employee_ID for r in result], expected)
+        sf.close()
+
+    def test_filter_keeps_newest_version(self):
+        sf = self.open(page_size=1024, fill_factor=1.0)
+        sf.bulk_load(make_record(i) for i in range(1, 9))
+        for name in ['a20', 'b20']:
+            sf.insert(make_record(20, Employee_Name=name))
+        sf.insert(make_record(3, Employee_Name='new3'))
+        result = [(r.Employee_ID, r.Employee_Name) for r in sf.filter()]
+        self.assertEqual(result, [(r.Employee_ID, r.Employee_Name) for r in sf.range_search(1, 100)])
+        self.assertEqual(result[2], (3, 'new3'))
+        self.assertEqual(result[-1], (20, 'b20'))
+        self.assertEqual(len(result), 9)
+        sf.close()
+
+    def test_parallel_filter_reads_pages(self):
+        sf = self.open(page_size=1024, k=50)
+        sf.bulk_load(make_record(i) for i in range(1, 2001))
+        sf.remove_many([10, 11])
+        sf.insert(make_record(5000))
+        result = sf.parallel_filter(workers=3, Age=(30, 40))
+        self.assertEqual([r.Employee_ID for r in result], [r.Employee_ID for r in sf.filter(Age=(30, 40))])
+        self.assertEqual(len(sf.parallel_filter(workers=2)), 1999)
+        sf.close()
+
+    def test_page_too_small(self):
+        with self.assertRaises(ValueError):
+            self.open(page_size=RECORD_SIZE + PAGE_HEADER.size - 1)
+
+if __name__ == '__main__':
+    unittest.main()
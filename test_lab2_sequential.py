@@ -4,28 +4,12 @@ import struct
 import tempfile
 import shutil
 import unittest
-import time
-
-from lab2_sequential import sequentialFile, Record, FORMAT, RECORD_SIZE
-
-TIMES_CSV = "test_times_sequential_ms.csv"
-
-def generate_csv(path, n):
-    header = ['Employee_ID','Employee_Name','Age','Country','Department','Position','Salary','Joining_Date']
-    with open(path, 'w', encoding='utf-8', newline='') as f:
-        writer = csv.writer(f, delimiter=';')
-        writer.writerow(header)
-        for i in range(1, n + 1):
-            writer.writerow([
-                i,
-                f'Name{i}',
-                20 + (i % 45),
-                f'Country{i % 7}',
-                f'Dep{i % 5}',
-                f'Pos{i % 9}',
-                float(30000 + (i % 1000)),
-                f'2020-01-{(i % 28) + 1:02d}'
-            ])
+import random
+import threading
+
+from lab2_sequential import sequentialFile, Record, RecordBatch, FORMAT, RECORD_SIZE, read_csv_records
+from lab2_ingest import generate_csv
+from lab2_fixtures import make_record
 
 def read_all_records(file_path):
     records = []
@@ -41,31 +25,10 @@ def read_all_records(file_path):
             records.append(rec)
     return records
 
-def save_times(record_count, times):
-    file_exists = os.path.exists(TIMES_CSV)
-    with open(TIMES_CSV, 'a', newline='') as f:
-        writer = csv.writer(f)
-        if not file_exists:
-            writer.writerow([
-                "Records", "Insertion(ms)", "Sequential_Search(ms)", "Reconstruction(ms)",
-                "Binary_Search(ms)", "Range_Search(ms)", "Deletion(ms)"
-            ])
-        writer.writerow([
-            record_count,
-            times["insertion"] * 1000,
-            times["sequential_search"] * 1000,
-            times["reconstruction"] * 1000,
-            times["binary_search"] * 1000,
-            times["range_search"] * 1000,
-            times["deletion"] * 1000
-        ])
-
 class TestSequentialFile(unittest.TestCase):
     def run_full_test(self, record_count):
         tmp_dir = tempfile.mkdtemp()
-        times = {}
         try:
-            print(f"\n--- Testing with {record_count} records ---")
             csv_path = os.path.join(tmp_dir, "employee.csv")
             main_file = os.path.join(tmp_dir, "employees.dat")
             aux_file = os.path.join(tmp_dir, "auxiliary.dat")
@@ -73,24 +36,8 @@ class TestSequentialFile(unittest.TestCase):
 
             sf = sequentialFile(main_file=main_file, aux_file=aux_file, k=50)
 
-            # Insert records
-            t0 = time.time()
-            with open(csv_path, 'r', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile, delimiter=';')
-                for row in reader:
-                    rec = Record(
-                        Employee_ID=int(row['Employee_ID']),
-                        Employee_Name=row['Employee_Name'],
-                        Age=int(row['Age']),
-                        Country=row['Country'],
-                        Department=row['Department'],
-                        Position=row['Position'],
-                        Salary=float(row['Salary']),
-                        Joining_Date=row['Joining_Date']
-                    )
-                    sf.insert(rec)
-            t1 = time.time()
-            times["insertion"] = t1-t0
+            # Insert records (un solo lote)
+            sf.insert_many(read_csv_records(csv_path))
 
             # Sample IDs for tests
             sample_ids = []
@@ -105,46 +52,31 @@ class TestSequentialFile(unittest.TestCase):
                     sample_ids.append(record_count)
 
             # Sequential search BEFORE final reconstruction
-            t0 = time.time()
             for eid in sample_ids:
                 r = sf.search(eid)
                 self.assertIsNotNone(r, f"Sequential search failed for {eid} before reconstruction")
                 self.assertEqual(r.Employee_ID, eid)
-            t1 = time.time()
-            times["sequential_search"] = t1-t0
 
             # Reconstruct to consolidate and sort for binary search
-            t0 = time.time()
             sf.reconstruct_main_file()
-            t1 = time.time()
-            times["reconstruction"] = t1-t0
 
             # Binary search AFTER reconstruction
-            t0 = time.time()
             for eid in sample_ids:
                 r = sf.binary_search(eid)
                 self.assertIsNotNone(r, f"Binary search failed for {eid} after reconstruction")
                 self.assertEqual(r.Employee_ID, eid)
-            t1 = time.time()
-            times["binary_search"] = t1-t0
 
             # Range search
             start_id = max(1, record_count // 4)
             end_id = min(record_count, start_id + min(25, max(1, record_count // 4)))
-            t0 = time.time()
             range_results = sf.range_search(start_id, end_id)
-            t1 = time.time()
             returned_ids = [r.Employee_ID for r in range_results]
             self.assertEqual(returned_ids, list(range(start_id, end_id + 1)), "Range search returned incorrect IDs")
-            times["range_search"] = t1-t0
 
             # Delete a subset (first and last sample ids if distinct)
             delete_ids = list(dict.fromkeys(sample_ids[:2]))
-            t0 = time.time()
             for did in delete_ids:
                 self.assertTrue(sf.remove(did), f"Failed to mark deletion for {did}")
-            t1 = time.time()
-            times["deletion"] = t1-t0
 
             # Verify logical deletion (search should now fail)
             for did in delete_ids:
@@ -168,9 +100,6 @@ class TestSequentialFile(unittest.TestCase):
             sorted_ids = sorted(r.Employee_ID for r in active_records)
             self.assertEqual([r.Employee_ID for r in active_records], sorted_ids, "Records not sorted by Employee_ID after reconstruction")
 
-            # Save times for this test
-            save_times(record_count, times)
-            print(f"Times for {record_count} records: {times}")
         finally:
             shutil.rmtree(tmp_dir)
 
@@ -204,5 +133,452 @@ class TestSequentialFile(unittest.TestCase):
     def test_10000_records(self):
         self.run_full_test(10000)
 
+class TestBulkLoad(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir, name)
+
+    def test_bulk_load_matches_reconstruction(self):
+        csv_path = self.path("employee.csv")
+        generate_csv(csv_path, 500)
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        body = lines[1:]
+        random.Random(7).shuffle(body)
+        with open(csv_path, 'w', encoding='utf-8') as f:
+            f.writelines(lines[:1] + body)
+
+        # run_size pequeño para forzar el ordenamiento externo
+        bulk = sequentialFile(main_file=self.path("bulk.dat"), aux_file=self.path("bulk_aux.dat"), k=50)
+        self.assertEqual(bulk.bulk_load(csv_path, run_size=64), 500)
+
+        sf = sequentialFile(main_file=self.path("seq.dat"), aux_file=self.path("seq_aux.dat"), k=50)
+        with open(csv_path, 'r', encoding='utf-8') as csvfile:
+            for row in csv.DictReader(csvfile, delimiter=';'):
+                sf.insert(Record.from_row(row))
+        sf.reconstruct_main_file()
+
+        with open(self.path("bulk.dat"), 'rb') as a, open(self.path("seq.dat"), 'rb') as b:
+            self.assertEqual(a.read(), b.read())
+        self.assertEqual(os.path.getsize(self.path("bulk_aux.dat")), 0)
+        self.assertEqual(bulk.binary_search(250).Employee_ID, 250)
+        self.assertEqual([r.Employee_ID for r in bulk.range_search(10, 20)], list(range(10, 21)))
+        leftovers = [n for n in os.listdir(self.tmp_dir) if n.endswith('.tmp')]
+        self.assertEqual(leftovers, [])
+
+    def test_bulk_load_merges_existing_records(self):
+        sf = sequentialFile(main_file=self.path("main.dat"), aux_file=self.path("aux.dat"), k=1000)
+        records = [Record(i, f'Name{i}', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020') for i in range(1, 41)]
+        sf.bulk_load(records[::2])
+        sf.insert(records[1])
+        sf.remove(1)
+        sf.bulk_load(records[3::2])
+        ids = [r.Employee_ID for r in read_all_records(self.path("main.dat"))]
+        self.assertEqual(ids, list(range(2, 41)))
+
+    def test_reconstruct_merges_aux_into_sorted_main(self):
+        sf = sequentialFile(main_file=self.path("main.dat"), aux_file=self.path("aux.dat"), k=1000)
+        sf.bulk_load(Record(i, f'Name{i}', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020') for i in range(0, 100, 2))
+        for i in [51, 7, 99, 13, 1]:
+            sf.insert(Record(i, f'Name{i}', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020'))
+        sf.remove(40)
+        sf.remove(7)
+        with open(self.path("main.dat"), 'rb') as f:
+            main_before = f.read()
+        sf.reconstruct_main_file()
+
+        expected = sorted([i for i in range(0, 100, 2) if i != 40] + [51, 99, 13, 1])
+        records = read_all_records(self.path("main.dat"))
+        self.assertEqual([r.Employee_ID for r in records], expected)
+        # los registros se copian sin modificar sus bytes
+        self.assertIn(main_before[:RECORD_SIZE], open(self.path("main.dat"), 'rb').read())
+        self.assertEqual(os.path.getsize(self.path("aux.dat")), 0)
+        self.assertEqual([n for n in os.listdir(self.tmp_dir) if n.endswith('.tmp')], [])
+
+    def test_reconstruct_keeps_newest_version(self):
+        sf = sequentialFile(main_file=self.path("main.dat"), aux_file=self.path("aux.dat"), k=1000)
+        sf.bulk_load(Record(i, f'Name{i}', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020') for i in range(1, 6))
+        sf.insert(Record(7, 'v1', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020'))
+        sf.insert(Record(7, 'v2', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020'))
+        sf.insert(Record(3, 'New3', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020'))
+        sf.reconstruct_main_file()
+        ids = [r.Employee_ID for r in read_all_records(self.path("main.dat"))]
+        self.assertEqual(ids, [1, 2, 3, 4, 5, 7])
+        self.assertEqual(sf.get(7).Employee_Name, 'v2')
+        self.assertEqual(sf.get(3).Employee_Name, 'New3')
+        self.assertTrue(sf.remove(7))
+        self.assertIsNone(sf.get(7))
+        sf.close()
+
+    def test_binary_search_skips_deleted_records(self):
+        sf = sequentialFile(main_file=self.path("main.dat"), aux_file=self.path("aux.dat"), k=1000)
+        sf.bulk_load(Record(i, f'Name{i}', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020') for i in range(1, 201))
+        for i in range(60, 150):
+            self.assertTrue(sf.remove(i))
+        for i in range(1, 201):
+            r = sf.binary_search(i)
+            if 60 <= i < 150:
+                self.assertIsNone(r)
+            else:
+                self.assertEqual(r.Employee_ID, i)
+                self.assertEqual(r.Employee_Name, f'Name{i}')
+        self.assertIsNone(sf.binary_search(-1))
+        sf.close()
+
+    def test_range_search_uses_main_and_aux(self):
+        sf = sequentialFile(main_file=self.path("main.dat"), aux_file=self.path("aux.dat"), k=1000)
+        sf.bulk_load(Record(i, f'Name{i}', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020') for i in range(0, 300, 3))
+        for i in [31, 29, 100, 301]:
+            sf.insert(Record(i, f'Name{i}', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020'))
+        for i in [27, 30, 33, 36]:
+            sf.remove(i)
+        expected = sorted([i for i in range(27, 103, 3) if i not in (27, 30, 33, 36)] + [31, 29, 100])
+        self.assertEqual([r.Employee_ID for r in sf.range_search(27, 102)], expected)
+        self.assertEqual([r.Employee_ID for r in sf.range_search(300, 400)], [301])
+        self.assertEqual(sf.range_search(-5, -1), [])
+        self.assertEqual([r.Employee_ID for r in sf.range_search(-5, 0)], [0])
+        sf.close()
+
+    def test_get_checks_aux_then_main(self):
+        main_file, aux_file = self.path("main.dat"), self.path("aux.dat")
+        sf = sequentialFile(main_file=main_file, aux_file=aux_file, k=1000)
+        sf.bulk_load(Record(i, f'Name{i}', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020') for i in range(0, 100, 2))
+        for i in [5, 51, 77]:
+            sf.insert(Record(i, f'Aux{i}', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020'))
+        self.assertIsNone(sf.binary_search(51))
+        self.assertEqual(sf.get(51).Employee_Name, 'Aux51')
+        self.assertEqual(sf.get(50).Employee_Name, 'Name50')
+        self.assertIsNone(sf.get(53))
+
+        sf.remove(51)
+        sf.remove(50)
+        self.assertIsNone(sf.get(51))
+        self.assertIsNone(sf.get(50))
+        sf.close()
+
+        # el indice del auxiliar se reconstruye al abrir
+        sf = sequentialFile(main_file=main_file, aux_file=aux_file, k=1000)
+        self.assertEqual(sorted(sf.aux_index), [5, 77])
+        self.assertEqual(sf.get(77).Employee_Name, 'Aux77')
+        self.assertIsNone(sf.get(51))
+        sf.reconstruct_main_file()
+        self.assertEqual(sf.aux_index, {})
+        self.assertEqual(sf.get(77).Employee_Name, 'Aux77')
+        sf.close()
+
+    def test_bulk_load_keeps_newest_version(self):
+        sf = sequentialFile(main_file=self.path("main.dat"), aux_file=self.path("aux.dat"), k=1000)
+        sf.bulk_load(Record(i, f'Name{i}', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020') for i in range(1, 11))
+        sf.insert(Record(4, 'Aux4', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020'))
+        # run_size pequeño: las versiones de 5 quedan en corridas distintas
+        sf.bulk_load([Record(i, f'Load{i}', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020') for i in [2, 5, 12]] +
+                     [Record(5, 'Last5', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020')], run_size=2)
+        ids = [r.Employee_ID for r in read_all_records(self.path("main.dat"))]
+        self.assertEqual(ids, list(range(1, 11)) + [12])
+        self.assertEqual([sf.get(i).Employee_Name for i in [2, 4, 5, 12]], ['Load2', 'Aux4', 'Last5', 'Load12'])
+        sf.close()
+
+    def test_lookups_agree_on_newest_version(self):
+        sf = sequentialFile(main_file=self.path("main.dat"), aux_file=self.path("aux.dat"), k=1000)
+        sf.bulk_load(Record(i, f'Name{i}', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020') for i in range(1, 6))
+        for i, name in [(7, 'v1'), (7, 'v2'), (3, 'New3')]:
+            sf.insert(Record(i, name, 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020'))
+        for i, name in [(7, 'v2'), (3, 'New3'), (2, 'Name2')]:
+            self.assertEqual(sf.get(i).Employee_Name, name)
+            self.assertEqual(sf.search(i).Employee_Name, name)
+            self.assertEqual([r.Employee_Name for r in sf.range_search(i, i)], [name])
+        self.assertEqual([r.Employee_ID for r in sf.range_search(1, 10)], [1, 2, 3, 4, 5, 7])
+        sf.close()
+
+    def test_remove_drops_every_aux_version(self):
+        sf = sequentialFile(main_file=self.path("main.dat"), aux_file=self.path("aux.dat"), k=1000)
+        sf.bulk_load(Record(i, f'Name{i}', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020') for i in range(1, 6))
+        for name in ['v1', 'v2']:
+            sf.insert(Record(7, name, 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020'))
+        self.assertTrue(sf.remove(7))
+        self.assertIsNone(sf.get(7))
+        self.assertIsNone(sf.search(7))
+        self.assertEqual([r.Employee_ID for r in sf.range_search(1, 10)], [1, 2, 3, 4, 5])
+        self.assertFalse(sf.remove(7))
+        sf.close()
+
+        # al reabrir el indice del auxiliar se relee del archivo: ninguna copia sigue viva
+        sf = sequentialFile(main_file=self.path("main.dat"), aux_file=self.path("aux.dat"), k=1000)
+        self.assertIsNone(sf.get(7))
+        sf.reconstruct_main_file()
+        self.assertEqual([r.Employee_ID for r in read_all_records(self.path("main.dat"))], [1, 2, 3, 4, 5])
+        sf.close()
+
+    def test_remove_many(self):
+        sf = sequentialFile(main_file=self.path("main.dat"), aux_file=self.path("aux.dat"), k=1000)
+        sf.bulk_load(Record(i, f'Name{i}', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020') for i in range(1, 1001))
+        sf.insert(Record(2000, 'Aux2000', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020'))
+        sf.insert(Record(10, 'Aux10', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020'))
+
+        delete_ids = list(range(999, 0, -7)) + [2000, 5000, -1]
+        expected = set(range(999, 0, -7)) | {2000}
+        self.assertEqual(sf.remove_many(delete_ids), len(expected))
+        self.assertEqual(sf.remove_many(delete_ids), 0)
+        self.assertFalse(sf.remove(999))
+        self.assertTrue(sf.remove(10))
+        self.assertIsNone(sf.get(10))
+        expected.add(10)
+        for i in list(range(1, 1001)) + [2000]:
+            self.assertEqual(sf.get(i) is None, i in expected)
+
+        sf.reconstruct_main_file()
+        ids = [r.Employee_ID for r in read_all_records(self.path("main.dat"))]
+        self.assertEqual(ids, [i for i in range(1, 1001) if i not in expected])
+        sf.close()
+
+    def test_insert_many_rebuilds_once(self):
+        sf = sequentialFile(main_file=self.path("main.dat"), aux_file=self.path("aux.dat"), k=10)
+        sf.insert_many(Record(i, f'Name{i}', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020') for i in range(1, 6))
+        self.assertEqual(os.path.getsize(self.path("main.dat")), 0)
+        rebuilds = []
+        original = sf.reconstruct_main_file
+        sf.reconstruct_main_file = lambda: (rebuilds.append(1), original())
+        ids = list(range(6, 101))
+        random.Random(5).shuffle(ids)
+        records = [Record(i, f'Name{i}', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020') for i in ids]
+        records.append(Record(7, 'Last7', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020'))
+        self.assertEqual(sf.insert_many(records), 95)
+        self.assertEqual(len(rebuilds), 1)
+        self.assertEqual([r.Employee_ID for r in read_all_records(self.path("main.dat"))], list(range(1, 101)))
+        self.assertEqual(sf.get(7).Employee_Name, 'Last7')
+        self.assertEqual(sf.insert_many([]), 0)
+        sf.close()
+
+class TestRecordBatch(unittest.TestCase):
+    def test_batch_round_trip_matches_pack(self):
+        records = [Record(i, f'Nombre{i}', 20 + i, 'Perú', 'Sales', 'Developer', 1000.5 * i, f'{i}/01/2020')
+                   for i in range(1, 11)]
+        data = b''.join(r.pack() for r in records)
+        self.assertEqual(RecordBatch.from_records(records).tobytes(), data)
+        batch = RecordBatch.from_bytes(data)
+        self.assertEqual(len(batch), 10)
+        self.assertEqual([vars(r) for r in batch.records()], [vars(Record.unpack(r.pack())) for r in records])
+
+    def test_where_and_sort(self):
+        records = [Record(i, f'N{i}', 20 + (i % 30), 'Peru', 'Dep', 'Pos', float(i * 100), '1/01/2020')
+                   for i in range(50, 0, -1)]
+        records.append(Record(-1, 'Borrado', 25, 'Peru', 'Dep', 'Pos', 500.0, '1/01/2020'))
+        batch = RecordBatch.from_bytes(b''.join(r.pack() for r in records))
+        selected = batch.where(Age=(25, 30), Salary=(None, 3000.0)).sort_by_id()
+        self.assertEqual([int(i) for i in selected.ids()], [i for i in range(1, 31) if 25 <= 20 + (i % 30) <= 30])
+        head, tail = selected.split(7)
+        self.assertEqual([int(i) for i in head.ids()], [5, 6, 7])
+        self.assertEqual(RecordBatch.concat([head, tail]).tobytes(), selected.tobytes())
+
+    def test_sequential_filter(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            sf = sequentialFile(main_file=os.path.join(tmp_dir, "main.dat"),
+                                aux_file=os.path.join(tmp_dir, "aux.dat"), k=1000)
+            sf.bulk_load(Record(i, f'N{i}', 20 + (i % 45), 'Peru', 'Dep', 'Pos', float(30000 + i), '1/01/2020')
+                         for i in range(1, 301))
+            sf.insert(Record(1000, 'Aux', 40, 'Peru', 'Dep', 'Pos', 30050.0, '1/01/2020'))
+            sf.remove(25)
+            result = sf.filter(Age=(40, 45), Salary=(30000.0, 30100.0))
+            expected = [i for i in range(1, 101) if 40 <= 20 + (i % 45) <= 45 and i != 25] + [1000]
+            self.assertEqual([r.Employee_ID for r in result], expected)
+            sf.close()
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_filter_keeps_newest_version(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            sf = sequentialFile(main_file=os.path.join(tmp_dir, "main.dat"),
+                                aux_file=os.path.join(tmp_dir, "aux.dat"), k=1000)
+            sf.bulk_load(Record(i, f'Name{i}', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020') for i in range(1, 6))
+            for i, name, age in [(3, 'new3', 30), (9, 'a9', 30), (9, 'b9', 30), (4, 'new4', 50)]:
+                sf.insert(Record(i, name, age, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020'))
+            result = [(r.Employee_ID, r.Employee_Name) for r in sf.filter()]
+            self.assertEqual(result, [(1, 'Name1'), (2, 'Name2'), (3, 'new3'), (4, 'new4'), (5, 'Name5'), (9, 'b9')])
+            self.assertEqual(result, [(r.Employee_ID, r.Employee_Name) for r in sf.range_search(1, 10)])
+            # la version vieja de 4 cumple el filtro pero ya no es la vigente
+            self.assertEqual([r.Employee_ID for r in sf.filter(Age=(None, 40))], [1, 2, 3, 5, 9])
+            sf.close()
+        finally:
+            shutil.rmtree(tmp_dir)
+
+class TestBackgroundRebuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def open(self, **kw):
+        return sequentialFile(main_file=os.path.join(self.tmp_dir, "main.dat"),
+                              aux_file=os.path.join(self.tmp_dir, "aux.dat"), background=True, **kw)
+
+    def hold_merge(self, sf):
+        # la mezcla en segundo plano lee todo el principal y el congelado, avisa con snapshot y
+        # espera a release antes de escribir el temporal; asi lo que pase despues de snapshot
+        # siempre llega tarde a la mezcla, con o sin numpy
+        snapshot = threading.Event()
+        release = threading.Event()
+        write_records = sf.write_records
+        def blocked(f, records):
+            records = list(records)
+            snapshot.set()
+            release.wait(10)
+            return write_records(f, records)
+        sf.write_records = blocked
+        return snapshot, release
+
+    def test_inserts_continue_during_merge(self):
+        sf = self.open(k=10)
+        sf.bulk_load(make_record(i) for i in range(1, 101, 2))
+        snapshot, release = self.hold_merge(sf)
+        for i in range(2, 22, 2):
+            sf.insert(make_record(i))
+        # el auxiliar se congelo y la mezcla sigue bloqueada: las inserciones van a un auxiliar nuevo
+        self.assertTrue(sf.frozen)
+        self.assertTrue(snapshot.wait(10))
+        self.assertEqual(sf.aux_size, 0)
+        for i in range(22, 42, 2):
+            sf.insert(make_record(i))
+        self.assertEqual(sf.remove_many([1, 6, 30]), 3)
+        self.assertIsNone(sf.get(6))
+        self.assertEqual(sf.get(8).Employee_ID, 8)
+        self.assertEqual(sf.get(8).Employee_ID, 8)
+        expected = [i for i in range(1, 42) if i not in (1, 6, 30)] + list(range(43, 101, 2))
+        self.assertEqual([r.Employee_ID for r in sf.range_search(1, 100)], expected)
+        self.assertEqual([r.Employee_ID for r in sf.filter(Employee_ID=(1, 100))], expected)
+        self.assertEqual(sf.search(12).Employee_ID, 12)
+
+        release.set()
+        self.assertTrue(sf.wait_rebuild())
+        self.assertFalse(sf.frozen)
+        self.assertFalse(os.path.exists(sf.frozen_file))
+        # la mezcla copio 1 (del principal) y 6 (del congelado) antes de que se eliminaran:
+        # quedan como marcas en el principal nuevo
+        main_ids = [r.Employee_ID for r in read_all_records(os.path.join(self.tmp_dir, "main.dat"))]
+        self.assertEqual(main_ids, [-1 if i in (1, 6) else i for i in range(1, 101) if i <= 20 or i % 2 == 1])
+        self.assertEqual([r.Employee_ID for r in sf.range_search(1, 100)], expected)
+        self.assertFalse(sf.wait_rebuild())
+        sf.close()
+        self.assertEqual([n for n in os.listdir(self.tmp_dir) if n.endswith('.tmp')], [])
+
+    def test_tombstone_and_time_policies(self):
+        sf = self.open(k=1000, tombstone_ratio=0.25)
+        sf.bulk_load(make_record(i) for i in range(1, 41))
+        sf.remove_many(range(1, 10))
+        self.assertIsNone(sf.rebuild_thread)
+        sf.remove(10)
+        sf.wait_rebuild()
+        self.assertEqual(os.path.getsize(sf.main_file), 30 * RECORD_SIZE)
+        self.assertEqual(sf.tombstones, 0)
+        sf.close()
+
+        sf = self.open(k=1000, rebuild_seconds=0)
+        sf.insert(make_record(50))
+        sf.wait_rebuild()
+        self.assertEqual(os.path.getsize(sf.main_file), 31 * RECORD_SIZE)
+        self.assertEqual(sf.aux_size, 0)
+        sf.close()
+
+    def test_reopen_with_frozen_segment(self):
+        # sin bitacora, un congelado que quedo de una caida vuelve al auxiliar al abrir
+        sf = self.open(k=5)
+        _, release = self.hold_merge(sf)
+        for i in range(1, 9):
+            sf.insert(make_record(i))
+        sf.insert(make_record(2, Employee_Name='New2'))
+        self.assertTrue(sf.frozen)
+        crashed = sf
+        sf = self.open(k=5)
+        release.set()
+        crashed.rebuild_thread.join()
+        self.assertFalse(os.path.exists(sf.frozen_file))
+        self.assertEqual(sf.aux_size, 9 * RECORD_SIZE)
+        self.assertEqual(sf.get(2).Employee_Name, 'New2')
+        self.assertEqual([i for i in range(1, 10) if sf.get(i) is not None], list(range(1, 9)))
+        sf.close()
+
+    def test_remove_drops_every_frozen_version(self):
+        sf = self.open(k=5)
+        snapshot, release = self.hold_merge(sf)
+        for i, name in [(1, 'Name1'), (2, 'v1'), (2, 'v2'), (3, 'Name3'), (4, 'Name4')]:
+            sf.insert(make_record(i, Employee_Name=name))
+        self.assertTrue(sf.frozen)
+        self.assertTrue(snapshot.wait(10))
+        self.assertTrue(sf.remove(2))
+        self.assertIsNone(sf.get(2))
+        # caida sin bitacora con la mezcla pendiente: el congelado vuelve al auxiliar
+        crashed = sf
+        sf = self.open(k=5)
+        release.set()
+        crashed.rebuild_thread.join()
+        self.assertIsNone(sf.get(2))
+        self.assertEqual([r.Employee_ID for r in sf.range_search(1, 10)], [1, 3, 4])
+        sf.close()
+
+    def test_install_does_not_rewrite_secondary(self):
+        sf = self.open(k=5, secondary_fields=('Department',))
+        saves = []
+        save = sf.secondary.save
+        sf.secondary.save = lambda data_files: (saves.append(1), save(data_files))
+        for i in range(1, 6):
+            sf.insert(make_record(i))
+        sf.wait_rebuild()
+        self.assertEqual(saves, [])
+        self.assertEqual([r.Employee_ID for r in sf.find_by(Department='Dep1')], [1])
+        sf.close()
+        self.assertEqual(saves, [1])
+        sf = self.open(k=5, secondary_fields=('Department',))
+        self.assertEqual([r.Employee_ID for r in sf.find_by(Department='Dep2')], [2])
+        sf.close()
+
+def odd_id(record):
+    return record.Employee_ID % 2 == 1
+
+class TestParallelScan(unittest.TestCase):
+    def test_parallel_filter_matches_filter(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            sf = sequentialFile(main_file=os.path.join(tmp_dir, "main.dat"),
+                                aux_file=os.path.join(tmp_dir, "aux.dat"), k=1000)
+            sf.bulk_load(Record(i, f'N{i}', 20 + (i % 45), 'Peru', 'Dep', 'Pos', float(30000 + i), '1/01/2020')
+                         for i in range(1, 10001))
+            sf.insert(Record(20000, 'Aux', 40, 'Peru', 'Dep', 'Pos', 30050.0, '1/01/2020'))
+            sf.remove_many([41, 86, 5000])
+
+            for workers in [1, 3]:
+                result = sf.parallel_filter(workers=workers, Age=(40, 45), Salary=(None, 35000.0))
+                self.assertEqual([r.Employee_ID for r in result],
+                                 [r.Employee_ID for r in sf.filter(Age=(40, 45), Salary=(None, 35000.0))])
+            result = sf.parallel_filter(workers=4, predicate=odd_id, Employee_ID=(4000, 6000))
+            self.assertEqual([r.Employee_ID for r in result], [i for i in range(4001, 6000, 2)])
+            self.assertEqual(len(sf.parallel_filter(workers=2)), 9998)
+            sf.close()
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_parallel_filter_keeps_newest_version(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            sf = sequentialFile(main_file=os.path.join(tmp_dir, "main.dat"),
+                                aux_file=os.path.join(tmp_dir, "aux.dat"), k=1000)
+            sf.bulk_load(Record(i, f'Name{i}', 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020') for i in range(1, 6))
+            for i, name in [(3, 'new3'), (9, 'a9'), (9, 'b9')]:
+                sf.insert(Record(i, name, 30, 'Peru', 'Dep', 'Pos', 1000.0, '1/01/2020'))
+            expected = [(r.Employee_ID, r.Employee_Name) for r in sf.range_search(1, 10)]
+            self.assertEqual(expected, [(1, 'Name1'), (2, 'Name2'), (3, 'new3'), (4, 'Name4'), (5, 'Name5'),
+                                        (9, 'b9')])
+            self.assertEqual([(r.Employee_ID, r.Employee_Name) for r in sf.filter()], expected)
+            self.assertEqual([(r.Employee_ID, r.Employee_Name) for r in sf.parallel_filter(workers=2)], expected)
+            sf.close()
+        finally:
+            shutil.rmtree(tmp_dir)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
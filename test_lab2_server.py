@@ -0,0 +1,117 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from lab2_server import QueryServer, load_client
+from lab2_sequential import sequentialFile
+from lab2_paged import pagedSequentialFile
+from lab2_avl import AVLFile
+from lab2_fixtures import make_record
+
+class TestGetMany(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir, name)
+
+    def check(self, engine, remove):
+        engine.bulk_load(make_record(i) for i in range(1, 301, 2))
+        engine.insert(make_record(8))
+        engine.insert(make_record(500))
+        getattr(engine, remove)(101)
+        ids = [299, 8, 3, 101, 4, 3, 500, 1000, -1]
+        self.assertEqual([r and r.Employee_ID for r in engine.get_many(ids)],
+                         [299, 8, 3, None, None, 3, 500, None, None])
+        self.assertEqual(engine.get_many([]), [])
+        engine.close()
+
+    def test_sequential(self):
+        sf = sequentialFile(self.path('main.dat'), self.path('aux.dat'))
+        self.check(sf, 'remove')
+
+    def test_paged(self):
+        sf = pagedSequentialFile(self.path('main.dat'), self.path('aux.dat'), page_size=1024)
+        self.check(sf, 'remove')
+
+    def test_avl(self):
+        self.check(AVLFile(self.path('avl.dat')), 'delete')
+
+    def test_avl_reads_each_node_once(self):
+        avl = AVLFile(self.path('avl.dat'), stats=True)
+        avl.bulk_load(make_record(i) for i in range(1, 64))
+        avl.index.cache.clear()
+        avl.reset_stats()
+        self.assertEqual([r.Employee_ID for r in avl.get_many(range(1, 64))], list(range(1, 64)))
+        self.assertEqual(avl.stats()['counters']['node_cache_misses'], 63)
+        avl.close()
+
+class TestQueryServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    async def asyncTearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    async def request(self, reader, writer, request):
+        writer.write(json.dumps(request).encode() + b'\n')
+        return json.loads(await reader.readline())
+
+    async def check_engine(self, engine, name):
+        engine.bulk_load(make_record(i) for i in range(1, 201))
+        server = QueryServer(engine, name)
+        port = await server.start(port=0)
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+
+        response = await self.request(reader, writer, {'id': 1, 'op': 'get', 'key': 42})
+        self.assertEqual((response['id'], response['ok'], response['result']['Employee_Name']), (1, True, 'Name42'))
+        record = {'Employee_ID': 500, 'Employee_Name': 'Ana', 'Age': 31, 'Country': 'Peru', 'Department': 'Dep',
+                  'Position': 'Pos', 'Salary': 1000.5, 'Joining_Date': '2021-02-03'}
+        self.assertTrue((await self.request(reader, writer, {'id': 2, 'op': 'insert', 'record': record}))['ok'])
+        self.assertEqual((await self.request(reader, writer, {'op': 'get', 'key': 500}))['result'], record)
+        self.assertTrue((await self.request(reader, writer, {'op': 'delete', 'key': 10}))['ok'])
+        response = await self.request(reader, writer, {'op': 'range', 'low': 8, 'high': 12})
+        self.assertEqual([r['Employee_ID'] for r in response['result']], [8, 9, 11, 12])
+        response = await self.request(reader, writer, {'id': 3, 'op': 'drop'})
+        self.assertEqual((response['id'], response['ok']), (3, False))
+        self.assertFalse((await self.request(reader, writer, {'op': 'insert', 'record': {}}))['ok'])
+
+        # gets en cola de varias conexiones: se resuelven en pocos lotes
+        before = server.batches
+        connections = [await asyncio.open_connection('127.0.0.1', port) for _ in range(4)]
+        for c, (_, w) in enumerate(connections):
+            w.write(b''.join(json.dumps({'id': i, 'op': 'get', 'key': i * 4 + c}).encode() + b'\n'
+                             for i in range(1, 26)))
+        for c, (r, _) in enumerate(connections):
+            responses = [json.loads(await r.readline()) for _ in range(25)]
+            for response in responses:
+                key = response['id'] * 4 + c
+                self.assertEqual(response['result'] and response['result']['Employee_ID'],
+                                 None if key in (10,) or key > 200 else key)
+        self.assertLessEqual(server.batches - before, 8)
+        self.assertEqual(server.batched, 100 + 2)
+
+        summary = await load_client('127.0.0.1', port, connections=4, requests=200, key_space=200)
+        self.assertEqual((summary['count'], summary['errors']), (200, 0))
+        self.assertGreater(summary['qps'], 0)
+
+        for _, w in connections + [(reader, writer)]:
+            w.close()
+        await server.stop()
+        engine.close()
+
+    async def test_sequential(self):
+        await self.check_engine(sequentialFile(os.path.join(self.tmp_dir, 'main.dat'),
+                                               os.path.join(self.tmp_dir, 'aux.dat')), 'sequential')
+
+    async def test_avl(self):
+        await self.check_engine(AVLFile(os.path.join(self.tmp_dir, 'data.dat')), 'avl')
+
+if __name__ == '__main__':
+    unittest.main()
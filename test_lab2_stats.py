@@ -0,0 +1,115 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from lab2_stats import Histogram
+from lab2_sequential import sequentialFile
+from lab2_paged import pagedSequentialFile
+from lab2_avl import AVLFile
+from lab2_record import RECORD_SIZE
+from lab2_fixtures import make_record
+
+class TestHistogram(unittest.TestCase):
+    def test_percentiles_within_bucket_error(self):
+        hist = Histogram()
+        values = list(range(1, 100001))
+        random.Random(1).shuffle(values)
+        for value in values:
+            hist.record(value)
+        for q in (50, 90, 99, 99.9):
+            exact = q / 100 * 100000
+            self.assertLessEqual(abs(hist.percentile(q) - exact) / exact, 1 / 32)
+        summary = hist.summary()
+        self.assertEqual((summary['count'], summary['min'], summary['max']), (100000, 1, 100000))
+        self.assertLess(len(hist.counts), 600)
+
+class TestEngineStats(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir, name)
+
+    def test_disabled_has_no_wrappers(self):
+        sf = sequentialFile(self.path('main.dat'), self.path('aux.dat'))
+        avl = AVLFile(self.path('avl.dat'))
+        self.assertIsNone(sf.stats())
+        self.assertIsNone(avl.stats())
+        for engine in (sf, avl):
+            self.assertFalse({'insert', 'search', 'unpack'} & set(vars(engine)))
+        sf.close()
+        avl.close()
+
+    def test_sequential_counters(self):
+        sf = sequentialFile(self.path('main.dat'), self.path('aux.dat'), k=5, stats=True)
+        sf.bulk_load(make_record(i) for i in range(1, 21))
+        sf.reset_stats()
+        for i in range(21, 27):
+            sf.insert(make_record(i))
+        self.assertEqual(len(sf.range_search(1, 10)), 10)
+        sf.get(3)
+        stats = sf.stats()
+        counters = stats['counters']
+        self.assertEqual(counters['ops.insert'], 6)
+        self.assertEqual(counters['rebuilds'], 1)
+        self.assertEqual(counters['records_decoded'], 11)
+        self.assertEqual(counters['bytes_written'], (6 + 25) * RECORD_SIZE)
+        self.assertGreater(counters['file_opens'], 0)
+        self.assertEqual(stats['latency_ns']['reconstruct_main_file']['count'], 1)
+        self.assertEqual(stats['latency_ns']['insert']['count'], 6)
+        sf.reset_stats()
+        self.assertEqual(sf.stats(), {'counters': {}, 'latency_ns': {}})
+        sf.close()
+
+    def test_scans_count_like_lookups(self):
+        sf = sequentialFile(self.path('main.dat'), self.path('aux.dat'), k=1000, stats=True)
+        sf.bulk_load(make_record(i) for i in range(1, 1001))
+        for scan in (lambda: sf.range_search(1, 1000), sf.filter, lambda: sf.parallel_filter(workers=2)):
+            sf.reset_stats()
+            self.assertEqual(len(scan()), 1000)
+            counters = sf.stats()['counters']
+            self.assertEqual((counters['records_decoded'], counters['bytes_read']), (1000, 1000 * RECORD_SIZE))
+            self.assertNotIn('bytes_mapped', counters)
+        sf.close()
+
+    def test_paged_reads_pages(self):
+        sf = pagedSequentialFile(self.path('main.dat'), self.path('aux.dat'), page_size=1024, stats=True)
+        sf.bulk_load(make_record(i) for i in range(1, 101))
+        sf.reset_stats()
+        sf.get(50)
+        counters = sf.stats()['counters']
+        self.assertEqual((counters['pages_read'], counters['bytes_read']), (1, 1024))
+        self.assertEqual(counters['records_decoded'], 1)
+        sf.close()
+
+    def test_avl_rotations_by_case(self):
+        cases = {'left_left': [3, 2, 1], 'right_right': [1, 2, 3], 'left_right': [3, 1, 2], 'right_left': [1, 3, 2]}
+        for case, ids in cases.items():
+            avl = AVLFile(self.path(f'{case}.dat'), stats=True)
+            for i in ids:
+                avl.insert(make_record(i))
+            rotations = {name: n for name, n in avl.stats()['counters'].items() if name.startswith('rotations.')}
+            self.assertEqual(rotations, {'rotations.' + case: 1})
+            self.assertEqual([r.Employee_ID for r in avl.range_search(1, 3)], [1, 2, 3])
+            avl.close()
+
+    def test_avl_cache_hits(self):
+        avl = AVLFile(self.path('avl.dat'), stats=True)
+        avl.bulk_load(make_record(i) for i in range(1, 51))
+        avl.reset_stats()
+        avl.search(7)
+        avl.search(7)
+        stats = avl.stats()
+        self.assertEqual(stats['counters']['record_cache_hits'], 1)
+        self.assertEqual(stats['counters']['record_cache_misses'], 1)
+        self.assertEqual(stats['counters']['records_decoded'], 1)
+        self.assertEqual(stats['latency_ns']['search']['count'], 2)
+        avl.close()
+
+if __name__ == '__main__':
+    unittest.main()
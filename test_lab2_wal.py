@@ -0,0 +1,216 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from lab2_sequential import sequentialFile
+from lab2_paged import pagedSequentialFile
+from lab2_fixtures import make_record
+from lab2_wal import WriteAheadLog, WAL_INSERT, WAL_REBUILD, WAL_SWAP, CHECKPOINT
+
+class TestWriteAheadLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'log.wal')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_group_commit(self):
+        wal = WriteAheadLog(self.path, group_size=4, group_ms=60000)
+        for i in range(10):
+            wal.append(WAL_INSERT, make_record(i).pack())
+        self.assertEqual(wal.syncs, 2)
+        self.assertEqual(wal.pending, 2)
+        wal.close()
+        self.assertEqual(wal.syncs, 3)
+
+    def test_torn_tail_is_dropped(self):
+        wal = WriteAheadLog(self.path, group_size=1)
+        wal.append(WAL_INSERT, make_record(1).pack())
+        wal.close()
+        with open(self.path, 'ab') as f:
+            f.write(b'\x01\x72\x00\x00\x00garbage')
+        wal = WriteAheadLog(self.path)
+        _, _, entries = wal.replay_state()
+        self.assertEqual(len(entries), 1)
+        wal.close()
+
+class TestSequentialWAL(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.main = os.path.join(self.tmp_dir, 'main.dat')
+        self.aux = os.path.join(self.tmp_dir, 'aux.dat')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def open(self, **kw):
+        return sequentialFile(self.main, self.aux, wal=True, group_size=1, **kw)
+
+    def ids(self, sf):
+        return [r.Employee_ID for r in sf.range_search(0, 10 ** 6)]
+
+    def crash(self, sf):
+        # se pierde lo que no llego a disco en el auxiliar; la bitacora esta sincronizada
+        with open(self.aux, 'r+b') as f:
+            f.truncate(0)
+
+    def test_replay_after_crash(self):
+        sf = self.open(k=100)
+        sf.bulk_load(make_record(i) for i in range(1, 11))
+        for i in range(11, 21):
+            sf.insert(make_record(i))
+        sf.remove_many([3, 15])
+        self.crash(sf)
+        sf = self.open(k=100)
+        self.assertEqual(self.ids(sf), [i for i in range(1, 21) if i not in (3, 15)])
+        sf.close()
+        # cierre limpio: la bitacora queda solo con la marca
+        self.assertLess(os.path.getsize(self.main + '.wal'), 50)
+
+    def test_crash_after_rebuild_rename(self):
+        sf = self.open(k=100)
+        for i in range(1, 11):
+            sf.insert(make_record(i))
+        # se reemplaza el principal pero no se alcanza a limpiar el auxiliar
+        sf.write_main_file(sf.merged_records())
+        sf = self.open(k=100)
+        self.assertEqual(self.ids(sf), list(range(1, 11)))
+        self.assertEqual(sf.aux_size, 0)
+        sf.close()
+
+    def test_crash_before_rebuild_rename(self):
+        sf = self.open(k=100)
+        for i in range(1, 11):
+            sf.insert(make_record(i))
+        # temporal completo y marca durable, pero el rename no ocurrio
+        tmp_path = os.path.join(self.tmp_dir, '.main-crash.tmp')
+        with open(tmp_path, 'wb') as f:
+            sf.write_records(f, sf.merged_records())
+        sf.wal.append(WAL_REBUILD, os.path.basename(tmp_path).encode())
+        sf.commit()
+        sf = self.open(k=100)
+        self.assertFalse(os.path.exists(tmp_path))
+        self.assertEqual(os.path.getsize(self.main), 10 * sf.record_size)
+        self.assertEqual(self.ids(sf), list(range(1, 11)))
+        sf.close()
+
+    def test_rebuild_checkpoints_log(self):
+        sf = self.open(k=5)
+        for i in range(1, 13):
+            sf.insert(make_record(i))
+        self.crash(sf)
+        sf = self.open(k=5)
+        self.assertEqual(self.ids(sf), list(range(1, 13)))
+        sf.close()
+
+    def test_replay_fills_aux(self):
+        # lote de k o mas registros en la bitacora: al rehacerlo se reconstruye el principal al abrir
+        sf = self.open(k=5)
+        sf.prepare_batch([make_record(i) for i in range(1, 9)])
+        sf.commit()
+        self.crash(sf)
+        sf = self.open(k=5)
+        self.assertEqual(self.ids(sf), list(range(1, 9)))
+        sf.close()
+
+class TestPagedWAL(TestSequentialWAL):
+    def open(self, **kw):
+        return pagedSequentialFile(self.main, self.aux, page_size=1024, wal=True, group_size=1, **kw)
+
+    def test_log_synced_before_page_write(self):
+        # con commit en grupo, una insercion que reescribe una pagina fuerza antes el fsync del log
+        sf = pagedSequentialFile(self.main, self.aux, page_size=1024, wal=True, group_size=64, group_ms=60000)
+        sf.bulk_load(make_record(i) for i in range(1, 20, 2))
+        sf.insert(make_record(4))
+        self.assertEqual(sf.wal.pending, 0)
+        sf.insert_many([make_record(6), make_record(8)])
+        self.assertEqual(sf.wal.pending, 0)
+        sf.close()
+
+    def test_crash_before_rebuild_rename(self):
+        sf = self.open(k=100)
+        for i in range(1, 11):
+            sf.insert(make_record(i))
+        tmp_path = os.path.join(self.tmp_dir, '.main-crash.tmp')
+        with open(tmp_path, 'wb') as f:
+            sf.write_records(f, sf.merged_records())
+        sf.wal.append(WAL_REBUILD, os.path.basename(tmp_path).encode())
+        sf.commit()
+        sf.file.close()
+        sf = self.open(k=100)
+        self.assertFalse(os.path.exists(tmp_path))
+        self.assertEqual(self.ids(sf), list(range(1, 11)))
+        sf.close()
+
+class TestBackgroundWAL(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.main = os.path.join(self.tmp_dir, 'main.dat')
+        self.aux = os.path.join(self.tmp_dir, 'aux.dat')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def open(self, **kw):
+        return sequentialFile(self.main, self.aux, wal=True, group_size=1, background=True, **kw)
+
+    def ids(self, sf):
+        return [r.Employee_ID for r in sf.range_search(0, 10 ** 6)]
+
+    def test_crash_during_merge(self):
+        sf = self.open(k=5)
+        # la mezcla termina de leer antes de la caida simulada: un hilo de la instancia caida
+        # no debe leer archivos que la recuperacion ya trunco
+        snapshot = threading.Event()
+        release = threading.Event()
+        write_records = sf.write_records
+        def blocked(f, records):
+            records = list(records)
+            snapshot.set()
+            release.wait(10)
+            return write_records(f, records)
+        sf.write_records = blocked
+        for i in range(1, 9):
+            sf.insert(make_record(i))
+        sf.remove(2)
+        self.assertTrue(sf.frozen)
+        self.assertTrue(snapshot.wait(10))
+        # se pierde lo no sincronizado del auxiliar activo; el congelado y la bitacora sobreviven
+        with open(self.aux, 'r+b') as f:
+            f.truncate(0)
+        crashed = sf
+        sf = self.open(k=5)
+        release.set()
+        crashed.rebuild_thread.join()
+        self.assertFalse(os.path.exists(self.aux + '.frozen'))
+        self.assertEqual(self.ids(sf), [1, 3, 4, 5, 6, 7, 8])
+        sf.close()
+
+    def test_crash_after_swap_mark(self):
+        sf = self.open(k=5)
+        for i in range(1, 5):
+            sf.insert(make_record(i))
+        sf.remove(3)
+        installed = []
+        sf.install_background = installed.append
+        for i in range(5, 8):
+            sf.insert(make_record(i))
+        sf.wait_rebuild()
+        # la marca es durable pero no se alcanza a reemplazar el principal
+        tmp_path = installed[0]
+        sf.sync_data()
+        sf.wal.append(WAL_SWAP, CHECKPOINT.pack(sf.aux_size) + os.path.basename(tmp_path).encode())
+        sf.commit()
+        sf.insert(make_record(9))
+        sf = self.open(k=100)
+        self.assertFalse(os.path.exists(tmp_path))
+        self.assertFalse(os.path.exists(self.aux + '.frozen'))
+        self.assertEqual(os.path.getsize(self.main), 4 * sf.record_size)
+        self.assertEqual(self.ids(sf), [1, 2, 4, 5, 6, 7, 9])
+        sf.close()
+
+if __name__ == '__main__':
+    unittest.main()